@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateIndex, CreateTable
+import hashlib
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -36,13 +39,62 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Initialize database tables"""
+def _import_models():
+    """Register every model on Base.metadata"""
     from app.models.user import User
     from app.models.project import Project
     from app.models.competition import Competition
     from app.models.generated_file import GeneratedFile
     from app.models.generation_log import GenerationLog
     from app.models.token import Token
-    Base.metadata.create_all(bind=engine)
+    from app.models.catalogue_version import CatalogueVersion
+    from app.models.openai_usage import OpenAIUsage
+    from app.models.generation_job import GenerationJob
+    from app.models.generation_batch import GenerationBatch
+    from app.models.document_version import DocumentVersion
+    from app.models.idea_signature import IdeaSignature
+
+
+def schema_fingerprint() -> str:
+    """Hash of the DDL for every table and index the models declare"""
+    statements = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        statements.append(str(CreateTable(table).compile(engine)).strip())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            statements.append(str(CreateIndex(index).compile(engine)).strip())
+    return hashlib.sha256("\n".join(statements).encode("utf-8")).hexdigest()
 
+
+def _stored_fingerprint() -> str | None:
+    try:
+        with engine.connect() as connection:
+            return connection.execute(
+                text("SELECT value FROM schema_info WHERE key = 'fingerprint'")
+            ).scalar()
+    except (OperationalError, ProgrammingError):
+        # schema_info does not exist yet (new database)
+        return None
+
+
+def init_db(force: bool = False):
+    """
+    Initialize database tables.
+
+    create_all() reflects every table on each start, so it only runs when the
+    models' schema fingerprint differs from the one stored by the last run
+    (or when `force` is set).
+    """
+    _import_models()
+    fingerprint = schema_fingerprint()
+    if not force and _stored_fingerprint() == fingerprint:
+        return
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_info (key VARCHAR PRIMARY KEY, value VARCHAR NOT NULL)"
+        ))
+        connection.execute(text("DELETE FROM schema_info WHERE key = 'fingerprint'"))
+        connection.execute(
+            text("INSERT INTO schema_info (key, value) VALUES ('fingerprint', :value)"),
+            {"value": fingerprint},
+        )
@@ -1,4 +1,6 @@
-from fastapi import Depends, HTTPException, status
+import os
+import secrets
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.database import get_db
@@ -29,3 +31,14 @@ def get_current_user(
     
     return user
 
+
+def require_admin(x_admin_token: str | None = Header(None)) -> None:
+    """
+    Dependency for operator-only endpoints. The token is compared with the
+    ADMIN_TOKEN environment variable; without it admin endpoints are disabled.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
@@ -0,0 +1,64 @@
+"""
+Line deltas between two versions of a document, stored zlib-compressed.
+
+A delta is a JSON list of operations that rebuild the new text from the old
+one: `[start, end]` copies lines start..end of the old text, a string inserts
+new text. Regenerated documents mostly keep their structure, so copies cover
+much of the text and a delta is a fraction of a full copy.
+"""
+import difflib
+import hashlib
+import json
+import zlib
+from typing import Iterable, List, Union
+
+Operation = Union[List[int], str]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def compress(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+def decompress(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def encode_delta(old: str, new: str) -> List[Operation]:
+    """Operations that turn `old` into `new`"""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    operations: List[Operation] = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            operations.append([i1, i2])
+        elif j2 > j1:
+            operations.append("".join(new_lines[j1:j2]))
+    return operations
+
+
+def apply_delta(old: str, operations: Iterable[Operation]) -> str:
+    old_lines = old.splitlines(keepends=True)
+    return "".join(
+        "".join(old_lines[operation[0]:operation[1]]) if isinstance(operation, list) else operation
+        for operation in operations
+    )
+
+
+def compress_delta(operations: List[Operation]) -> bytes:
+    return compress(json.dumps(operations, ensure_ascii=False, separators=(",", ":")))
+
+
+def decompress_delta(data: bytes) -> List[Operation]:
+    return json.loads(decompress(data))
+
+
+def unified_diff(old: str, new: str, old_label: str, new_label: str, context: int = 3) -> List[str]:
+    """Lines of a unified diff, without line endings"""
+    return list(difflib.unified_diff(
+        old.splitlines(), new.splitlines(), old_label, new_label, n=context, lineterm="",
+    ))
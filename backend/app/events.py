@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+# Events buffered per subscriber before further events are dropped
+MAX_QUEUED_EVENTS = 1000
+
+
+class Subscription:
+    """A subscriber's queue of events for one or more projects, consumed on its event loop"""
+
+    def __init__(self, bus: "ProjectEventBus", loop: asyncio.AbstractEventLoop):
+        self.bus = bus
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUED_EVENTS)
+        self.project_ids: Set[int] = set()
+        self.dropped = 0
+
+    def add(self, project_id: int) -> None:
+        self.bus._add(self, project_id)
+
+    def remove(self, project_id: int) -> None:
+        self.bus._remove(self, project_id)
+
+    def close(self) -> None:
+        for project_id in list(self.project_ids):
+            self.bus._remove(self, project_id)
+
+    def _deliver(self, event: dict) -> None:
+        # Runs on the subscriber's loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next event, or None if none arrives within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ProjectEventBus:
+    """
+    In-process pub/sub for project events (new logs, file status changes, job
+    completion).
+
+    Publishers can be any thread - generation runs in background worker
+    threads - while subscribers are asyncio queues on the event loop. Publishing
+    costs O(subscribers of that project); nobody polls the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, project_ids: Iterable[int] = ()) -> Subscription:
+        """Create a subscription on the running event loop"""
+        subscription = Subscription(self, asyncio.get_running_loop())
+        for project_id in project_ids:
+            subscription.add(project_id)
+        return subscription
+
+    def _add(self, subscription: Subscription, project_id: int) -> None:
+        with self._lock:
+            self._subscribers[project_id].add(subscription)
+            subscription.project_ids.add(project_id)
+
+    def _remove(self, subscription: Subscription, project_id: int) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[project_id]
+            subscription.project_ids.discard(project_id)
+
+    def publish(self, project_id: int, event: dict) -> None:
+        """Deliver `event` to every subscriber of `project_id`. Safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(project_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                subscription.close()
+
+
+project_events = ProjectEventBus()
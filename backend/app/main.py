@@ -1,9 +1,15 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import init_db
-from app.routers import auth, projects, competitions, files
+from app.metrics import mark_process_dead, render_metrics
+from app.middleware import CompressionMiddleware, ProfilingMiddleware, TimingMiddleware, compression_stats
+from app.services import speculative_generation
+from app.services.openai_client import close_openai_client
+from app.routers import admin, auth, projects, competitions, files, realtime, usage
 
-app = FastAPI(title="Entrepreneurship Platform API", version="1.0.0")
+# orjson for plain dict responses; model responses go through app.responses.model_response
+app = FastAPI(title="Entrepreneurship Platform API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS configuration
 # Note: When allow_credentials=True, allow_origins cannot be ["*"]
@@ -16,11 +22,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in profiling (admin header or PROFILE_SAMPLE_RATE); a no-op otherwise
+app.add_middleware(ProfilingMiddleware)
+# Compress large JSON/markdown responses (competition prompts, file contents, logs)
+app.add_middleware(CompressionMiddleware)
+# Outermost, so recorded latencies include compression
+app.add_middleware(TimingMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(projects.router)
 app.include_router(competitions.router)
 app.include_router(files.router)
+app.include_router(realtime.router)
+app.include_router(usage.router)
+app.include_router(admin.router)
 
 
 @app.on_event("startup")
@@ -29,7 +45,26 @@ async def startup_event():
     init_db()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    mark_process_dead()
+    speculative_generation.shutdown()
+    close_openai_client()
+
+
 @app.get("/")
 def root():
     return {"message": "Entrepreneurship Platform API"}
 
+
+@app.get("/api/metrics/compression")
+def get_compression_metrics():
+    """Compression ratio and CPU time per encoding, used to tune the levels"""
+    return compression_stats.snapshot()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics (aggregated across workers in multiprocess mode)"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,98 @@
+"""
+Prometheus metrics for the API and the generation pipeline.
+
+When running several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory before starting the server. Every worker then writes its samples there
+and /metrics aggregates all of them, whichever worker answers the scrape.
+"""
+import os
+from typing import Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Buckets (seconds) sized for API calls and for multi-minute generation jobs
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+GENERATION_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 300.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ["method", "route"], buckets=HTTP_BUCKETS,
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "http_requests_total", "HTTP requests by route and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served",
+    ["method"], multiprocess_mode="livesum",
+)
+
+GENERATION_QUEUE_WAIT = Histogram(
+    "generation_queue_wait_seconds", "Time between scheduling a generation task and its start",
+    ["kind"], buckets=GENERATION_BUCKETS,
+)
+GENERATION_DURATION = Histogram(
+    "generation_duration_seconds", "Generation task run time",
+    ["kind", "outcome"], buckets=GENERATION_BUCKETS,
+)
+GENERATIONS_IN_PROGRESS = Gauge(
+    "generations_in_progress", "Generation tasks currently running",
+    ["kind"], multiprocess_mode="livesum",
+)
+SPECULATIVE_GENERATIONS = Counter(
+    "speculative_generations_total", "Speculative generations by outcome (started, served, preempted, skipped_*)",
+    ["outcome"],
+)
+OPENAI_REQUEST_DURATION = Histogram(
+    "openai_request_duration_seconds", "OpenAI chat completion latency",
+    ["model"], buckets=GENERATION_BUCKETS,
+)
+OPENAI_TIME_TO_FIRST_TOKEN = Histogram(
+    "openai_time_to_first_token_seconds", "Time until the first streamed token of a completion",
+    ["model"], buckets=GENERATION_BUCKETS,
+)
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total", "OpenAI tokens used",
+    ["model", "type"],
+)
+OPENAI_RETRIES = Counter(
+    "openai_retries_total", "OpenAI requests retried after a transient error",
+    ["model"],
+)
+OPENAI_HEDGED_COMPLETIONS = Counter(
+    "openai_hedged_completions_total", "Completions that sent a duplicate request because the first token was late",
+    ["model"],
+)
+
+COMPRESSION_BYTES = Counter(
+    "http_compression_bytes_total", "Response bytes before and after compression",
+    ["encoding", "stage"],
+)
+COMPRESSION_CPU_SECONDS = Counter(
+    "http_compression_cpu_seconds_total", "CPU time spent compressing responses",
+    ["encoding"],
+)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return (body, content type) in the Prometheus text format"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess directory on shutdown"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,5 @@
+from .compression import CompressionMiddleware, compression_stats
+from .profiling import ProfilingMiddleware
+from .timing import TimingMiddleware
+
+__all__ = ["CompressionMiddleware", "ProfilingMiddleware", "TimingMiddleware", "compression_stats"]
@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from app.metrics import COMPRESSION_BYTES, COMPRESSION_CPU_SECONDS
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Only text-like payloads are worth compressing. Everything else (ZIP archives,
+# PDFs, images) is either already compressed or binary and passes through.
+COMPRESSIBLE_TYPES = frozenset({
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "text/plain",
+    "text/markdown",
+    "text/html",
+    "text/css",
+    "text/csv",
+})
+
+
+class CompressionStats:
+    """Thread-safe counters used to tune the compression level"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encodings: Dict[str, Dict[str, float]] = {}
+        self._skipped: Dict[str, int] = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        COMPRESSION_BYTES.labels(encoding=encoding, stage="in").inc(bytes_in)
+        COMPRESSION_BYTES.labels(encoding=encoding, stage="out").inc(bytes_out)
+        COMPRESSION_CPU_SECONDS.labels(encoding=encoding).inc(cpu_seconds)
+        with self._lock:
+            totals = self._encodings.setdefault(
+                encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+            )
+            totals["responses"] += 1
+            totals["bytes_in"] += bytes_in
+            totals["bytes_out"] += bytes_out
+            totals["cpu_seconds"] += cpu_seconds
+
+    def record_skip(self, reason: str) -> None:
+        with self._lock:
+            self._skipped[reason] = self._skipped.get(reason, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            encodings = {}
+            for encoding, totals in self._encodings.items():
+                megabytes = totals["bytes_in"] / (1024 * 1024)
+                encodings[encoding] = {
+                    **totals,
+                    "ratio": round(totals["bytes_in"] / totals["bytes_out"], 2) if totals["bytes_out"] else None,
+                    "cpu_ms_per_mb": round(totals["cpu_seconds"] * 1000 / megabytes, 2) if megabytes else None,
+                }
+            return {"encodings": encodings, "skipped": dict(self._skipped)}
+
+
+compression_stats = CompressionStats()
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 produces a gzip container instead of a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Gzip/brotli response compression for large text payloads.
+
+    Responses are compressed only when the client accepts it, the content type
+    is on the allow-list, the body is at least `minimum_size` bytes and the
+    response is not already encoded, a partial (206) response or one that
+    offers byte ranges (ranges and its ETag refer to the identity encoding).
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+        compressible_types=COMPRESSIBLE_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        self.gzip_level = gzip_level if gzip_level is not None else int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+        # Low brotli qualities are much cheaper on CPU and still beat gzip on markdown
+        self.brotli_quality = brotli_quality if brotli_quality is not None else int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+        self.compressible_types = compressible_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    @staticmethod
+    def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+        accepted = set()
+        for part in accept_encoding.split(","):
+            token, _, params = part.strip().partition(";")
+            params = params.replace(" ", "")
+            if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+                continue
+            accepted.add(token.strip().lower())
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def create_compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+
+class _CompressingResponder:
+    """Wraps `send` for a single response and compresses its body"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream_send = send
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def _skip_reason(self, headers: Headers, body: bytes, more_body: bool) -> Optional[str]:
+        if "content-encoding" in headers:
+            return "already_encoded"
+        if self.start_message["status"] == 206 or "content-range" in headers:
+            return "partial_content"
+        if headers.get("accept-ranges", "none").lower() != "none":
+            # A resumed download would get identity bytes at offsets into the compressed body
+            return "range_capable"
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type not in self.middleware.compressible_types:
+            return "content_type"
+        if not more_body and len(body) < self.middleware.minimum_size:
+            return "below_minimum_size"
+        return None
+
+    def _compress(self, body: bytes, final: bool) -> bytes:
+        started = time.thread_time()
+        if final:
+            compressed = self.compressor.finish(body)
+        else:
+            compressed = self.compressor.compress(body)
+        self.cpu_seconds += time.thread_time() - started
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+        return compressed
+
+    async def send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the headers back until we have seen the first body chunk
+            self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=list(self.start_message["headers"]))
+            reason = self._skip_reason(headers, body, more_body)
+            if reason:
+                compression_stats.record_skip(reason)
+                self.passthrough = True
+                await self.downstream_send(self.start_message)
+                await self.downstream_send(message)
+                return
+
+            self.compressor = self.middleware.create_compressor(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                compressed = self._compress(body, final=True)
+                headers["Content-Length"] = str(len(compressed))
+                headers.append(
+                    "Server-Timing",
+                    f'compress;dur={self.cpu_seconds * 1000:.2f};desc="{self.encoding} {self._ratio()}x"',
+                )
+                self.start_message["headers"] = headers.raw
+                compression_stats.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
+                await self.downstream_send(self.start_message)
+                await self.downstream_send({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming response - length is unknown until the last chunk
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            self.start_message["headers"] = headers.raw
+            await self.downstream_send(self.start_message)
+
+        compressed = self._compress(body, final=not more_body)
+        if not more_body:
+            compression_stats.record(self.encoding, self.bytes_in, self.bytes_out, self.cpu_seconds)
+        await self.downstream_send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _ratio(self) -> str:
+        if not self.bytes_out:
+            return "0"
+        return f"{self.bytes_in / self.bytes_out:.1f}"
@@ -0,0 +1,71 @@
+import os
+import secrets
+import time
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from app.profiling import (
+    collect_thread_profiles, combine_sessions, is_sampled, profiling_available, start_profiler, write_profile,
+)
+
+
+class ProfilingMiddleware:
+    """
+    Runs a sampling profiler around selected requests.
+
+    A request is profiled when it carries `X-Profile: 1` and a valid `X-Admin-Token`,
+    or when it is picked by PROFILE_SAMPLE_RATE. Profiled requests get
+    `request.state.profile = True` so endpoints can profile the background work they
+    schedule too. Sync endpoints run in a worker thread and are profiled there by
+    their route (app.profiling.ProfiledRoute); their samples are merged into the
+    request's profile. The request profile ends with the last body chunk, before
+    background tasks run. With neither configured, requests pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.admin_token = os.getenv("ADMIN_TOKEN")
+        self.enabled = profiling_available() and (bool(self.admin_token) or float(os.getenv("PROFILE_SAMPLE_RATE", "0")) > 0)
+
+    def _requested_by_admin(self, scope) -> bool:
+        if not self.admin_token:
+            return False
+        headers = Headers(scope=scope)
+        if headers.get("x-profile") not in ("1", "true"):
+            return False
+        return secrets.compare_digest(headers.get("x-admin-token", ""), self.admin_token)
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not (self._requested_by_admin(scope) or is_sampled()):
+            await self.app(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["profile"] = True
+        started = time.monotonic()
+        profiler = start_profiler(async_mode="enabled")
+        duration = None
+
+        async def send_wrapper(message):
+            nonlocal duration
+            await send(message)
+            # Background tasks run after the response, inside the app call; they
+            # are profiled on their own (profiled_task), not as part of the request
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and duration is None:
+                profiler.stop()
+                duration = time.monotonic() - started
+
+        with collect_thread_profiles() as thread_sessions:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if duration is None:
+                    profiler.stop()
+                    duration = time.monotonic() - started
+            label = f"{scope['method']} {scope['path']}"
+            try:
+                session = combine_sessions(profiler.last_session, thread_sessions)
+                await run_in_threadpool(write_profile, session, label, duration)
+            except Exception as e:
+                print(f"Failed to write profile for {label}: {e}")
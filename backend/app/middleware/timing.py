@@ -0,0 +1,67 @@
+import time
+from typing import Dict
+from app.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_PROGRESS, HTTP_REQUESTS_TOTAL
+
+# Label for requests that did not match any route, to keep label cardinality bounded
+UNMATCHED_ROUTE = "unmatched"
+
+
+class TimingMiddleware:
+    """Records per-route latency, status codes and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_templates: Dict[object, str] = {}
+
+    def _route_template(self, scope) -> str:
+        # The router stores the matched endpoint in the scope; map it back to its path template
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._route_templates.get(endpoint)
+        if template is None:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    template = route.path
+                    break
+            else:
+                template = UNMATCHED_ROUTE
+            self._route_templates[endpoint] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method=method)
+        recorded = False
+
+        def record():
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            in_progress.dec()
+            route = self._route_template(scope)
+            HTTP_REQUEST_DURATION.labels(method=method, route=route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS_TOTAL.labels(method=method, route=route, status=str(status_code)).inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            # Record once the last body chunk is out: background tasks run after
+            # this inside the same app call and must not count as request latency
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record()
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+
+class CatalogueVersion(Base):
+    """Monotonic version counters for data that is cached in memory (e.g. competitions)"""
+    __tablename__ = "catalogue_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __init__(self, name: str = None, version: int = 0):
+        self.name = name
+        self.version = version
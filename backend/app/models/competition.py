@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
 from datetime import datetime
 from app.database import Base
 
@@ -11,13 +11,16 @@ class Competition(Base):
     description = Column(Text)
     advice_prompt = Column(Text)  # Prompt/instructions for how to describe the idea
     file_generation_prompt = Column(Text)  # Prompt for generating competition files
+    model_routing = Column(JSON, nullable=True)  # Per-document model settings, see services/model_routing.py
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
-    def __init__(self, name: str = None, description: str = None, advice_prompt: str = None, file_generation_prompt: str = None):
+    def __init__(self, name: str = None, description: str = None, advice_prompt: str = None, file_generation_prompt: str = None,
+                 model_routing: dict = None):
         self.name = name
         self.description = description
         self.advice_prompt = advice_prompt
         self.file_generation_prompt = file_generation_prompt
+        self.model_routing = model_routing
         if not hasattr(self, 'created_at') or self.created_at is None:
             self.created_at = datetime.utcnow()
 
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+
+class DocumentVersion(Base):
+    """
+    One saved version of a project's document. Most rows hold a compressed delta
+    against the previous version; every few versions (and whenever it is smaller)
+    a full snapshot is stored instead, so rebuilding a version never replays a
+    long chain. See app.document_delta.
+    """
+    __tablename__ = "document_versions"
+    __table_args__ = (
+        # Also the index for reading a document's versions in order
+        UniqueConstraint("project_id", "filename", "version", name="uq_document_versions_version"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    version = Column(Integer, nullable=False)  # 1, 2, ... per project and filename
+    kind = Column(String, nullable=False)  # snapshot, delta
+    data = Column(LargeBinary, nullable=False)  # zlib: the content (snapshot) or delta opcodes as JSON
+    size = Column(Integer, nullable=False)  # characters of the full content
+    content_hash = Column(String, nullable=False)  # sha256 of the content; unchanged saves add no version
+    file_type = Column(String)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __init__(self, project_id: int = None, filename: str = None, version: int = None, kind: str = None,
+                 data: bytes = None, size: int = 0, content_hash: str = None, file_type: str = None):
+        self.project_id = project_id
+        self.filename = filename
+        self.version = version
+        self.kind = kind
+        self.data = data
+        self.size = size
+        self.content_hash = content_hash
+        self.file_type = file_type
+        if not hasattr(self, 'created_at') or self.created_at is None:
+            self.created_at = datetime.utcnow()
@@ -12,14 +12,16 @@ class GeneratedFile(Base):
     content = Column(Text, nullable=False)  # Store file content
     file_type = Column(String)  # e.g., 'pdf', 'docx', 'txt', 'json'
     status = Column(String, default="pending")  # pending, generating, completed, failed
+    input_hash = Column(String, nullable=True)  # Fingerprint of the inputs the content was generated from
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
-    def __init__(self, project_id: int = None, filename: str = None, content: str = None, file_type: str = None, status: str = "pending"):
+    def __init__(self, project_id: int = None, filename: str = None, content: str = None, file_type: str = None, status: str = "pending", input_hash: str = None):
         self.project_id = project_id
         self.filename = filename
         self.content = content
         self.file_type = file_type
         self.status = status
+        self.input_hash = input_hash
         if not hasattr(self, 'created_at') or self.created_at is None:
             self.created_at = datetime.utcnow()
 
@@ -0,0 +1,45 @@
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, JSON
+from datetime import datetime
+from app.database import Base
+
+
+class GenerationBatch(Base):
+    """
+    A bulk generation submitted to the OpenAI Batch API (or the local stand-in).
+    The manifest maps every request's custom_id to the project and documents it
+    generates, with a snapshot of the inputs, so results can be imported hours
+    later even if the project changed meanwhile.
+    """
+    __tablename__ = "generation_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    backend = Column(String, nullable=False)  # openai, local
+    provider_batch_id = Column(String, nullable=True, unique=True)
+    # Provider status: validating, in_progress, finalizing, completed, failed, expired, cancelled
+    status = Column(String, nullable=False, default="validating")
+    stale_only = Column(Boolean, nullable=False, default=False)
+    input_file_id = Column(String, nullable=True)
+    output_file_id = Column(String, nullable=True)
+    error_file_id = Column(String, nullable=True)
+    request_count = Column(Integer, nullable=False, default=0)
+    project_count = Column(Integer, nullable=False, default=0)
+    imported_files = Column(Integer, nullable=False, default=0)
+    failed_requests = Column(Integer, nullable=False, default=0)
+    manifest = Column(JSON, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    imported_at = Column(DateTime, nullable=True)  # set once every project's results are saved
+
+    def __init__(self, backend: str = None, manifest: dict = None, request_count: int = 0,
+                 project_count: int = 0, stale_only: bool = False):
+        self.backend = backend
+        self.manifest = manifest
+        self.request_count = request_count
+        self.project_count = project_count
+        self.stale_only = stale_only
+        self.status = "validating"
+        self.imported_files = 0
+        self.failed_requests = 0
+        if not hasattr(self, 'created_at') or self.created_at is None:
+            self.created_at = datetime.utcnow()
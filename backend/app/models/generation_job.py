@@ -0,0 +1,48 @@
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Index, Text, text
+from datetime import datetime
+from app.database import Base
+
+
+class GenerationJob(Base):
+    """
+    A generation run for a project. The row doubles as the project's lease: a
+    partial unique index allows only one `running` job per project, so
+    concurrent requests - from any worker process - attach to it instead of
+    starting a second run.
+    """
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        Index(
+            "ux_generation_jobs_running_project",
+            "project_id",
+            unique=True,
+            sqlite_where=text("status = 'running'"),
+            postgresql_where=text("status = 'running'"),
+        ),
+    )
+
+    id = Column(String, primary_key=True)  # uuid4 hex, returned to clients as job_id
+    # No foreign key: job history outlives deleted projects like usage rows do
+    project_id = Column(Integer, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # all, single, section, batch (import of a bulk batch), speculative
+    target = Column(String, nullable=True)  # filename or section for partial runs, batch id for imports, "served" once a speculative result was returned
+    status = Column(String, nullable=False, default="running")  # running, succeeded, failed, cancelled, expired
+    cancel_requested = Column(Boolean, nullable=False, default=False)  # polled by the worker running the job
+    owner = Column(String, nullable=True)  # host:pid holding the lease
+    lease_expires_at = Column(DateTime, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __init__(self, id: str = None, project_id: int = None, kind: str = None, target: str = None,
+                 owner: str = None, lease_expires_at: datetime = None, status: str = "running"):
+        self.id = id
+        self.project_id = project_id
+        self.kind = kind
+        self.target = target
+        self.owner = owner
+        self.lease_expires_at = lease_expires_at
+        self.status = status
+        self.cancel_requested = False
+        if not hasattr(self, 'created_at') or self.created_at is None:
+            self.created_at = datetime.utcnow()
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from datetime import datetime
 from app.database import Base
 
 
 class GenerationLog(Base):
     __tablename__ = "generation_logs"
+    __table_args__ = (
+        # Serves "logs of a project newer than id X" as an index range scan
+        Index("ix_generation_logs_project_id_id", "project_id", "id"),
+        # Never reuse ids of deleted logs, so since_id cursors stay valid across regenerations
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
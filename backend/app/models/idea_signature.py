@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, LargeBinary
+from datetime import datetime
+from app.database import Base
+
+
+class IdeaSignature(Base):
+    """
+    MinHash signature of a project's idea description (see app.idea_minhash),
+    used to find near-duplicate ideas within a competition. A changed idea
+    replaces the row instead of updating it, so ids only grow: a process catches
+    up with the changes of the others by reading the rows above the last id it saw.
+    """
+    __tablename__ = "idea_signatures"
+    __table_args__ = (
+        Index("ix_idea_signatures_competition_id_id", "competition_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, unique=True)
+    competition_id = Column(Integer, ForeignKey("competitions.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # owner, to match only their own projects
+    signature = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __init__(self, project_id: int = None, competition_id: int = None, user_id: int = None, signature: bytes = None):
+        self.project_id = project_id
+        self.competition_id = competition_id
+        self.user_id = user_id
+        self.signature = signature
+        if not hasattr(self, 'created_at') or self.created_at is None:
+            self.created_at = datetime.utcnow()
@@ -0,0 +1,43 @@
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float
+from datetime import datetime
+from app.database import Base
+
+
+class OpenAIUsage(Base):
+    """One row per chat completion, used for latency and cost accounting"""
+    __tablename__ = "openai_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign keys: usage is kept for accounting after a project is deleted
+    project_id = Column(Integer, nullable=False, index=True)
+    competition_id = Column(Integer, nullable=True, index=True)
+    operation = Column(String, nullable=False)  # generate_all, generate_single, ...
+    model = Column(String, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Float, nullable=False)  # request start to last chunk
+    time_to_first_token_ms = Column(Float, nullable=True)
+    retry_count = Column(Integer, nullable=False, default=0)
+    hedged = Column(Boolean, nullable=False, default=False)  # a duplicate request raced the first one
+    route_key = Column(String, nullable=True)  # routing table entry that chose the model ("*" or a filename)
+    fallback_from = Column(String, nullable=True)  # primary model, when it was too slow and `model` is its fallback
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __init__(self, project_id: int = None, competition_id: int = None, operation: str = None, model: str = None,
+                 prompt_tokens: int = 0, completion_tokens: int = 0, latency_ms: float = None,
+                 time_to_first_token_ms: float = None, retry_count: int = 0, hedged: bool = False,
+                 route_key: str = None, fallback_from: str = None):
+        self.project_id = project_id
+        self.competition_id = competition_id
+        self.operation = operation
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.latency_ms = latency_ms
+        self.time_to_first_token_ms = time_to_first_token_ms
+        self.retry_count = retry_count
+        self.hedged = hedged
+        self.route_key = route_key
+        self.fallback_from = fallback_from
+        if not hasattr(self, 'created_at') or self.created_at is None:
+            self.created_at = datetime.utcnow()
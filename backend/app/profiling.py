@@ -0,0 +1,158 @@
+"""
+Opt-in statistical profiling of requests and background generation tasks.
+
+Profiling is enabled per request by an admin (`X-Profile: 1` together with a valid
+`X-Admin-Token`) or for a random sample of requests/tasks with PROFILE_SAMPLE_RATE.
+Results are written to PROFILE_DIR as speedscope JSON (or pyinstrument HTML) and
+listed at /api/admin/profiles. When neither is configured nothing is wrapped.
+"""
+import functools
+import importlib.util
+import inspect
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from fastapi.routing import APIRoute
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "./data/profiles"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "speedscope")  # speedscope or html
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# Sessions profiled in worker threads for the current request (set by ProfilingMiddleware)
+_thread_sessions: ContextVar[Optional[list]] = ContextVar("profile_thread_sessions", default=None)
+
+
+def profiling_available() -> bool:
+    # pyinstrument is optional and only imported once a profile is actually taken
+    return importlib.util.find_spec("pyinstrument") is not None
+
+
+def is_sampled() -> bool:
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def start_profiler(async_mode: str = "disabled"):
+    from pyinstrument import Profiler
+    profiler = Profiler(interval=PROFILE_INTERVAL, async_mode=async_mode)
+    profiler.start()
+    return profiler
+
+
+def write_profile(session, label: str, duration_seconds: float) -> Path:
+    """Render a profiler session to PROFILE_DIR and prune the oldest files"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    name = _UNSAFE_CHARS.sub("_", label).strip("_")[:80]
+    if PROFILE_FORMAT == "html":
+        from pyinstrument.renderers import HTMLRenderer
+        path = PROFILE_DIR / f"{stamp}_{name}_{duration_seconds * 1000:.0f}ms.html"
+        path.write_text(HTMLRenderer().render(session), encoding="utf-8")
+    else:
+        from pyinstrument.renderers import SpeedscopeRenderer
+        path = PROFILE_DIR / f"{stamp}_{name}_{duration_seconds * 1000:.0f}ms.speedscope.json"
+        path.write_text(SpeedscopeRenderer().render(session), encoding="utf-8")
+    _prune()
+    return path
+
+
+def _prune() -> None:
+    profiles = sorted(PROFILE_DIR.iterdir(), key=lambda p: p.name)
+    for stale in profiles[:-PROFILE_MAX_FILES]:
+        stale.unlink(missing_ok=True)
+
+
+def list_profiles() -> List[dict]:
+    if not PROFILE_DIR.exists():
+        return []
+    profiles = []
+    for path in sorted(PROFILE_DIR.iterdir(), key=lambda p: p.name, reverse=True):
+        stat = path.stat()
+        profiles.append({
+            "name": path.name,
+            "size": stat.st_size,
+            "created_at": datetime.utcfromtimestamp(stat.st_mtime),
+        })
+    return profiles
+
+
+def resolve_profile(name: str) -> Path | None:
+    """Path of a stored profile, refusing anything outside PROFILE_DIR"""
+    path = PROFILE_DIR / name
+    if path.name != name or not path.is_file():
+        return None
+    return path
+
+
+@contextmanager
+def profiled_task(label: str, force: bool = False):
+    """Profile a background task when forced by the triggering request or sampled"""
+    if not (force or is_sampled()) or not profiling_available():
+        yield
+        return
+    started = time.monotonic()
+    profiler = start_profiler()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        try:
+            write_profile(profiler.last_session, label, time.monotonic() - started)
+        except Exception as e:
+            print(f"Failed to write profile for {label}: {e}")
+
+
+@contextmanager
+def collect_thread_profiles():
+    """Collect the sessions of sync endpoints profiled in worker threads (see ProfiledRoute)"""
+    sessions = []
+    token = _thread_sessions.set(sessions)
+    try:
+        yield sessions
+    finally:
+        _thread_sessions.reset(token)
+
+
+def combine_sessions(session, others):
+    """One session with the samples of the request's event loop and its worker threads"""
+    from pyinstrument.session import Session
+    for other in others:
+        session = Session.combine(session, other) if session is not None else other
+    return session
+
+
+def _profiled_in_thread(endpoint):
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        sessions = _thread_sessions.get()
+        if sessions is None:
+            return endpoint(*args, **kwargs)
+        profiler = start_profiler()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profiler.stop()
+            sessions.append(profiler.last_session)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    A route whose sync endpoint is profiled in the worker thread it runs in. The
+    request profiler samples only the event loop thread, so without this a sync
+    endpoint's work would show up as a wait in run_in_threadpool.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = _profiled_in_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
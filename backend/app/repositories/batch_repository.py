@@ -0,0 +1,24 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.generation_batch import GenerationBatch
+
+
+class BatchRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find_by_id(self, batch_id: int) -> Optional[GenerationBatch]:
+        return self.db.query(GenerationBatch).filter(GenerationBatch.id == batch_id).first()
+
+    def find_recent(self, limit: int = 50) -> List[GenerationBatch]:
+        return self.db.query(GenerationBatch).order_by(GenerationBatch.id.desc()).limit(limit).all()
+
+    def save(self, batch: GenerationBatch) -> GenerationBatch:
+        try:
+            self.db.add(batch)
+            self.db.commit()
+            self.db.refresh(batch)
+            return batch
+        except Exception:
+            self.db.rollback()
+            raise
@@ -0,0 +1,50 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.competition import Competition
+from app.models.catalogue_version import CatalogueVersion
+
+COMPETITIONS_CATALOGUE = "competitions"
+
+
+class CompetitionRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find_all(self) -> List[Competition]:
+        return self.db.query(Competition).order_by(Competition.id.asc()).all()
+
+    def find_by_id(self, competition_id: int) -> Optional[Competition]:
+        return self.db.query(Competition).filter(Competition.id == competition_id).first()
+
+    def update_model_routing(self, competition: Competition, model_routing: Optional[dict]) -> Competition:
+        try:
+            competition.model_routing = model_routing
+            self.db.commit()
+            self.db.refresh(competition)
+            return competition
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def get_version(self) -> int:
+        version = self.db.query(CatalogueVersion.version).filter(
+            CatalogueVersion.name == COMPETITIONS_CATALOGUE
+        ).scalar()
+        return version or 0
+
+    def bump_version(self) -> int:
+        """Invalidate cached competition catalogues. Call after changing competitions."""
+        try:
+            row = self.db.query(CatalogueVersion).filter(
+                CatalogueVersion.name == COMPETITIONS_CATALOGUE
+            ).first()
+            if row:
+                row.version += 1
+            else:
+                row = CatalogueVersion(name=COMPETITIONS_CATALOGUE, version=1)
+                self.db.add(row)
+            self.db.commit()
+            return row.version
+        except Exception:
+            self.db.rollback()
+            raise
@@ -1,6 +1,22 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import sys
+from sqlalchemy import LargeBinary, cast, func
+from sqlalchemy.orm import Session, defer
+from typing import Iterator, List, Optional, Tuple
 from app.models.generated_file import GeneratedFile
+from app.events import project_events
+from app.repositories.version_repository import VersionRepository
+
+
+def file_summary(file: GeneratedFile) -> dict:
+    """File metadata as pushed to subscribers (same fields as the REST file listing)"""
+    return {
+        "id": file.id,
+        "project_id": file.project_id,
+        "filename": file.filename,
+        "file_type": file.file_type,
+        "status": file.status,
+        "created_at": file.created_at.isoformat(),
+    }
 
 
 class FileRepository:
@@ -10,29 +26,122 @@ class FileRepository:
     def find_by_project_id(self, project_id: int) -> List[GeneratedFile]:
         return self.db.query(GeneratedFile).filter(GeneratedFile.project_id == project_id).all()
 
+    def find_summaries_by_project_id(self, project_id: int) -> List[dict]:
+        files = self.db.query(GeneratedFile).options(defer(GeneratedFile.content)).filter(
+            GeneratedFile.project_id == project_id
+        ).order_by(GeneratedFile.id.asc()).all()
+        return [file_summary(file) for file in files]
+
     def find_by_id(self, file_id: int) -> Optional[GeneratedFile]:
         return self.db.query(GeneratedFile).filter(GeneratedFile.id == file_id).first()
 
+    def iter_completed(self, file_ids: Optional[List[int]] = None, project_id: Optional[int] = None) -> Iterator[GeneratedFile]:
+        """Stream completed files selected by id list (single IN query) or by project"""
+        query = self.db.query(GeneratedFile).filter(GeneratedFile.status == "completed")
+        if file_ids is not None:
+            query = query.filter(GeneratedFile.id.in_(file_ids))
+        if project_id is not None:
+            query = query.filter(GeneratedFile.project_id == project_id)
+        return query.order_by(GeneratedFile.id.asc()).yield_per(8)
+
+    def find_by_id_without_content(self, file_id: int) -> Optional[GeneratedFile]:
+        return self.db.query(GeneratedFile).options(defer(GeneratedFile.content)).filter(
+            GeneratedFile.id == file_id
+        ).first()
+
+    def get_content_size(self, file_id: int) -> int:
+        """Size of the UTF-8 encoded content in bytes, computed by the database"""
+        size = self.db.query(func.length(cast(GeneratedFile.content, LargeBinary))).filter(
+            GeneratedFile.id == file_id
+        ).scalar()
+        return size or 0
+
+    def read_content_bytes(self, file_id: int, offset: int, length: int) -> bytes:
+        """Read `length` bytes of the UTF-8 encoded content starting at `offset`"""
+        chunk = self.db.query(
+            func.substr(cast(GeneratedFile.content, LargeBinary), offset + 1, length)
+        ).filter(GeneratedFile.id == file_id).scalar()
+        return bytes(chunk) if chunk else b""
+
+    def find_completed_entries(self, project_id: int) -> List[Tuple[int, str]]:
+        """Return (id, filename) of completed files without loading their content"""
+        rows = self.db.query(GeneratedFile.id, GeneratedFile.filename).filter(
+            GeneratedFile.project_id == project_id,
+            GeneratedFile.status == "completed"
+        ).order_by(GeneratedFile.id.asc()).all()
+        return [(row.id, row.filename) for row in rows]
+
+    def find_content_by_id(self, file_id: int) -> Optional[str]:
+        return self.db.query(GeneratedFile.content).filter(GeneratedFile.id == file_id).scalar()
+
+    def _record_version(self, file: GeneratedFile) -> None:
+        """Keep the content in the document's history; a failure there never fails the save"""
+        try:
+            VersionRepository(self.db).record(file)
+        except Exception as e:
+            print(f"Failed to record a version of {file.filename} for project {file.project_id}: {e}", file=sys.stderr)
+
     def save(self, file: GeneratedFile) -> GeneratedFile:
         try:
             self.db.add(file)
             self.db.commit()
             self.db.refresh(file)
-            return file
         except Exception:
             self.db.rollback()
             raise
+        self._record_version(file)
+        project_events.publish(file.project_id, {"type": "file", "project_id": file.project_id, "file": file_summary(file)})
+        return file
+
+    def replace_files(self, project_id: int, files: List[GeneratedFile], replace_all: bool = False) -> List[GeneratedFile]:
+        """
+        Save a project's new documents in one transaction, dropping older
+        versions of the same filenames and any failed attempts. With
+        `replace_all` (a complete regeneration), every previous file goes,
+        also documents the new ones no longer include.
+        """
+        filenames = {file.filename for file in files}
+        replaced = [
+            file for file in self.find_by_project_id(project_id)
+            if replace_all or file.filename in filenames or file.status != "completed"
+        ]
+        # The history must hold the versions being replaced before they go
+        for file in replaced:
+            self._record_version(file)
+        try:
+            replaced_ids = [file.id for file in replaced]
+            for file in replaced:
+                self.db.delete(file)
+            self.db.add_all(files)
+            self.db.commit()
+            for file in files:
+                self.db.refresh(file)
+        except Exception:
+            self.db.rollback()
+            raise
+        for file in files:
+            self._record_version(file)
+        for file_id in replaced_ids:
+            project_events.publish(project_id, {"type": "file_deleted", "project_id": project_id, "file_id": file_id})
+        for file in files:
+            project_events.publish(project_id, {"type": "file", "project_id": project_id, "file": file_summary(file)})
+        return files
 
     def delete(self, file: GeneratedFile) -> None:
+        project_id, file_id = file.project_id, file.id
         try:
             self.db.delete(file)
             self.db.commit()
         except Exception:
             self.db.rollback()
             raise
+        project_events.publish(project_id, {"type": "file_deleted", "project_id": project_id, "file_id": file_id})
 
-    def delete_by_project_id(self, project_id: int) -> None:
-        """Delete all files for a project"""
+    def delete_by_project_id(self, project_id: int, keep_history: bool = True) -> None:
+        """Delete all files for a project; with `keep_history` their content stays in the document history"""
+        if keep_history:
+            for file in self.find_by_project_id(project_id):
+                self._record_version(file)
         try:
             deleted_count = self.db.query(GeneratedFile).filter(
                 GeneratedFile.project_id == project_id
@@ -42,4 +151,5 @@ class FileRepository:
         except Exception:
             self.db.rollback()
             raise
+        project_events.publish(project_id, {"type": "files_cleared", "project_id": project_id})
 
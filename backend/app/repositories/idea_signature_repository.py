@@ -0,0 +1,67 @@
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.models.idea_signature import IdeaSignature
+from app.models.project import Project
+
+
+class IdeaSignatureRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find_since(self, competition_id: Optional[int], after_id: int) -> list:
+        """(id, project_id, user_id, signature) rows of a competition with an id above `after_id`, in id order"""
+        query = self.db.query(
+            IdeaSignature.id,
+            IdeaSignature.project_id,
+            IdeaSignature.user_id,
+            IdeaSignature.signature,
+        ).filter(IdeaSignature.id > after_id)
+        if competition_id is None:
+            query = query.filter(IdeaSignature.competition_id.is_(None))
+        else:
+            query = query.filter(IdeaSignature.competition_id == competition_id)
+        return query.order_by(IdeaSignature.id.asc()).all()
+
+    def find_unindexed_project_ids(self) -> List[int]:
+        """Projects with an idea but no signature (created before the index existed)"""
+        rows = self.db.query(Project.id).outerjoin(
+            IdeaSignature, IdeaSignature.project_id == Project.id
+        ).filter(
+            IdeaSignature.id.is_(None),
+            Project.idea_description.isnot(None),
+            Project.idea_description != "",
+        ).order_by(Project.id.asc()).all()
+        return [row.id for row in rows]
+
+    def replace(self, project: Project, signature: Optional[bytes]) -> Optional[IdeaSignature]:
+        """Store the project's new signature in place of the old one (None only removes it)"""
+        try:
+            self.db.query(IdeaSignature).filter(
+                IdeaSignature.project_id == project.id
+            ).delete(synchronize_session=False)
+            row = None
+            if signature is not None:
+                row = IdeaSignature(
+                    project_id=project.id,
+                    competition_id=project.competition_id,
+                    user_id=project.user_id,
+                    signature=signature,
+                )
+                self.db.add(row)
+            self.db.commit()
+            if row is not None:
+                self.db.refresh(row)
+            return row
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def delete_by_project_id(self, project_id: int) -> None:
+        try:
+            self.db.query(IdeaSignature).filter(
+                IdeaSignature.project_id == project_id
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
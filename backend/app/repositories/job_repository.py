@@ -0,0 +1,151 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from app.models.generation_job import GenerationJob
+
+# A lease not renewed for this long belongs to a dead worker and may be taken over
+LEASE_SECONDS = int(os.getenv("GENERATION_LEASE_SECONDS", "60"))
+
+
+def lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find_by_id(self, job_id: str) -> Optional[GenerationJob]:
+        return self.db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+
+    def find_running(self, project_id: int) -> Optional[GenerationJob]:
+        return self.db.query(GenerationJob).filter(
+            GenerationJob.project_id == project_id,
+            GenerationJob.status == "running"
+        ).first()
+
+    def find_latest(self, project_id: int) -> Optional[GenerationJob]:
+        return self.db.query(GenerationJob).filter(
+            GenerationJob.project_id == project_id
+        ).order_by(GenerationJob.created_at.desc()).first()
+
+    def find_running_by_kind(self, kind: str) -> List[GenerationJob]:
+        return self.db.query(GenerationJob).filter(
+            GenerationJob.kind == kind,
+            GenerationJob.status == "running"
+        ).all()
+
+    def count_running(self, kinds: List[str]) -> int:
+        return self.db.query(func.count(GenerationJob.id)).filter(
+            GenerationJob.kind.in_(kinds),
+            GenerationJob.status == "running"
+        ).scalar() or 0
+
+    def count_started_since(self, kind: str, since: datetime) -> int:
+        return self.db.query(func.count(GenerationJob.id)).filter(
+            GenerationJob.kind == kind,
+            GenerationJob.created_at >= since
+        ).scalar() or 0
+
+    def acquire(self, project_id: int, kind: str, target: Optional[str] = None) -> Tuple[GenerationJob, bool]:
+        """
+        Start a job for the project unless one is already running.
+
+        Returns (job, True) for a new job, or (running_job, False) when the caller
+        should attach to an in-flight run. The partial unique index makes the
+        insert the arbiter between concurrent requests, whichever process they
+        come from.
+        """
+        for _ in range(3):
+            now = datetime.utcnow()
+            running = self.find_running(project_id)
+            if running is not None:
+                if running.lease_expires_at > now:
+                    return running, False
+                # The holder stopped renewing; expire it (only one contender's update matches)
+                self.db.query(GenerationJob).filter(
+                    GenerationJob.id == running.id,
+                    GenerationJob.status == "running",
+                    GenerationJob.lease_expires_at <= now
+                ).update({"status": "expired", "finished_at": now}, synchronize_session=False)
+                self.db.commit()
+
+            job = GenerationJob(
+                id=uuid.uuid4().hex,
+                project_id=project_id,
+                kind=kind,
+                target=target,
+                owner=lease_owner(),
+                lease_expires_at=now + timedelta(seconds=LEASE_SECONDS),
+            )
+            try:
+                self.db.add(job)
+                self.db.commit()
+                self.db.refresh(job)
+                return job, True
+            except IntegrityError:
+                # Another request won the race; attach to its job on the next pass
+                self.db.rollback()
+        raise RuntimeError(f"Could not acquire the generation lease for project {project_id}")
+
+    def renew(self, job_id: str) -> bool:
+        """Extend a running job's lease; False if it is no longer ours to renew"""
+        try:
+            renewed = self.db.query(GenerationJob).filter(
+                GenerationJob.id == job_id,
+                GenerationJob.status == "running"
+            ).update(
+                {"lease_expires_at": datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)},
+                synchronize_session=False
+            )
+            self.db.commit()
+            return renewed == 1
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Flag a running job for cancellation; False if it is not running"""
+        try:
+            flagged = self.db.query(GenerationJob).filter(
+                GenerationJob.id == job_id,
+                GenerationJob.status == "running"
+            ).update({"cancel_requested": True}, synchronize_session=False)
+            self.db.commit()
+            return flagged == 1
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def update_target(self, job_id: str, target: Optional[str]) -> None:
+        try:
+            self.db.query(GenerationJob).filter(GenerationJob.id == job_id).update(
+                {"target": target}, synchronize_session=False
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return bool(self.db.query(GenerationJob.cancel_requested).filter(GenerationJob.id == job_id).scalar())
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """Record the outcome and release the lease"""
+        try:
+            self.db.query(GenerationJob).filter(
+                GenerationJob.id == job_id,
+                GenerationJob.status == "running"
+            ).update(
+                {"status": status, "error": error, "finished_at": datetime.utcnow()},
+                synchronize_session=False
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
@@ -1,6 +1,22 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models.generation_log import GenerationLog
+from app.events import project_events
+
+
+def log_event(log: GenerationLog) -> dict:
+    return {
+        "type": "log",
+        "project_id": log.project_id,
+        "log": {
+            "id": log.id,
+            "project_id": log.project_id,
+            "message": log.message,
+            "log_type": log.log_type,
+            "created_at": log.created_at.isoformat(),
+        },
+    }
 
 
 class LogRepository:
@@ -12,15 +28,31 @@ class LogRepository:
             GenerationLog.project_id == project_id
         ).order_by(GenerationLog.created_at.asc()).all()
 
+    def find_by_project_id_since(self, project_id: int, since_id: Optional[int]) -> List[GenerationLog]:
+        """Logs of a project with id greater than `since_id`, oldest first"""
+        query = self.db.query(GenerationLog).filter(GenerationLog.project_id == project_id)
+        if since_id is not None:
+            query = query.filter(GenerationLog.id > since_id)
+        return query.order_by(GenerationLog.id.asc()).all()
+
+    def find_last_id(self, project_id: int) -> int:
+        """Id of the newest log of a project, or 0"""
+        last_id = self.db.query(func.max(GenerationLog.id)).filter(
+            GenerationLog.project_id == project_id
+        ).scalar()
+        return last_id or 0
+
     def save(self, log: GenerationLog) -> GenerationLog:
         try:
             self.db.add(log)
             self.db.commit()
             self.db.refresh(log)
-            return log
         except Exception:
             self.db.rollback()
             raise
+        # Wake up long-polling and subscribed clients once the row is visible
+        project_events.publish(log.project_id, log_event(log))
+        return log
 
     def clear_project_logs(self, project_id: int) -> None:
         """Clear all logs for a project (useful when starting new generation)"""
@@ -32,4 +64,4 @@ class LogRepository:
         except Exception:
             self.db.rollback()
             raise
-
+        project_events.publish(project_id, {"type": "logs_cleared", "project_id": project_id})
@@ -19,6 +19,26 @@ class ProjectRepository:
             Project.user_id == user_id
         ).first()
 
+    def find_ids_owned_by(self, project_ids: List[int], user_id: int) -> List[int]:
+        """The subset of `project_ids` that belongs to the user, in one query"""
+        rows = self.db.query(Project.id).filter(
+            Project.id.in_(project_ids),
+            Project.user_id == user_id
+        ).all()
+        return [row.id for row in rows]
+
+    def find_for_generation(self, competition_id: Optional[int] = None, user_id: Optional[int] = None,
+                            project_ids: Optional[List[int]] = None) -> List[Project]:
+        """Projects with an idea to generate documents from, narrowed by every given filter"""
+        query = self.db.query(Project).filter(Project.idea_description.isnot(None), Project.idea_description != "")
+        if competition_id is not None:
+            query = query.filter(Project.competition_id == competition_id)
+        if user_id is not None:
+            query = query.filter(Project.user_id == user_id)
+        if project_ids is not None:
+            query = query.filter(Project.id.in_(project_ids))
+        return query.order_by(Project.id.asc()).all()
+
     def save(self, project: Project) -> Project:
         self.db.add(project)
         self.db.commit()
@@ -0,0 +1,74 @@
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from typing import List
+from app.models.openai_usage import OpenAIUsage
+
+# Operation of the usage rows imported from an OpenAI batch (see services/batch_generation.py)
+BATCH_OPERATION = "batch_generate"
+
+
+class UsageRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def save(self, usage: OpenAIUsage) -> OpenAIUsage:
+        try:
+            self.db.add(usage)
+            self.db.commit()
+            self.db.refresh(usage)
+            return usage
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def save_all(self, usages: List[OpenAIUsage]) -> None:
+        try:
+            self.db.add_all(usages)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def aggregate_by_competition_and_model(self) -> List:
+        """
+        Totals per (competition_id, model); cost depends on the model so it is kept apart.
+        Batch rows are priced differently and their latency is the whole batch's
+        turnaround, so their tokens are also summed separately and their latency
+        is left out (`timed_completions` / `timed_completion_tokens` are the rest).
+        """
+        batch = OpenAIUsage.operation == BATCH_OPERATION
+        return self.db.query(
+            OpenAIUsage.competition_id,
+            OpenAIUsage.model,
+            func.count(OpenAIUsage.id).label("completions"),
+            func.sum(OpenAIUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(OpenAIUsage.completion_tokens).label("completion_tokens"),
+            func.sum(case((batch, OpenAIUsage.prompt_tokens), else_=0)).label("batch_prompt_tokens"),
+            func.sum(case((batch, OpenAIUsage.completion_tokens), else_=0)).label("batch_completion_tokens"),
+            func.sum(case((batch, 0), else_=1)).label("timed_completions"),
+            func.sum(case((batch, 0), else_=OpenAIUsage.completion_tokens)).label("timed_completion_tokens"),
+            func.sum(case((batch, None), else_=OpenAIUsage.latency_ms)).label("latency_ms"),
+            func.sum(OpenAIUsage.time_to_first_token_ms).label("time_to_first_token_ms"),
+            func.count(OpenAIUsage.time_to_first_token_ms).label("first_token_samples"),
+            func.sum(OpenAIUsage.retry_count).label("retries"),
+            func.sum(case((OpenAIUsage.hedged, 1), else_=0)).label("hedged"),
+        ).group_by(OpenAIUsage.competition_id, OpenAIUsage.model).all()
+
+    def aggregate_by_route(self) -> List:
+        """Totals per routing decision: (competition_id, route_key, model, fallback_from); latency of interactive calls only"""
+        batch = OpenAIUsage.operation == BATCH_OPERATION
+        return self.db.query(
+            OpenAIUsage.competition_id,
+            OpenAIUsage.route_key,
+            OpenAIUsage.model,
+            OpenAIUsage.fallback_from,
+            func.count(OpenAIUsage.id).label("completions"),
+            func.sum(OpenAIUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(OpenAIUsage.completion_tokens).label("completion_tokens"),
+            func.sum(case((batch, OpenAIUsage.prompt_tokens), else_=0)).label("batch_prompt_tokens"),
+            func.sum(case((batch, OpenAIUsage.completion_tokens), else_=0)).label("batch_completion_tokens"),
+            func.avg(case((batch, None), else_=OpenAIUsage.latency_ms)).label("avg_latency_ms"),
+            func.avg(OpenAIUsage.time_to_first_token_ms).label("avg_time_to_first_token_ms"),
+        ).group_by(
+            OpenAIUsage.competition_id, OpenAIUsage.route_key, OpenAIUsage.model, OpenAIUsage.fallback_from,
+        ).all()
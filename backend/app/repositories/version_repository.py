@@ -0,0 +1,140 @@
+import os
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from app.document_delta import (
+    compress, compress_delta, content_hash, decompress, decompress_delta, apply_delta, encode_delta,
+)
+from app.models.document_version import DocumentVersion
+from app.models.generated_file import GeneratedFile
+
+# A full copy at least every this many versions bounds the deltas replayed per read
+SNAPSHOT_INTERVAL = int(os.getenv("DOCUMENT_SNAPSHOT_INTERVAL", "10"))
+
+
+class VersionRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def find_summaries(self, project_id: int, filename: Optional[str] = None) -> list:
+        """Versions without their data, oldest first; `stored_bytes` is the compressed size"""
+        query = self.db.query(
+            DocumentVersion.project_id,
+            DocumentVersion.filename,
+            DocumentVersion.version,
+            DocumentVersion.kind,
+            DocumentVersion.size,
+            DocumentVersion.file_type,
+            DocumentVersion.created_at,
+            func.length(DocumentVersion.data).label("stored_bytes"),
+        ).filter(DocumentVersion.project_id == project_id)
+        if filename is not None:
+            query = query.filter(DocumentVersion.filename == filename)
+        return query.order_by(DocumentVersion.filename.asc(), DocumentVersion.version.asc()).all()
+
+    def find_latest(self, project_id: int, filename: str) -> Optional[DocumentVersion]:
+        return self.db.query(DocumentVersion).filter(
+            DocumentVersion.project_id == project_id,
+            DocumentVersion.filename == filename,
+        ).order_by(DocumentVersion.version.desc()).first()
+
+    def _snapshot_version(self, project_id: int, filename: str, at_most: int) -> Optional[int]:
+        return self.db.query(func.max(DocumentVersion.version)).filter(
+            DocumentVersion.project_id == project_id,
+            DocumentVersion.filename == filename,
+            DocumentVersion.kind == "snapshot",
+            DocumentVersion.version <= at_most,
+        ).scalar()
+
+    def find_contents(self, project_id: int, filename: str, versions: List[int]) -> Dict[int, str]:
+        """
+        Rebuild `versions` of a document; missing versions are left out. Each is
+        replayed from its closest snapshot, reading the rows of all of them in one query.
+        """
+        ranges = {}
+        for version in set(versions):
+            base = self._snapshot_version(project_id, filename, version)
+            if base is not None:
+                ranges[version] = base
+        if not ranges:
+            return {}
+        rows = self.db.query(DocumentVersion.version, DocumentVersion.kind, DocumentVersion.data).filter(
+            DocumentVersion.project_id == project_id,
+            DocumentVersion.filename == filename,
+            or_(*(DocumentVersion.version.between(base, version) for version, base in ranges.items())),
+        ).order_by(DocumentVersion.version.asc()).all()
+        contents: Dict[int, str] = {}
+        content = None
+        for row in rows:
+            if row.kind == "snapshot":
+                content = decompress(row.data)
+            elif content is not None:
+                content = apply_delta(content, decompress_delta(row.data))
+            else:
+                continue
+            if row.version in ranges:
+                contents[row.version] = content
+        return contents
+
+    def record(self, file: GeneratedFile) -> Optional[DocumentVersion]:
+        """
+        Add the content of a completed file as the next version of its document,
+        unless it equals the latest version. The first time a document is
+        recorded, the version it replaces (still in generated_files) goes first.
+        """
+        if file.status != "completed" or file.content is None:
+            return None
+        latest = self.find_latest(file.project_id, file.filename)
+        if latest is None:
+            previous = self.db.query(GeneratedFile).filter(
+                GeneratedFile.project_id == file.project_id,
+                GeneratedFile.filename == file.filename,
+                GeneratedFile.status == "completed",
+                GeneratedFile.id < file.id,
+            ).order_by(GeneratedFile.id.desc()).first() if file.id is not None else None
+            if previous is not None and previous.content is not None:
+                latest = self._add(previous, None)
+        return self._add(file, latest)
+
+    def _add(self, file: GeneratedFile, latest: Optional[DocumentVersion]) -> DocumentVersion:
+        digest = content_hash(file.content)
+        if latest is not None and latest.content_hash == digest:
+            return latest
+        version = latest.version + 1 if latest else 1
+        kind, data = "snapshot", compress(file.content)
+        base = self._snapshot_version(file.project_id, file.filename, version) if latest else None
+        if base is not None and version - base < SNAPSHOT_INTERVAL:
+            previous = self.find_contents(file.project_id, file.filename, [latest.version]).get(latest.version)
+            if previous is not None:
+                delta = compress_delta(encode_delta(previous, file.content))
+                # A rewrite can make the delta larger than a full copy
+                if len(delta) < len(data):
+                    kind, data = "delta", delta
+        row = DocumentVersion(
+            project_id=file.project_id,
+            filename=file.filename,
+            version=version,
+            kind=kind,
+            data=data,
+            size=len(file.content),
+            content_hash=digest,
+            file_type=file.file_type,
+        )
+        try:
+            self.db.add(row)
+            self.db.commit()
+            self.db.refresh(row)
+            return row
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def delete_by_project_id(self, project_id: int) -> None:
+        try:
+            self.db.query(DocumentVersion).filter(
+                DocumentVersion.project_id == project_id
+            ).delete(synchronize_session=False)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
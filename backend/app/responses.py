@@ -0,0 +1,37 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Type[BaseModel], many: bool) -> TypeAdapter:
+    return TypeAdapter(List[model] if many else model)
+
+
+class ModelResponse(Response):
+    """JSON response whose body was produced directly by pydantic-core"""
+    media_type = "application/json"
+
+
+def dump_json(model: Type[BaseModel], data: Any) -> bytes:
+    """Validate ORM objects (or a list of them) into `model` and serialize to JSON bytes"""
+    many = isinstance(data, (list, tuple))
+    adapter = _adapter(model, many)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def model_response(
+    model: Type[BaseModel],
+    data: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> ModelResponse:
+    """
+    Validate ORM objects (or a list of them) into `model` and serialize straight to
+    JSON bytes with pydantic-core, skipping FastAPI's jsonable_encoder dict walk.
+
+    Routes keep their `response_model` for the OpenAPI schema; returning a Response
+    instance makes FastAPI skip its own (slower) serialization.
+    """
+    return ModelResponse(content=dump_json(model, data), status_code=status_code, headers=headers)
@@ -0,0 +1,147 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+from app.database import get_db
+from app.dependencies import require_admin
+from app.responses import model_response
+from app.profiling import ProfiledRoute, list_profiles, resolve_profile
+from app.repositories.batch_repository import BatchRepository
+from app.repositories.competition_repository import CompetitionRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.batch_generation import BatchGenerationService
+from app.services.model_routing import SITE_ROUTING, validate_routing_table
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)], route_class=ProfiledRoute)
+
+
+class ProfileResponse(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
+
+
+class BatchRequest(BaseModel):
+    """Projects to include; every filter given narrows the selection"""
+    competition_id: Optional[int] = None
+    user_id: Optional[int] = None
+    project_ids: Optional[List[int]] = None
+    stale_only: bool = False
+    local: Optional[bool] = None  # use the offline stand-in (default: OPENAI_BATCH_LOCAL)
+
+
+class BatchResponse(BaseModel):
+    id: int
+    backend: str
+    provider_batch_id: str | None
+    status: str
+    stale_only: bool
+    request_count: int
+    project_count: int
+    imported_files: int
+    failed_requests: int
+    error: str | None
+    created_at: datetime
+    completed_at: datetime | None
+    imported_at: datetime | None
+
+    class Config:
+        from_attributes = True
+
+
+class ModelRoutingRequest(BaseModel):
+    model_routing: Optional[Dict[str, Dict[str, Any]]] = None
+
+    class Config:
+        protected_namespaces = ()
+
+
+class ModelRoutingResponse(BaseModel):
+    competition_id: int
+    model_routing: Optional[Dict[str, Dict[str, Any]]]
+    site_routing: Dict[str, Dict[str, Any]]
+
+    class Config:
+        protected_namespaces = ()
+
+
+@router.get("/profiles", response_model=List[ProfileResponse])
+def get_profiles():
+    """List stored request/task profiles, newest first"""
+    return model_response(ProfileResponse, list_profiles())
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    """Download a profile (open speedscope JSON at https://www.speedscope.app)"""
+    path = resolve_profile(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/html" if path.suffix == ".html" else "application/json"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@router.get("/competitions/{competition_id}/model-routing", response_model=ModelRoutingResponse)
+def get_model_routing(competition_id: int, db: Session = Depends(get_db)):
+    """A competition's routing table and the site-wide one (MODEL_ROUTING) it overrides"""
+    competition = CompetitionRepository(db).find_by_id(competition_id)
+    if not competition:
+        raise HTTPException(status_code=404, detail="Competition not found")
+    return model_response(ModelRoutingResponse, {
+        "competition_id": competition.id,
+        "model_routing": competition.model_routing,
+        "site_routing": SITE_ROUTING,
+    })
+
+
+@router.put("/competitions/{competition_id}/model-routing", response_model=ModelRoutingResponse)
+def update_model_routing(competition_id: int, body: ModelRoutingRequest, db: Session = Depends(get_db)):
+    """Replace a competition's routing table; null removes it"""
+    repository = CompetitionRepository(db)
+    competition = repository.find_by_id(competition_id)
+    if not competition:
+        raise HTTPException(status_code=404, detail="Competition not found")
+    if body.model_routing is not None:
+        try:
+            validate_routing_table(body.model_routing)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    competition = repository.update_model_routing(competition, body.model_routing)
+    return model_response(ModelRoutingResponse, {
+        "competition_id": competition.id,
+        "model_routing": competition.model_routing,
+        "site_routing": SITE_ROUTING,
+    })
+
+
+@router.post("/batches", response_model=BatchResponse)
+def create_batch(body: BatchRequest, db: Session = Depends(get_db)):
+    """Submit a bulk generation batch for the selected projects"""
+    if body.competition_id is None and body.user_id is None and body.project_ids is None:
+        raise HTTPException(status_code=422, detail="Select projects by competition_id, user_id or project_ids")
+    projects = ProjectRepository(db).find_for_generation(body.competition_id, body.user_id, body.project_ids)
+    try:
+        batch = BatchGenerationService(db, local=body.local).submit(projects, body.stale_only)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if batch is None:
+        raise HTTPException(status_code=409, detail="Every selected project is up to date")
+    return model_response(BatchResponse, batch)
+
+
+@router.get("/batches", response_model=List[BatchResponse])
+def get_batches(db: Session = Depends(get_db)):
+    """Recent bulk generation batches, newest first"""
+    return model_response(BatchResponse, BatchRepository(db).find_recent())
+
+
+@router.post("/batches/{batch_id}/refresh", response_model=BatchResponse)
+def refresh_batch(batch_id: int, db: Session = Depends(get_db)):
+    """Poll a batch and import its results once it has finished"""
+    batch = BatchRepository(db).find_by_id(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    batch = BatchGenerationService(db, local=batch.backend == "local").refresh(batch)
+    return model_response(BatchResponse, batch)
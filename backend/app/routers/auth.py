@@ -5,9 +5,11 @@ from typing import Dict
 from pydantic import BaseModel
 from datetime import datetime
 from app.database import get_db
+from app.responses import model_response
 from app.services.auth_service import AuthService
+from app.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], route_class=ProfiledRoute)
 
 
 class LoginRequest(BaseModel):
@@ -42,10 +44,7 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
     
-    return LoginResponse(
-        token=token,
-        username=credentials.username
-    )
+    return model_response(LoginResponse, {"token": token, "username": credentials.username})
 
 
 @router.post("/register", response_model=RegisterResponse)
@@ -53,11 +52,7 @@ def register(credentials: RegisterRequest, db: Session = Depends(get_db)):
     auth_service = AuthService(db)
     try:
         user = auth_service.register(credentials.username, credentials.password)
-        return RegisterResponse(
-            id=user.id,
-            username=user.username,
-            created_at=user.created_at
-        )
+        return model_response(RegisterResponse, user)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except IntegrityError as e:
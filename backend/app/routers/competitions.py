@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Callable, List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from app.database import get_db
 from app.models.competition import Competition
+from app.responses import ModelResponse, dump_json
+from app.services.competition_catalogue import competition_catalogue
+from app.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/api/competitions", tags=["competitions"])
+router = APIRouter(prefix="/api/competitions", tags=["competitions"], route_class=ProfiledRoute)
 
 
 class CompetitionResponse(BaseModel):
@@ -21,19 +25,52 @@ class CompetitionResponse(BaseModel):
         from_attributes = True
 
 
+class CompetitionSummaryResponse(BaseModel):
+    """Slim competition representation for pickers (no prompt texts)"""
+    id: int
+    name: str
+    description: str | None
+
+    class Config:
+        from_attributes = True
+
+
+def _cached_response(
+    request: Request,
+    db: Session,
+    key: str,
+    build: Callable[[List[Competition]], Optional[bytes]],
+) -> Response:
+    """Serve a pre-serialized catalogue body, answering 304 when the client's copy is current"""
+    version, body = competition_catalogue.get_body(db, key, build)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Competition not found")
+    etag = f'W/"competitions-{version}-{key}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return ModelResponse(content=body, headers=headers)
+
+
 @router.get("", response_model=List[CompetitionResponse])
-def get_all_competitions(db: Session = Depends(get_db)):
-    """Get all available competitions"""
-    competitions = db.query(Competition).all()
-    return competitions
+def get_all_competitions(request: Request, db: Session = Depends(get_db)):
+    """Get all available competitions, including prompts"""
+    return _cached_response(request, db, "all", lambda competitions: dump_json(CompetitionResponse, competitions))
+
+
+@router.get("/summary", response_model=List[CompetitionSummaryResponse])
+def get_competition_summaries(request: Request, db: Session = Depends(get_db)):
+    """Get id, name and description of all competitions (for pickers)"""
+    return _cached_response(request, db, "summary", lambda competitions: dump_json(CompetitionSummaryResponse, competitions))
 
 
 @router.get("/{competition_id}", response_model=CompetitionResponse)
-def get_competition(competition_id: int, db: Session = Depends(get_db)):
+def get_competition(competition_id: int, request: Request, db: Session = Depends(get_db)):
     """Get a specific competition by ID"""
-    competition = db.query(Competition).filter(Competition.id == competition_id).first()
-    if not competition:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404, detail="Competition not found")
-    return competition
+    def build(competitions: List[Competition]) -> Optional[bytes]:
+        for competition in competitions:
+            if competition.id == competition_id:
+                return dump_json(CompetitionResponse, competition)
+        return None
 
+    return _cached_response(request, db, f"competition:{competition_id}", build)
@@ -1,19 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Iterator, List, Literal, Optional
 from pydantic import BaseModel
-from datetime import datetime
-import zipfile
-import io
-from app.database import get_db
-from app.services.file_generation_service import FileGenerationService
+from datetime import datetime, timezone
+from email.utils import format_datetime
+import time
+from app.database import get_db, SessionLocal
+from app.metrics import GENERATION_DURATION, GENERATION_QUEUE_WAIT, GENERATIONS_IN_PROGRESS, SPECULATIVE_GENERATIONS
+from app.profiling import ProfiledRoute, profiled_task
+from app.events import project_events
+from app.responses import dump_json, model_response
+from app.services.archive_service import stream_project_archive
+from app.services.file_body import FileBodySource, RangeNotSatisfiable, parse_range_header
+from app.services.markdown_sections import find_section, parse_sections
+from app.services.generation_jobs import GenerationCancelled, JobLease, cancel_local, finish_job
+from app.services import speculative_generation
+from app.repositories.job_repository import JobRepository
 from app.repositories.file_repository import FileRepository
 from app.repositories.log_repository import LogRepository
+from app.repositories.version_repository import VersionRepository
+from app.document_delta import unified_diff
 from app.models.generated_file import GeneratedFile
 from app.models.generation_log import GenerationLog
 
-router = APIRouter(prefix="/api/files", tags=["files"])
+router = APIRouter(prefix="/api/files", tags=["files"], route_class=ProfiledRoute)
+
+# How long a restart waits for the cancelled job to release the project
+RESTART_WAIT_SECONDS = 5
 
 
 class FileResponse(BaseModel):
@@ -38,6 +53,26 @@ class FileContentResponse(BaseModel):
         from_attributes = True
 
 
+class SectionRegenerateRequest(BaseModel):
+    section: str  # slug path ("business-plan/market-analysis") or a unique heading title
+    instructions: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    id: str
+    project_id: int
+    kind: str
+    target: str | None
+    status: str
+    cancel_requested: bool
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
+
+
 class LogResponse(BaseModel):
     id: int
     project_id: int
@@ -49,11 +84,49 @@ class LogResponse(BaseModel):
         from_attributes = True
 
 
-def generate_files_task(project_id: int):
-    """Background task for file generation - creates its own DB session"""
+class VersionResponse(BaseModel):
+    project_id: int
+    filename: str
+    version: int
+    kind: str  # snapshot, delta
+    size: int  # characters of the document
+    stored_bytes: int  # compressed size in the history
+    file_type: str | None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class VersionContentResponse(BaseModel):
+    filename: str
+    version: int
+    file_type: str | None
+    content: str
+
+
+class VersionDiffResponse(BaseModel):
+    filename: str
+    from_version: int
+    to_version: int
+    added: int  # lines
+    removed: int
+    diff: str  # unified diff
+
+
+def generate_files_task(project_id: int, job_id: str, enqueued_at: float | None = None, profile: bool = False,
+                        stale_only: bool = False, kind: str = "all"):
+    """Background task for file generation - creates its own DB session; `kind` is "speculative" for runs nobody asked for yet"""
     from app.database import SessionLocal
     import traceback
     import sys
+    started = time.monotonic()
+    if enqueued_at is not None:
+        GENERATION_QUEUE_WAIT.labels(kind=kind).observe(started - enqueued_at)
+    GENERATIONS_IN_PROGRESS.labels(kind=kind).inc()
+    outcome = "success"
+    error = None
+    project_events.publish(project_id, {"type": "job_started", "project_id": project_id, "job_id": job_id, "kind": kind})
     db = SessionLocal()
     try:
         # Log that we're starting
@@ -61,10 +134,17 @@ def generate_files_task(project_id: int):
         log_repository.save(GenerationLog(project_id=project_id, message="🚀 Background task started", log_type="info"))
         db.commit()
         
-        file_service = FileGenerationService(db)
-        file_service.generate_files_for_project(project_id)
+        # Imported here so web-only processes never load the generation stack
+        from app.services.file_generation_service import FileGenerationService
+        with JobLease(job_id) as lease, profiled_task(f"generate_files project {project_id}", force=profile):
+            file_service = FileGenerationService(db, lease.token)
+            file_service.generate_files_for_project(project_id, stale_only=stale_only)
         db.commit()  # Ensure all changes are committed
+    except GenerationCancelled:
+        outcome = "cancelled"
     except Exception as e:
+        outcome = "error"
+        error = str(e)
         # Log error to database
         try:
             log_repository = LogRepository(db)
@@ -83,10 +163,98 @@ def generate_files_task(project_id: int):
             print(traceback.format_exc(), file=sys.stderr)
     finally:
         db.close()
+        GENERATIONS_IN_PROGRESS.labels(kind=kind).dec()
+        GENERATION_DURATION.labels(kind=kind, outcome=outcome).observe(time.monotonic() - started)
+        finish_job(job_id, outcome, error)
+        project_events.publish(project_id, {"type": "job_finished", "project_id": project_id, "job_id": job_id, "kind": kind, "outcome": outcome})
+
+
+def _attached_response(job) -> dict:
+    if job.cancel_requested:
+        # The running job is stopping; attaching would report a run that ends "cancelled"
+        raise HTTPException(status_code=409, detail="The project's previous generation is still stopping; try again in a moment")
+    return {
+        "message": "Generation already in progress for this project",
+        "project_id": job.project_id,
+        "job_id": job.id,
+        "attached": True,
+        "kind": job.kind,
+        "target": job.target,
+        "status": "generating",
+    }
+
+
+def _request_cancel(job_repository: JobRepository, job) -> None:
+    # The DB flag reaches workers in other processes; the local token stops a job here at once
+    job_repository.request_cancel(job.id)
+    cancel_local(job.id)
+    job_repository.db.refresh(job)
+
+
+def _preempt_speculative(job_repository: JobRepository, project_id: int) -> None:
+    """A speculative run (see speculative_generation) gives way to the user's request"""
+    running = job_repository.find_running(project_id)
+    if running is not None and running.kind == speculative_generation.KIND:
+        SPECULATIVE_GENERATIONS.labels(outcome="preempted").inc()
+        _restart(job_repository, project_id)
+
+
+def _restart(job_repository: JobRepository, project_id: int) -> None:
+    """Cancel the project's running job and wait (briefly) for it to release the lease; 409 if it does not"""
+    running = job_repository.find_running(project_id)
+    if running is None:
+        return
+    _request_cancel(job_repository, running)
+    deadline = time.monotonic() + RESTART_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        job_repository.db.expire_all()
+        if job_repository.find_running(project_id) is None:
+            return
+        time.sleep(0.1)
+    raise HTTPException(status_code=409, detail="The project's previous generation is still stopping; try again in a moment")
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_generation_job(job_id: str, db: Session = Depends(get_db)):
+    """Status of a generation job (as returned by the generate endpoints)"""
+    job = JobRepository(db).find_by_id(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return model_response(JobResponse, job)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+def cancel_generation_job(job_id: str, db: Session = Depends(get_db)):
+    """Cancel a running generation job; it stops at its next cancellation point"""
+    job_repository = JobRepository(db)
+    job = job_repository.find_by_id(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "running":
+        _request_cancel(job_repository, job)
+    return model_response(JobResponse, job)
+
+
+@router.post("/project/{project_id}/cancel", response_model=JobResponse)
+def cancel_project_generation(project_id: int, db: Session = Depends(get_db)):
+    """Cancel whatever generation job is running for a project"""
+    job_repository = JobRepository(db)
+    job = job_repository.find_running(project_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No generation in progress")
+    _request_cancel(job_repository, job)
+    return model_response(JobResponse, job)
 
 
 @router.post("/generate/{project_id}")
-def generate_files(project_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def generate_files(
+    project_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    mode: Literal["all", "stale"] = Query("all", description="'stale' regenerates only files whose inputs changed"),
+    restart: bool = Query(False, description="Cancel a running job for the project instead of attaching to it"),
+    db: Session = Depends(get_db)
+):
     """Start file generation for a project (runs in background)"""
     # Verify project exists
     from app.models.project import Project
@@ -94,22 +262,43 @@ def generate_files(project_id: int, background_tasks: BackgroundTasks, db: Sessi
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
+    # One run per project: a second request (double click, another tab) attaches to the running job
+    job_repository = JobRepository(db)
+    if restart:
+        _restart(job_repository, project_id)
+    else:
+        ready = speculative_generation.serve_ready(db, project)
+        if ready is not None:
+            return {"message": "Files were generated in advance", "project_id": project_id, "job_id": ready.id, "attached": True, "kind": ready.kind, "mode": mode, "status": "completed"}
+    job, created = job_repository.acquire(project_id, "all")
+    if not created:
+        # Includes a speculative run: it generates the stale documents from the current inputs
+        return _attached_response(job)
+    speculative_generation.yield_to_interactive(db)
     try:
         # Run generation in background
-        background_tasks.add_task(generate_files_task, project_id)
-        return {"message": "File generation started", "project_id": project_id, "status": "generating"}
+        profile = getattr(request.state, "profile", False)
+        background_tasks.add_task(generate_files_task, project_id, job.id, time.monotonic(), profile, mode == "stale")
+        return {"message": "File generation started", "project_id": project_id, "job_id": job.id, "attached": False, "mode": mode, "status": "generating"}
     except Exception as e:
+        finish_job(job.id, "error", str(e))
         raise HTTPException(status_code=500, detail=f"Failed to start file generation: {str(e)}")
 
 
 @router.post("/generate/{project_id}/file/{filename}")
-def regenerate_single_file(project_id: int, filename: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def regenerate_single_file(project_id: int, filename: str, request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Regenerate a specific file for a project"""
     from app.models.project import Project
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
+    job_repository = JobRepository(db)
+    _preempt_speculative(job_repository, project_id)
+    job, created = job_repository.acquire(project_id, "single", filename)
+    if not created:
+        return _attached_response(job)
+    speculative_generation.yield_to_interactive(db)
     try:
         # Delete the specific file if it exists
         file_repository = FileRepository(db)
@@ -120,17 +309,27 @@ def regenerate_single_file(project_id: int, filename: str, background_tasks: Bac
                 break
         
         # Run generation in background (will regenerate all files, but we'll filter in the service)
-        background_tasks.add_task(generate_single_file_task, project_id, filename)
-        return {"message": f"File regeneration started for {filename}", "project_id": project_id, "filename": filename, "status": "generating"}
+        profile = getattr(request.state, "profile", False)
+        background_tasks.add_task(generate_single_file_task, project_id, filename, job.id, time.monotonic(), profile)
+        return {"message": f"File regeneration started for {filename}", "project_id": project_id, "job_id": job.id, "attached": False, "filename": filename, "status": "generating"}
     except Exception as e:
+        finish_job(job.id, "error", str(e))
         raise HTTPException(status_code=500, detail=f"Failed to start file regeneration: {str(e)}")
 
 
-def generate_single_file_task(project_id: int, filename: str):
+def generate_single_file_task(project_id: int, filename: str, job_id: str, enqueued_at: float | None = None,
+                              profile: bool = False):
     """Background task for single file generation"""
     from app.database import SessionLocal
     import traceback
     import sys
+    started = time.monotonic()
+    if enqueued_at is not None:
+        GENERATION_QUEUE_WAIT.labels(kind="single").observe(started - enqueued_at)
+    GENERATIONS_IN_PROGRESS.labels(kind="single").inc()
+    outcome = "success"
+    error = None
+    project_events.publish(project_id, {"type": "job_started", "project_id": project_id, "job_id": job_id, "kind": "single", "filename": filename})
     db = SessionLocal()
     try:
         # Log that we're starting
@@ -138,10 +337,17 @@ def generate_single_file_task(project_id: int, filename: str):
         log_repository.save(GenerationLog(project_id=project_id, message=f"🔄 Background task started for {filename}", log_type="info"))
         db.commit()
         
-        file_service = FileGenerationService(db)
-        file_service.generate_single_file_for_project(project_id, filename)
+        # Imported here so web-only processes never load the generation stack
+        from app.services.file_generation_service import FileGenerationService
+        with JobLease(job_id) as lease, profiled_task(f"generate_single_file project {project_id} {filename}", force=profile):
+            file_service = FileGenerationService(db, lease.token)
+            file_service.generate_single_file_for_project(project_id, filename)
         db.commit()  # Ensure all changes are committed
+    except GenerationCancelled:
+        outcome = "cancelled"
     except Exception as e:
+        outcome = "error"
+        error = str(e)
         try:
             log_repository = LogRepository(db)
             error_msg = f"❌ Fatal Error: {str(e)}\n{traceback.format_exc()}"
@@ -158,6 +364,10 @@ def generate_single_file_task(project_id: int, filename: str):
             print(traceback.format_exc(), file=sys.stderr)
     finally:
         db.close()
+        GENERATIONS_IN_PROGRESS.labels(kind="single").dec()
+        GENERATION_DURATION.labels(kind="single", outcome=outcome).observe(time.monotonic() - started)
+        finish_job(job_id, outcome, error)
+        project_events.publish(project_id, {"type": "job_finished", "project_id": project_id, "job_id": job_id, "kind": "single", "outcome": outcome})
 
 
 @router.get("/project/{project_id}", response_model=List[FileResponse])
@@ -165,7 +375,39 @@ def get_project_files(project_id: int, db: Session = Depends(get_db)):
     """Get all files for a project"""
     file_repository = FileRepository(db)
     files = file_repository.find_by_project_id(project_id)
-    return files
+    return model_response(FileResponse, files)
+
+
+# Upper bound on ids accepted by the batch content endpoint
+MAX_BATCH_FILE_IDS = 100
+
+
+def stream_file_contents(file_ids: Optional[List[int]], project_id: Optional[int]) -> Iterator[bytes]:
+    """Yield one FileContentResponse JSON document per line (NDJSON). Uses its own DB session."""
+    db = SessionLocal()
+    try:
+        file_repository = FileRepository(db)
+        for file in file_repository.iter_completed(file_ids=file_ids, project_id=project_id):
+            yield dump_json(FileContentResponse, file) + b"\n"
+    finally:
+        db.close()
+
+
+@router.get("/contents", response_model=List[FileContentResponse])
+def get_file_contents(
+    ids: Optional[List[int]] = Query(None, description="File ids to fetch"),
+    project_id: Optional[int] = Query(None, description="Fetch all completed files of this project"),
+):
+    """
+    Get the content of several completed files in one round trip, streamed as
+    NDJSON (one FileContentResponse per line). Pass either `ids` or `project_id`.
+    """
+    if (ids is None) == (project_id is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or project_id")
+    if ids is not None and len(ids) > MAX_BATCH_FILE_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILE_IDS} file ids can be fetched at once")
+    
+    return StreamingResponse(stream_file_contents(ids, project_id), media_type="application/x-ndjson")
 
 
 @router.get("/{file_id}/content", response_model=FileContentResponse)
@@ -180,19 +422,109 @@ def get_file_content(file_id: int, db: Session = Depends(get_db)):
     if file.status != "completed":
         raise HTTPException(status_code=400, detail="File is not ready for viewing")
     
+    return model_response(FileContentResponse, file)
+
+
+@router.get("/{file_id}/sections")
+def get_file_sections(file_id: int, db: Session = Depends(get_db)):
+    """Heading tree of a markdown file; each section's slug addresses it for regeneration"""
+    file_repository = FileRepository(db)
+    file = file_repository.find_by_id(file_id)
+    if not file or file.status != "completed":
+        raise HTTPException(status_code=404, detail="File not found")
+    sections = parse_sections(file.content or "")
+    return {"file_id": file.id, "filename": file.filename, "sections": [section.to_dict() for section in sections]}
+
+
+@router.post("/{file_id}/sections/regenerate")
+def regenerate_file_section(
+    file_id: int,
+    body: SectionRegenerateRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Regenerate one section of a file and splice it back in (runs in background)"""
+    file_repository = FileRepository(db)
+    file = file_repository.find_by_id(file_id)
+    if not file or file.status != "completed":
+        raise HTTPException(status_code=404, detail="File not found")
+    section = find_section(parse_sections(file.content or ""), body.section)
+    if not section:
+        raise HTTPException(status_code=404, detail=f"Section {body.section} not found in {file.filename}")
+
+    job_repository = JobRepository(db)
+    _preempt_speculative(job_repository, file.project_id)
+    job, created = job_repository.acquire(file.project_id, "section", section.slug)
+    if not created:
+        return _attached_response(job)
+    speculative_generation.yield_to_interactive(db)
+    profile = getattr(request.state, "profile", False)
+    background_tasks.add_task(
+        regenerate_section_task, file.project_id, file_id, section.slug, job.id, body.instructions, time.monotonic(), profile
+    )
     return {
-        "id": file.id,
-        "filename": file.filename,
-        "file_type": file.file_type,
-        "content": file.content
+        "message": f"Section regeneration started for {section.title}",
+        "project_id": file.project_id,
+        "job_id": job.id,
+        "attached": False,
+        "file_id": file_id,
+        "section": section.slug,
+        "status": "generating",
     }
 
 
+def regenerate_section_task(project_id: int, file_id: int, section: str, job_id: str, instructions: Optional[str] = None,
+                            enqueued_at: float | None = None, profile: bool = False):
+    """Background task for section regeneration"""
+    import traceback
+    import sys
+    started = time.monotonic()
+    if enqueued_at is not None:
+        GENERATION_QUEUE_WAIT.labels(kind="section").observe(started - enqueued_at)
+    GENERATIONS_IN_PROGRESS.labels(kind="section").inc()
+    outcome = "success"
+    error = None
+    project_events.publish(project_id, {"type": "job_started", "project_id": project_id, "job_id": job_id, "kind": "section", "file_id": file_id})
+    db = SessionLocal()
+    try:
+        # Imported here so web-only processes never load the generation stack
+        from app.services.file_generation_service import FileGenerationService
+        with JobLease(job_id) as lease, profiled_task(f"regenerate_section project {project_id} file {file_id} {section}", force=profile):
+            file_service = FileGenerationService(db, lease.token)
+            file_service.regenerate_section(file_id, section, instructions)
+    except GenerationCancelled:
+        outcome = "cancelled"
+    except Exception as e:
+        outcome = "error"
+        error = str(e)
+        try:
+            log_repository = LogRepository(db)
+            error_msg = f"❌ Fatal Error: {str(e)}\n{traceback.format_exc()}"
+            log = GenerationLog(project_id=project_id, message=error_msg, log_type="error")
+            log_repository.save(log)
+            db.commit()
+
+            # Also print to console for debugging
+            print(f"ERROR in background section regeneration for file {file_id}, section {section}:", file=sys.stderr)
+            print(traceback.format_exc(), file=sys.stderr)
+        except Exception as log_error:
+            print(f"Error in background section regeneration: {str(e)}", file=sys.stderr)
+            print(f"Also failed to log error: {str(log_error)}", file=sys.stderr)
+            print(traceback.format_exc(), file=sys.stderr)
+    finally:
+        db.close()
+        GENERATIONS_IN_PROGRESS.labels(kind="section").dec()
+        GENERATION_DURATION.labels(kind="section", outcome=outcome).observe(time.monotonic() - started)
+        finish_job(job_id, outcome, error)
+        project_events.publish(project_id, {"type": "job_finished", "project_id": project_id, "job_id": job_id, "kind": "section", "outcome": outcome})
+
+
 @router.get("/{file_id}/download")
-def download_file(file_id: int, db: Session = Depends(get_db)):
-    """Download a specific file"""
+def download_file(file_id: int, request: Request, db: Session = Depends(get_db)):
+    """Download a specific file. Supports Range/If-Range for resumable and partial downloads."""
     file_repository = FileRepository(db)
-    file = file_repository.find_by_id(file_id)
+    file = file_repository.find_by_id_without_content(file_id)
     
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
@@ -210,49 +542,155 @@ def download_file(file_id: int, db: Session = Depends(get_db)):
     }
     content_type = content_type_map.get(file.file_type, "application/octet-stream")
     
-    return Response(
-        content=file.content.encode('utf-8'),
-        media_type=content_type,
-        headers={
-            "Content-Disposition": f'attachment; filename="{file.filename}"'
-        }
-    )
+    body = FileBodySource(file.id, file_repository.get_content_size(file.id))
+    etag = f'"{file.id}-{int(file.created_at.timestamp())}-{body.size}"'
+    last_modified = format_datetime(file.created_at.replace(tzinfo=timezone.utc), usegmt=True)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{file.filename}"',
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+    }
+    
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # If-Range: only honour the Range header when the client's copy is still current
+    if if_range is None or if_range in (etag, last_modified):
+        try:
+            byte_range = parse_range_header(request.headers.get("range"), body.size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{body.size}"})
+    
+    if byte_range is None:
+        headers["Content-Length"] = str(body.size)
+        return StreamingResponse(body.iter_range(0, body.size - 1), media_type=content_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{body.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(body.iter_range(start, end), status_code=206, media_type=content_type, headers=headers)
+
+
+@router.get("/project/{project_id}/versions", response_model=List[VersionResponse])
+def get_document_versions(
+    project_id: int,
+    filename: Optional[str] = Query(None, description="Only the versions of this document"),
+    db: Session = Depends(get_db)
+):
+    """Saved versions of a project's documents, oldest first (without their content)"""
+    versions = VersionRepository(db).find_summaries(project_id, filename)
+    return model_response(VersionResponse, versions)
+
+
+@router.get("/project/{project_id}/versions/{filename}/diff", response_model=VersionDiffResponse)
+def diff_document_versions(
+    project_id: int,
+    filename: str,
+    from_version: int = Query(..., ge=1),
+    to_version: Optional[int] = Query(None, ge=1, description="Defaults to the latest version"),
+    context: int = Query(3, ge=0, le=50, description="Unchanged lines shown around each change"),
+    db: Session = Depends(get_db)
+):
+    """Unified diff between two versions of a document"""
+    version_repository = VersionRepository(db)
+    if to_version is None:
+        latest = version_repository.find_latest(project_id, filename)
+        if latest is None:
+            raise HTTPException(status_code=404, detail="Document has no versions")
+        to_version = latest.version
+    contents = version_repository.find_contents(project_id, filename, [from_version, to_version])
+    missing = [version for version in (from_version, to_version) if version not in contents]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Version {missing[0]} of {filename} not found")
+    lines = unified_diff(contents[from_version], contents[to_version],
+                         f"{filename}@{from_version}", f"{filename}@{to_version}", context)
+    return model_response(VersionDiffResponse, {
+        "filename": filename,
+        "from_version": from_version,
+        "to_version": to_version,
+        "added": sum(1 for line in lines[2:] if line.startswith("+")),
+        "removed": sum(1 for line in lines[2:] if line.startswith("-")),
+        "diff": "\n".join(lines),
+    })
+
+
+@router.get("/project/{project_id}/versions/{filename}/{version}", response_model=VersionContentResponse)
+def get_document_version(project_id: int, filename: str, version: int, db: Session = Depends(get_db)):
+    """Content of one saved version of a document"""
+    version_repository = VersionRepository(db)
+    content = version_repository.find_contents(project_id, filename, [version]).get(version)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Version {version} of {filename} not found")
+    summary = next(row for row in version_repository.find_summaries(project_id, filename) if row.version == version)
+    return model_response(VersionContentResponse, {
+        "filename": filename,
+        "version": version,
+        "file_type": summary.file_type,
+        "content": content,
+    })
+
+
+# Longest a logs request may wait for new rows
+MAX_LOG_WAIT_SECONDS = 30
+
+
+def _find_logs(project_id: int, since_id: Optional[int], all_logs: bool = False) -> List[GenerationLog]:
+    """Logs read in a session of their own, so no pooled connection is held while a request waits"""
+    db = SessionLocal()
+    try:
+        log_repository = LogRepository(db)
+        if all_logs:
+            return log_repository.find_by_project_id(project_id)
+        return log_repository.find_by_project_id_since(project_id, since_id)
+    finally:
+        db.close()
 
 
 @router.get("/project/{project_id}/logs", response_model=List[LogResponse])
-def get_generation_logs(project_id: int, db: Session = Depends(get_db)):
-    """Get generation logs for a project"""
-    log_repository = LogRepository(db)
-    logs = log_repository.find_by_project_id(project_id)
-    return logs
+async def get_generation_logs(
+    project_id: int,
+    since_id: Optional[int] = Query(None, ge=0, description="Only return logs with a greater id"),
+    wait: float = Query(0, ge=0, le=MAX_LOG_WAIT_SECONDS, description="Seconds to wait for new logs when there are none yet"),
+):
+    """
+    Get generation logs for a project.
+
+    With `since_id`, only newer logs are returned (an index range scan). With `wait`,
+    an empty result is held open until a new log is written or the generation job
+    finishes - woken by an in-process notification, not by re-querying. Each query
+    uses its own session that is closed before waiting, so long polls do not hold
+    database connections.
+    """
+    if since_id is None and not wait:
+        logs = await run_in_threadpool(_find_logs, project_id, None, True)
+        return model_response(LogResponse, logs)
+
+    # Subscribe before querying so a log written in between still wakes us up
+    subscription = project_events.subscribe([project_id]) if wait else None
+    try:
+        logs = await run_in_threadpool(_find_logs, project_id, since_id)
+        if not logs and subscription is not None:
+            if await subscription.get(timeout=wait) is not None:
+                logs = await run_in_threadpool(_find_logs, project_id, since_id)
+    finally:
+        if subscription is not None:
+            subscription.close()
+    return model_response(LogResponse, logs)
 
 
 @router.get("/project/{project_id}/download-all")
 def download_all_files(project_id: int, db: Session = Depends(get_db)):
-    """Download all files for a project as a ZIP file"""
+    """Download all files for a project as a ZIP file (streamed, one file body at a time)"""
     file_repository = FileRepository(db)
-    files = file_repository.find_by_project_id(project_id)
-    
-    # Filter only completed files
-    completed_files = [file for file in files if file.status == "completed"]
+    completed_entries = file_repository.find_completed_entries(project_id)
     
-    if not completed_files:
+    if not completed_entries:
         raise HTTPException(status_code=404, detail="No completed files found for this project")
     
-    # Create a ZIP file in memory
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for file in completed_files:
-            # Add file to ZIP with its filename
-            zip_file.writestr(file.filename, file.content.encode('utf-8'))
-    
-    zip_buffer.seek(0)
-    
-    return Response(
-        content=zip_buffer.getvalue(),
+    return StreamingResponse(
+        stream_project_archive(completed_entries),
         media_type="application/zip",
         headers={
             "Content-Disposition": f'attachment; filename="project_{project_id}_files.zip"'
         }
     )
-
@@ -5,11 +5,18 @@ from pydantic import BaseModel
 from datetime import datetime
 from app.database import get_db
 from app.dependencies import get_current_user
+from app.responses import model_response
 from app.services.project_service import ProjectService
+from app.services import similar_ideas, speculative_generation
+from app.models.generation_log import GenerationLog
 from app.models.project import Project
 from app.models.user import User
+from app.repositories.file_repository import FileRepository
+from app.repositories.job_repository import JobRepository
+from app.repositories.log_repository import LogRepository
+from app.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/api/projects", tags=["projects"])
+router = APIRouter(prefix="/api/projects", tags=["projects"], route_class=ProfiledRoute)
 
 
 class ProjectCreate(BaseModel):
@@ -25,6 +32,14 @@ class ProjectUpdate(BaseModel):
     idea_description: str | None = None
 
 
+class SimilarProjectResponse(BaseModel):
+    id: int
+    name: str
+    idea_description: str | None
+    similarity: float
+    documents: int  # completed documents that can be copied as a starting draft
+
+
 class ProjectResponse(BaseModel):
     id: int
     name: str
@@ -44,7 +59,7 @@ def get_all_projects(
 ):
     project_service = ProjectService(db)
     projects = project_service.get_all_projects_by_user(current_user.id)
-    return projects
+    return model_response(ProjectResponse, projects)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
@@ -57,7 +72,7 @@ def get_project(
     project = project_service.get_project_by_id(project_id, current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    return model_response(ProjectResponse, project)
 
 
 @router.post("", response_model=ProjectResponse)
@@ -81,7 +96,10 @@ def create_project(
         user_id=current_user.id
     )
     saved_project = project_service.create_project(project)
-    return saved_project
+    similar_ideas.index_project(db, saved_project)
+    # Opt-in: start writing the documents before the user asks for them
+    speculative_generation.schedule(saved_project)
+    return model_response(ProjectResponse, saved_project)
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
@@ -101,11 +119,17 @@ def update_project(
         project.name = project_data.name
     if project_data.description is not None:
         project.description = project_data.description
+    idea_changed = project_data.idea_description is not None and project_data.idea_description != project.idea_description
     if project_data.idea_description is not None:
         project.idea_description = project_data.idea_description
     
     updated_project = project_service.update_project(project)
-    return updated_project
+    if idea_changed:
+        similar_ideas.index_project(db, updated_project)
+    # A speculative run for the old inputs is wasted work; queue one for the new inputs
+    speculative_generation.preempt(db, project_id)
+    speculative_generation.schedule(updated_project)
+    return model_response(ProjectResponse, updated_project)
 
 
 @router.delete("/{project_id}")
@@ -115,8 +139,7 @@ def delete_project(
     db: Session = Depends(get_db)
 ):
     """Delete a project and all associated files"""
-    from app.repositories.file_repository import FileRepository
-    from app.repositories.log_repository import LogRepository
+    from app.repositories.version_repository import VersionRepository
     
     project_service = ProjectService(db)
     project = project_service.get_project_by_id(project_id, current_user.id)
@@ -128,7 +151,9 @@ def delete_project(
         file_repository = FileRepository(db)
         log_repository = LogRepository(db)
         
-        file_repository.delete_by_project_id(project_id)
+        file_repository.delete_by_project_id(project_id, keep_history=False)
+        VersionRepository(db).delete_by_project_id(project_id)
+        similar_ideas.idea_index.remove(db, project)
         log_repository.clear_project_logs(project_id)
         
         # Delete the project
@@ -138,3 +163,64 @@ def delete_project(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete project: {str(e)}")
 
+
+@router.get("/{project_id}/similar", response_model=List[SimilarProjectResponse])
+def get_similar_projects(
+    project_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """The user's other projects in the same competition with a near-duplicate idea, closest first"""
+    project_service = ProjectService(db)
+    project = project_service.get_project_by_id(project_id, current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    file_repository = FileRepository(db)
+    similar = []
+    for matched, score in similar_ideas.similar_projects(db, project):
+        similar.append({
+            "id": matched.id,
+            "name": matched.name,
+            "idea_description": matched.idea_description,
+            "similarity": round(score, 2),
+            "documents": sum(1 for f in file_repository.find_summaries_by_project_id(matched.id) if f["status"] == "completed"),
+        })
+    return model_response(SimilarProjectResponse, similar)
+
+
+@router.post("/{project_id}/draft-from/{source_project_id}")
+def copy_draft_documents(
+    project_id: int,
+    source_project_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start from the documents of another of the user's projects: the ones this
+    project does not have yet are copied. They count as stale, so generating
+    with mode=stale rewrites them for this project's idea.
+    """
+    project_service = ProjectService(db)
+    project = project_service.get_project_by_id(project_id, current_user.id)
+    source = project_service.get_project_by_id(source_project_id, current_user.id)
+    if not project or not source:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if source.id == project.id:
+        raise HTTPException(status_code=400, detail="A project cannot start from its own documents")
+    if JobRepository(db).find_running(project_id) is not None:
+        raise HTTPException(status_code=409, detail="Documents are being generated for this project")
+
+    copied = similar_ideas.copy_draft(db, project, source)
+    if copied:
+        LogRepository(db).save(GenerationLog(
+            project_id=project_id,
+            message=f"📋 Copied {len(copied)} document(s) from \"{source.name}\" as a starting draft",
+            log_type="success",
+        ))
+    return {
+        "message": f"Copied {len(copied)} document(s) as a starting draft",
+        "project_id": project_id,
+        "source_project_id": source.id,
+        "copied": [f.filename for f in copied],
+    }
@@ -0,0 +1,132 @@
+import asyncio
+import json
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.events import Subscription, project_events
+from app.repositories.file_repository import FileRepository
+from app.repositories.log_repository import LogRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.auth_service import AuthService
+
+router = APIRouter(prefix="/api/ws", tags=["realtime"])
+
+# Projects a single connection may follow at once
+MAX_SUBSCRIPTIONS = 50
+# Idle connections get a ping so proxies (nginx proxy_read_timeout) keep them open
+KEEPALIVE_SECONDS = 25
+
+
+def _authenticate(token: str) -> Optional[int]:
+    db = SessionLocal()
+    try:
+        user = AuthService(db).get_user_by_token(token)
+        return user.id if user else None
+    finally:
+        db.close()
+
+
+def _authorize(project_ids: List[int], user_id: int) -> List[int]:
+    db = SessionLocal()
+    try:
+        return ProjectRepository(db).find_ids_owned_by(project_ids, user_id)
+    finally:
+        db.close()
+
+
+def _snapshot(project_id: int) -> Tuple[List[dict], int]:
+    """Current file metadata and newest log id of a project"""
+    db = SessionLocal()
+    try:
+        files = FileRepository(db).find_summaries_by_project_id(project_id)
+        return files, LogRepository(db).find_last_id(project_id)
+    finally:
+        db.close()
+
+
+async def _handle_commands(websocket: WebSocket, subscription: Subscription, user_id: int) -> None:
+    """
+    Read subscribe/unsubscribe commands:
+
+        {"action": "subscribe", "project_ids": [1, 2]}
+        {"action": "unsubscribe", "project_ids": [2]}
+    """
+    while True:
+        try:
+            message = json.loads(await websocket.receive_text())
+        except ValueError:
+            message = None
+        action = message.get("action") if isinstance(message, dict) else None
+        project_ids = message.get("project_ids") if isinstance(message, dict) else None
+        if action not in ("subscribe", "unsubscribe") or not isinstance(project_ids, list) \
+                or not all(isinstance(project_id, int) for project_id in project_ids):
+            await websocket.send_json({"type": "error", "detail": "Expected {action: subscribe|unsubscribe, project_ids: [int]}"})
+            continue
+
+        if action == "unsubscribe":
+            for project_id in project_ids:
+                subscription.remove(project_id)
+            await websocket.send_json({"type": "unsubscribed", "project_ids": project_ids})
+            continue
+
+        requested = [project_id for project_id in dict.fromkeys(project_ids) if project_id not in subscription.project_ids]
+        if len(subscription.project_ids) + len(requested) > MAX_SUBSCRIPTIONS:
+            await websocket.send_json({"type": "error", "detail": f"At most {MAX_SUBSCRIPTIONS} projects per connection"})
+            continue
+        allowed = await run_in_threadpool(_authorize, requested, user_id) if requested else []
+        # Subscribe before taking the snapshot so no transition falls in between
+        for project_id in allowed:
+            subscription.add(project_id)
+        await websocket.send_json({
+            "type": "subscribed",
+            "project_ids": allowed,
+            "denied": [project_id for project_id in requested if project_id not in allowed],
+        })
+        for project_id in allowed:
+            files, last_log_id = await run_in_threadpool(_snapshot, project_id)
+            await websocket.send_json({"type": "snapshot", "project_id": project_id, "files": files, "last_log_id": last_log_id})
+
+
+async def _push_events(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+        if subscription.dropped:
+            # The client fell too far behind; it should reload state over REST
+            subscription.dropped = 0
+            await websocket.send_json({"type": "resync"})
+        await websocket.send_json(event if event is not None else {"type": "ping"})
+
+
+@router.websocket("/projects")
+async def project_updates(websocket: WebSocket, token: str = Query(...)):
+    """
+    Push file status transitions, new logs and job completion for any number
+    of projects over one connection.
+
+    Browsers cannot set headers on WebSocket requests, so the bearer token is
+    passed as the `token` query parameter. Events come from the in-process
+    event bus that the generation service publishes to; no query runs per
+    client except the snapshot sent on subscribe.
+    """
+    user_id = await run_in_threadpool(_authenticate, token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = project_events.subscribe()
+    tasks = [
+        asyncio.create_task(_handle_commands(websocket, subscription, user_id)),
+        asyncio.create_task(_push_events(websocket, subscription)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        subscription.close()
+        for task in tasks:
+            task.cancel()
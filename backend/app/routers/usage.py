@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List
+from pydantic import BaseModel
+from app.database import get_db
+from app.responses import model_response
+from app.services.usage_service import UsageService
+from app.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/api/usage", tags=["usage"], route_class=ProfiledRoute)
+
+
+class CompetitionUsageResponse(BaseModel):
+    competition_id: int | None
+    competition_name: str | None
+    completions: int
+    prompt_tokens: int
+    completion_tokens: int
+    retries: int
+    hedged: int
+    avg_latency_ms: float | None
+    avg_time_to_first_token_ms: float | None
+    tokens_per_second: float | None
+    cost_usd: float
+    avg_cost_usd: float | None
+    unpriced_models: List[str]
+
+
+class RouteUsageResponse(BaseModel):
+    competition_id: int | None
+    competition_name: str | None
+    route_key: str | None
+    model: str
+    fallback_from: str | None
+    completions: int
+    prompt_tokens: int
+    completion_tokens: int
+    avg_completion_tokens: float | None
+    avg_latency_ms: float | None
+    avg_time_to_first_token_ms: float | None
+    cost_usd: float | None
+
+
+@router.get("/competitions", response_model=List[CompetitionUsageResponse])
+def get_usage_by_competition(db: Session = Depends(get_db)):
+    """OpenAI token usage, throughput and cost per competition prompt"""
+    usage_service = UsageService(db)
+    return model_response(CompetitionUsageResponse, usage_service.competition_report())
+
+
+@router.get("/routes", response_model=List[RouteUsageResponse])
+def get_usage_by_route(db: Session = Depends(get_db)):
+    """Latency, tokens and cost per model routing decision (route, model and fallback)"""
+    usage_service = UsageService(db)
+    return model_response(RouteUsageResponse, usage_service.route_report())
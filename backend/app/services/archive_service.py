@@ -0,0 +1,83 @@
+import io
+import time
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+from app.database import SessionLocal
+from app.repositories.file_repository import FileRepository
+
+# Size of the text slices encoded and fed to the compressor at a time
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable sink that hands written bytes back to the generator"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(members: Iterable[Tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """
+    Build a ZIP archive incrementally and yield compressed bytes as they are produced.
+
+    Because the sink is not seekable, zipfile writes data descriptors after each
+    member instead of patching local headers, so nothing is ever buffered beyond
+    the chunk currently being compressed.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in members:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w") as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # Central directory is written when the archive is closed
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def _encode_chunks(content: str) -> Iterator[bytes]:
+    for start in range(0, len(content), CHUNK_SIZE):
+        yield content[start:start + CHUNK_SIZE].encode("utf-8")
+
+
+def stream_project_archive(entries: List[Tuple[int, str]]) -> Iterator[bytes]:
+    """
+    Stream a ZIP of the given (file_id, filename) entries.
+
+    Runs after the request handler has returned, so it uses its own DB session
+    and loads one file body at a time.
+    """
+    db = SessionLocal()
+    try:
+        file_repository = FileRepository(db)
+
+        def members():
+            for file_id, filename in entries:
+                content = file_repository.find_content_by_id(file_id) or ""
+                yield filename, _encode_chunks(content)
+
+        yield from stream_zip(members())
+    finally:
+        db.close()
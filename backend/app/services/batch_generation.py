@@ -0,0 +1,296 @@
+"""
+Offline bulk generation through the OpenAI Batch API.
+
+For cohort events, documents of hundreds of projects are generated at once:
+the same prompts and routing FileGenerationService uses are written to a JSONL
+batch, submitted, polled, and the results imported into generated_files with
+one transaction per project. Batch requests cost half as much as interactive
+ones and do not compete with users for rate limits; they finish within 24h.
+
+Set OPENAI_BATCH_LOCAL=1 (or pass local=True) to use the local stand-in in
+local_batch instead of the API.
+"""
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.competition import Competition
+from app.models.generated_file import GeneratedFile
+from app.models.generation_batch import GenerationBatch
+from app.models.generation_log import GenerationLog
+from app.models.openai_usage import OpenAIUsage
+from app.models.project import Project
+from app.repositories.batch_repository import BatchRepository
+from app.repositories.file_repository import FileRepository
+from app.repositories.job_repository import JobRepository
+from app.repositories.log_repository import LogRepository
+from app.repositories.usage_repository import BATCH_OPERATION, UsageRepository
+from app.services.files_response import FILES_RESPONSE_FORMAT, parse_files_response
+from app.services.input_fingerprint import input_hash, stale_files
+from app.services.model_routing import plan_completions, route_for
+from app.services.openai_client import get_openai_client
+from app.services.prompts import generation_user_prompt, system_prompt_for
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+# Provider states after which a batch produces no further results
+FINISHED_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def create_batch_client(local: Optional[bool] = None):
+    """The OpenAI client, or the local stand-in when `local` (default: OPENAI_BATCH_LOCAL) is set"""
+    if local is None:
+        local = os.getenv("OPENAI_BATCH_LOCAL", "").lower() in ("1", "true", "yes")
+    if local:
+        from app.services.local_batch import LocalBatchClient
+        return LocalBatchClient()
+    return get_openai_client()
+
+
+class BatchGenerationService:
+    def __init__(self, db: Session, client=None, local: Optional[bool] = None):
+        self.db = db
+        self.local = local if local is not None else os.getenv("OPENAI_BATCH_LOCAL", "").lower() in ("1", "true", "yes")
+        self.client = client if client is not None else create_batch_client(self.local)
+        self.batch_repository = BatchRepository(db)
+        self.file_repository = FileRepository(db)
+        self.usage_repository = UsageRepository(db)
+
+    def build(self, projects: List[Project], stale_only: bool = False) -> Tuple[List[dict], dict]:
+        """
+        The batch requests for `projects` and the manifest needed to import their
+        results. With `stale_only`, projects whose documents are all up to date
+        are left out and the others only ask for their stale documents.
+        """
+        competitions: Dict[Optional[int], Optional[Competition]] = {}
+        requests: List[dict] = []
+        manifest = {"prompts": {}, "requests": {}, "imported_projects": []}
+        for project in projects:
+            if project.competition_id not in competitions:
+                competitions[project.competition_id] = self.db.query(Competition).filter(
+                    Competition.id == project.competition_id
+                ).first() if project.competition_id else None
+            competition = competitions[project.competition_id]
+            system_prompt = system_prompt_for(competition)
+            prompt_key = str(competition.id) if competition and competition.file_generation_prompt else "default"
+            manifest["prompts"][prompt_key] = system_prompt
+
+            targets = None
+            if stale_only:
+                completed = [f for f in self.file_repository.find_by_project_id(project.id) if f.status == "completed"]
+                if completed:
+                    stale = stale_files(completed, project, system_prompt, lambda name: route_for(competition, name).model)
+                    if not stale:
+                        continue
+                    targets = [f.filename for f in stale]
+
+            for index, planned in enumerate(plan_completions(competition, system_prompt, targets)):
+                custom_id = f"project-{project.id}-{index}"
+                body = {
+                    "model": planned.route.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": generation_user_prompt(project, planned.names, planned.excluded)},
+                    ],
+                    "temperature": planned.route.temperature,
+                }
+                if planned.max_tokens:
+                    body["max_tokens"] = planned.max_tokens
+                if planned.route.structured_output:
+                    body["response_format"] = FILES_RESPONSE_FORMAT
+                requests.append({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body})
+                manifest["requests"][custom_id] = {
+                    "project_id": project.id,
+                    "competition_id": project.competition_id,
+                    "prompt_key": prompt_key,
+                    "names": planned.names,
+                    "excluded": planned.excluded,
+                    "model": planned.route.model,
+                    "route_key": planned.route.key,
+                    "structured_output": planned.route.structured_output,
+                    # Inputs as submitted; files are fingerprinted with these, not with later edits
+                    "inputs": {
+                        "name": project.name,
+                        "description": project.description,
+                        "idea_description": project.idea_description,
+                    },
+                }
+        return requests, manifest
+
+    def submit(self, projects: List[Project], stale_only: bool = False) -> Optional[GenerationBatch]:
+        """Upload and start a batch for `projects`; None when there is nothing to generate"""
+        if self.client is None:
+            raise ValueError("OpenAI API key not configured")
+        requests, manifest = self.build(projects, stale_only)
+        if not requests:
+            return None
+        payload = "\n".join(json.dumps(request, ensure_ascii=False) for request in requests).encode("utf-8")
+        input_file = self.client.files.create(file=("generation_batch.jsonl", payload), purpose="batch")
+        provider_batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+            metadata={"source": "entrepreneurship-platform"},
+        )
+        batch = GenerationBatch(
+            backend="local" if self.local else "openai",
+            manifest=manifest,
+            request_count=len(requests),
+            project_count=len({entry["project_id"] for entry in manifest["requests"].values()}),
+            stale_only=stale_only,
+        )
+        batch.provider_batch_id = provider_batch.id
+        batch.input_file_id = input_file.id
+        batch.status = provider_batch.status
+        return self.batch_repository.save(batch)
+
+    def refresh(self, batch: GenerationBatch) -> GenerationBatch:
+        """Poll the provider and import the results once the batch has finished"""
+        if batch.imported_at is not None:
+            return batch
+        if batch.status not in FINISHED_STATES:
+            provider_batch = self.client.batches.retrieve(batch.provider_batch_id)
+            batch.status = provider_batch.status
+            batch.output_file_id = provider_batch.output_file_id
+            batch.error_file_id = provider_batch.error_file_id
+            if provider_batch.status in FINISHED_STATES:
+                batch.completed_at = datetime.utcnow()
+            batch = self.batch_repository.save(batch)
+        # Expired and cancelled batches still return the requests that did finish
+        if batch.status in FINISHED_STATES and (batch.output_file_id or batch.error_file_id):
+            batch = self.import_results(batch)
+        return batch
+
+    def _read_results(self, batch: GenerationBatch) -> Tuple[Dict[str, dict], Dict[str, str]]:
+        """(custom_id -> chat completion body, custom_id -> error message)"""
+        results: Dict[str, dict] = {}
+        errors: Dict[str, str] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    error = record.get("error") or (response.get("body") or {}).get("error") or {}
+                    errors[record["custom_id"]] = error.get("message") or f"HTTP {response.get('status_code')}"
+                else:
+                    results[record["custom_id"]] = response["body"]
+        return results, errors
+
+    def import_results(self, batch: GenerationBatch) -> GenerationBatch:
+        """
+        Save the generated documents, one transaction per project. Projects with
+        a generation running are skipped and picked up by the next import.
+        """
+        results, errors = self._read_results(batch)
+        manifest = batch.manifest
+        by_project: Dict[int, List[str]] = {}
+        for custom_id, entry in manifest["requests"].items():
+            by_project.setdefault(entry["project_id"], []).append(custom_id)
+
+        imported_projects = set(manifest.get("imported_projects", []))
+        turnaround_ms = ((batch.completed_at or datetime.utcnow()) - batch.created_at).total_seconds() * 1000
+        imported_files = batch.imported_files
+        failed_requests = 0
+        skipped = 0
+        for project_id, custom_ids in by_project.items():
+            if project_id in imported_projects:
+                continue
+            if self.db.query(Project.id).filter(Project.id == project_id).first() is None:
+                imported_projects.add(project_id)  # deleted since the batch was built
+                continue
+            job, created = JobRepository(self.db).acquire(project_id, "batch", str(batch.id))
+            if not created:
+                skipped += 1
+                continue
+            outcome, error = "error", None
+            try:
+                files, usages, failures = self._project_results(batch, custom_ids, results, errors, turnaround_ms)
+                failed_requests += len(failures)
+                if files:
+                    # Like an interactive full generation: once every request of a
+                    # non-stale project succeeded, documents it no longer produces go too
+                    complete = not failures and any(not manifest["requests"][custom_id]["names"] for custom_id in custom_ids)
+                    self.file_repository.replace_files(project_id, files, replace_all=complete)
+                    imported_files += len(files)
+                self.usage_repository.save_all(usages)
+                log = LogRepository(self.db)
+                log.save(GenerationLog(
+                    project_id=project_id,
+                    message=f"📦 Imported {len(files)} file(s) from bulk generation batch {batch.id}",
+                    log_type="success" if files else "warning",
+                ))
+                for failure in failures:
+                    log.save(GenerationLog(project_id=project_id, message=f"❌ Batch request failed: {failure}", log_type="error"))
+                imported_projects.add(project_id)
+                outcome = "success"
+            except Exception as e:
+                self.db.rollback()
+                error = str(e)
+                print(f"Failed to import batch {batch.id} results for project {project_id}: {e}", file=sys.stderr)
+            finally:
+                JobRepository(self.db).finish(job.id, "succeeded" if outcome == "success" else "failed", error)
+
+        batch.manifest = {**manifest, "imported_projects": sorted(imported_projects)}
+        batch.imported_files = imported_files
+        batch.failed_requests += failed_requests
+        if not skipped and len(imported_projects) >= len(by_project):
+            batch.imported_at = datetime.utcnow()
+        return self.batch_repository.save(batch)
+
+    def _project_results(self, batch: GenerationBatch, custom_ids: List[str], results: Dict[str, dict],
+                         errors: Dict[str, str], turnaround_ms: float):
+        """(files, usage rows, failure messages) of one project's requests"""
+        manifest = batch.manifest
+        files: List[GeneratedFile] = []
+        usages: List[OpenAIUsage] = []
+        failures: List[str] = []
+        for custom_id in custom_ids:
+            entry = manifest["requests"][custom_id]
+            body = results.get(custom_id)
+            if body is None:
+                failures.append(errors.get(custom_id, f"no result for {custom_id}"))
+                continue
+            usage = body.get("usage") or {}
+            usages.append(OpenAIUsage(
+                project_id=entry["project_id"],
+                competition_id=entry["competition_id"],
+                operation=BATCH_OPERATION,
+                model=body.get("model") or entry["model"],
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0),
+                # Submission to completion of the whole batch; usage reports leave it
+                # out of latency and throughput, and price the tokens at the batch rate
+                latency_ms=turnaround_ms,
+                route_key=entry["route_key"],
+            ))
+            try:
+                parsed = parse_files_response(
+                    body["choices"][0]["message"]["content"] or "", structured=entry.get("structured_output", False)
+                )
+            except (ValueError, KeyError, IndexError) as e:
+                failures.append(f"could not parse the response to {custom_id}: {e}")
+                continue
+            if not parsed.complete:
+                # The rest is picked up by the next --stale run
+                failures.append(f"the response to {custom_id} was cut off; imported its {len(parsed.files)} complete document(s)")
+            inputs = Project(**entry["inputs"])
+            system_prompt = manifest["prompts"][entry["prompt_key"]]
+            for document in parsed.files:
+                filename = document.filename
+                if entry["names"] and filename not in entry["names"] or filename in entry["excluded"]:
+                    continue
+                files.append(GeneratedFile(
+                    project_id=entry["project_id"],
+                    filename=filename,
+                    content=document.content,
+                    file_type=document.file_type,
+                    status="completed",
+                    input_hash=input_hash(inputs, system_prompt, filename, entry["model"]),
+                ))
+        return files, usages, failures
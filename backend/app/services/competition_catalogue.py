@@ -0,0 +1,45 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.competition import Competition
+from app.repositories.competition_repository import CompetitionRepository
+
+
+class CompetitionCatalogue:
+    """
+    In-memory cache of pre-serialized competition responses.
+
+    Competitions only change when the seed/update scripts run, and those bump the
+    catalogue version. Every read costs one primary-key lookup of that version;
+    the rows are loaded and serialized again only after it changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._competitions: Optional[List[Competition]] = None
+        self._bodies: Dict[str, Optional[bytes]] = {}
+
+    def get_body(self, db: Session, key: str, build: Callable[[List[Competition]], Optional[bytes]]) -> Tuple[int, Optional[bytes]]:
+        """Return (version, body) for `key`, building it from the competitions on a miss"""
+        repository = CompetitionRepository(db)
+        version = repository.get_version()
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._competitions = None
+                self._bodies = {}
+            if key in self._bodies:
+                return version, self._bodies[key]
+            if self._competitions is None:
+                self._competitions = repository.find_all()
+                # Keep the rows usable after the request session closes
+                for competition in self._competitions:
+                    db.expunge(competition)
+            body = build(self._competitions)
+            if body is not None:
+                self._bodies[key] = body
+            return version, body
+
+
+competition_catalogue = CompetitionCatalogue()
@@ -0,0 +1,72 @@
+from typing import Iterator, Optional, Tuple
+from app.database import SessionLocal
+from app.repositories.file_repository import FileRepository
+
+# Bytes read from the database per query when streaming a body
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(ValueError):
+    """The requested byte range lies outside the body"""
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a `Range: bytes=...` header into an inclusive (start, end) pair.
+
+    Returns None when the whole body should be served: no header, an unknown
+    unit, multiple ranges or an invalid range such as `bytes=5-2` (RFC 9110
+    lets a server ignore those). Raises RangeNotSatisfiable when a valid range
+    does not overlap the body, which is every range of an empty body.
+    """
+    if not range_header:
+        return None
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, sep, last = ranges.strip().partition("-")
+    # Anything but digits (signs, spaces, letters) makes the range invalid
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if first == "":
+        # Suffix range: the last N bytes
+        suffix_length = int(last)
+        if suffix_length == 0 or size == 0:
+            raise RangeNotSatisfiable(range_header)
+        return max(size - suffix_length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+    return start, min(end, size - 1)
+
+
+class FileBodySource:
+    """
+    Seekable byte view of a stored file body.
+
+    Slices are read with SQL (substr over the UTF-8 bytes) so serving a range,
+    or the whole body in chunks, never loads the full content into memory.
+    """
+
+    def __init__(self, file_id: int, size: int):
+        self.file_id = file_id
+        self.size = size
+
+    def iter_range(self, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the bytes in [start, end] (inclusive). Uses its own DB session."""
+        db = SessionLocal()
+        try:
+            file_repository = FileRepository(db)
+            offset = start
+            while offset <= end:
+                length = min(chunk_size, end - offset + 1)
+                chunk = file_repository.read_content_bytes(self.file_id, offset, length)
+                if not chunk:
+                    break
+                yield chunk
+                offset += len(chunk)
+        finally:
+            db.close()
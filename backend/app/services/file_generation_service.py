@@ -1,7 +1,5 @@
-import os
-import json
-from typing import List, Dict
-from openai import OpenAI
+import time
+from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
 from app.models.project import Project
 from app.models.competition import Competition
@@ -9,19 +7,44 @@ from app.models.generated_file import GeneratedFile
 from app.models.generation_log import GenerationLog
 from app.repositories.file_repository import FileRepository
 from app.repositories.log_repository import LogRepository
+from app.models.openai_usage import OpenAIUsage
+from app.repositories.usage_repository import UsageRepository
+from app.metrics import OPENAI_REQUEST_DURATION, OPENAI_TIME_TO_FIRST_TOKEN, OPENAI_TOKENS
+from app.services.openai_client import get_openai_client
+from app.services.resilient_completion import stream_completion
+from app.services.markdown_sections import find_section, outline, parse_sections, splice
+from app.services.prompts import DEFAULT_FILE_GENERATION_PROMPT, generation_user_prompt, single_file_user_prompt
+from app.services.files_response import FILES_RESPONSE_FORMAT, MalformedResponse, parse_files_response
+from app.services.input_fingerprint import input_hash, stale_files
+from app.services.model_routing import RoutingDecision, decide, plan_completions, route_for
+from app.services.generation_jobs import CancellationToken, GenerationCancelled
+from app.services import similar_ideas
+
+# Output budget for a section rewrite: about twice the current section, within bounds
+SECTION_MIN_TOKENS = 256
+SECTION_MAX_TOKENS = 4096
+
+# Completions asking for the documents a cut-off response did not reach, per run
+MAX_FOLLOW_UPS = 2
+
+SECTION_SYSTEM_PROMPT = """You are an expert business consultant helping entrepreneurs improve competition materials.
+
+You rewrite ONE section of an existing document. You are given the project, an outline of the whole
+document for context, and the current text of the section. Return ONLY the new markdown for that
+section, starting with its heading line. Keep the heading, stay consistent with the rest of the
+document, and do not repeat content that belongs to other sections."""
 
 
 class FileGenerationService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cancel_token: Optional[CancellationToken] = None):
         self.db = db
+        self.cancel_token = cancel_token or CancellationToken()
         self.file_repository = FileRepository(db)
         self.log_repository = LogRepository(db)
+        self.usage_repository = UsageRepository(db)
         # Initialize OpenAI client - API key should be in environment variable
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            self.client = OpenAI(api_key=api_key)
-        else:
-            self.client = None
+        self.client = get_openai_client()
+        if self.client is None:
             print("Warning: OPENAI_API_KEY not set. File generation will not work.")
 
     def _log(self, project_id: int, message: str, log_type: str = "info"):
@@ -34,13 +57,102 @@ class FileGenerationService:
             self.db.rollback()
             # Don't fail the whole process if logging fails
 
-    def generate_files_for_project(self, project_id: int) -> List[GeneratedFile]:
-        """Generate files for a project based on its competition requirements"""
-        # Clear previous logs and files (for regeneration) - MUST happen first
-        self._log(project_id, "🗑️ Clearing previous files and logs...", "info")
+    def _route(self, project_id: int, competition: Optional[Competition], filename: Optional[str] = None) -> RoutingDecision:
+        """Pick the model for a document (see model_routing) and log when it falls back"""
+        decision = decide(route_for(competition, filename))
+        if decision.fallback_from:
+            self._log(project_id, f"🐢 {decision.fallback_from} is responding slowly, using {decision.model} for {filename or 'the documents'}", "warning")
+        return decision
+
+    def _complete(self, project: Project, operation: str, messages: List[Dict[str, str]],
+                  decision: RoutingDecision, max_tokens: Optional[int] = None,
+                  deadline: Optional[float] = None, files_schema: bool = False) -> str:
+        """
+        Run a streamed chat completion with the routed model and return the message content.
+
+        Transient failures are retried with backoff within `deadline` seconds
+        (see resilient_completion). Streaming gives us the time to first token;
+        the final chunk carries the token usage. Every completion is recorded in
+        the openai_usage table, together with the routing decision. With
+        `files_schema`, routes that support it get a response constrained to the
+        files JSON schema (see files_response).
+        """
+        self.cancel_token.raise_if_cancelled()
+        model = decision.model
+        temperature = decision.route.temperature
+        started = time.monotonic()
+        options = {"max_tokens": max_tokens} if max_tokens else {}
+        if files_schema and decision.route.structured_output:
+            options["response_format"] = FILES_RESPONSE_FORMAT
+        request = dict(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+            **options,
+        )
+
+        def on_retry(error: Exception, delay: float):
+            self._log(project.id, f"⚠️ OpenAI request failed ({type(error).__name__}), retrying in {delay:.1f}s", "warning")
+
+        result = stream_completion(self.client, request, self.cancel_token, deadline=deadline, on_retry=on_retry)
+        finished = time.monotonic()
+
+        usage = result.usage
+        prompt_tokens = usage.prompt_tokens if usage else 0
+        completion_tokens = usage.completion_tokens if usage else 0
+        time_to_first_token = result.time_to_first_token
+        OPENAI_REQUEST_DURATION.labels(model=model).observe(finished - started)
+        if time_to_first_token is not None:
+            OPENAI_TIME_TO_FIRST_TOKEN.labels(model=model).observe(time_to_first_token)
+        OPENAI_TOKENS.labels(model=model, type="prompt").inc(prompt_tokens)
+        OPENAI_TOKENS.labels(model=model, type="completion").inc(completion_tokens)
+        try:
+            self.usage_repository.save(OpenAIUsage(
+                project_id=project.id,
+                competition_id=project.competition_id,
+                operation=operation,
+                model=model,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                latency_ms=(finished - started) * 1000,
+                time_to_first_token_ms=time_to_first_token * 1000 if time_to_first_token is not None else None,
+                retry_count=result.attempts - 1,
+                hedged=result.hedged,
+                route_key=decision.route.key,
+                fallback_from=decision.fallback_from,
+            ))
+        except Exception as e:
+            # Accounting must never fail a generation
+            print(f"Failed to record OpenAI usage for project {project.id}: {e}")
+        if result.refusal and not result.content:
+            raise ValueError(f"{model} declined the request: {result.refusal}")
+        return result.content
+
+    def _similar_example(self, project: Project):
+        """The documents of a near-duplicate idea to show as an example (see similar_ideas), if any"""
+        try:
+            example = similar_ideas.find_example(self.db, project)
+        except Exception as e:
+            # The example only helps; never fail a generation over it
+            print(f"Failed to look up similar ideas for project {project.id}: {e}")
+            self.db.rollback()
+            return None
+        if example:
+            self._log(project.id, f"🧬 Using the documents of a similar idea ({example[2]:.0%} similar) as an example", "info")
+        return example
+
+    def generate_files_for_project(self, project_id: int, stale_only: bool = False) -> List[GeneratedFile]:
+        """
+        Generate files for a project based on its competition requirements.
+
+        With `stale_only`, files whose input fingerprint still matches the current
+        project and prompt are kept, and only the others are regenerated.
+        """
+        # Clear previous logs - MUST happen first
         self.log_repository.clear_project_logs(project_id)
-        self.file_repository.delete_by_project_id(project_id)
-        # Ensure deletion is committed before proceeding
+        # Ensure the cleared logs are committed before proceeding
         self.db.commit()
         self._log(project_id, "🚀 Starting file generation process...", "info")
         
@@ -74,132 +186,112 @@ class FileGenerationService:
         else:
             if competition:
                 self._log(project_id, "⚠️ Competition has no custom prompt, using default prompt", "warning")
-            system_prompt = """You are an expert business consultant helping entrepreneurs prepare competition materials.
-
-Generate comprehensive, professional documents for an entrepreneurship competition. These are the ESSENTIAL files needed for most startup competitions. Based on the project idea provided, create the following files:
-
-1. **Pitch Deck** (pitch_deck.md) - A complete pitch deck outline (10-12 slides) including:
-   - Problem Statement (What problem are you solving?)
-   - Solution (Your product/service)
-   - Market Opportunity (Market size, TAM/SAM/SOM)
-   - Business Model (How you make money)
-   - Traction/Milestones (What you've achieved)
-   - Team (Key team members and their expertise)
-   - Financials (Revenue projections, key metrics)
-   - Ask/Next Steps (What you need, funding ask)
-
-2. **Business Plan** (business_plan.md) - A comprehensive business plan including:
-   - Executive Summary
-   - Company Description & Vision
-   - Market Analysis (Industry, competitors, target market)
-   - Organization & Management (Team structure, advisors)
-   - Product/Service Line (Detailed description)
-   - Marketing & Sales Strategy
-   - Financial Projections (3-5 years)
-   - Funding Request & Use of Funds
-
-3. **Executive Summary** (executive_summary.txt) - A concise 1-2 page summary that can be used for:
-   - Quick overview for judges
-   - Email introductions
-   - Application forms
-   - Investor outreach
-
-4. **Financial Plan** (financial_plan.md) - Detailed financial projections including:
-   - Revenue Model (How you generate revenue)
-   - Cost Structure (Fixed and variable costs)
-   - 3-Year Financial Projections (Income statement, cash flow)
-   - Break-even Analysis
-   - Funding Requirements & Use of Funds
-   - Key Financial Assumptions
-
-These 4 files cover the core requirements for most entrepreneurship competitions. Make all documents professional, well-structured, data-driven, and tailored to the specific project idea provided. Use realistic numbers and clear explanations."""
-
-        # Build the prompt for OpenAI
-        self._log(project_id, "📝 Preparing prompt for AI generation...", "info")
-        user_prompt = f"""
-Project Name: {project.name}
-Project Description: {project.description or 'N/A'}
-Idea Description: {project.idea_description}
+            system_prompt = DEFAULT_FILE_GENERATION_PROMPT
 
-Please generate the required files for this competition. Return a JSON object with the following structure:
-{{
-    "files": [
-        {{
-            "filename": "filename.ext",
-            "content": "file content here",
-            "file_type": "txt"
-        }}
-    ]
-}}
-"""
+        kept_files: List[GeneratedFile] = []
+        replaced_files: List[GeneratedFile] = []
+        targets: Optional[List[str]] = None
+        if stale_only:
+            existing_files = self.file_repository.find_by_project_id(project_id)
+            completed = [f for f in existing_files if f.status == "completed"]
+            # Failed attempts are always retried
+            for failed in [f for f in existing_files if f.status != "completed"]:
+                self.file_repository.delete(failed)
+            if completed:
+                replaced_files = stale_files(completed, project, system_prompt, lambda name: route_for(competition, name).model)
+                kept_files = [f for f in completed if f not in replaced_files]
+                if not replaced_files:
+                    self._log(project_id, f"✅ All {len(kept_files)} file(s) are up to date - nothing to regenerate", "success")
+                    return kept_files
+                targets = [f.filename for f in replaced_files]
+                self._log(project_id, f"♻️ Inputs changed for {', '.join(targets)}; keeping {len(kept_files)} unchanged file(s)", "info")
+            else:
+                self._log(project_id, "ℹ️ No previous files to reuse, generating everything", "info")
+
+        # Documents with their own route (model, budget, temperature) get their own completion
+        completions = plan_completions(competition, system_prompt, targets)
+        example = self._similar_example(project) if similar_ideas.FEW_SHOT else None
 
         try:
-            # Call OpenAI API
-            self._log(project_id, "🤖 Sending request to OpenAI API...", "info")
-            self._log(project_id, "⏳ Waiting for AI response (this may take 30-60 seconds)...", "info")
-            self.db.commit()  # Commit logs before API call
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Using gpt-4o-mini as it's more accessible
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7,
-            )
-            self._log(project_id, "✅ Received response from OpenAI", "success")
-            self.db.commit()  # Commit success log
+            files_list = []
+            follow_ups = 0
+            while completions:
+                planned = completions.pop(0)
+                # Build the prompt for OpenAI
+                self._log(project_id, "📝 Preparing prompt for AI generation...", "info")
+                user_prompt = generation_user_prompt(project, planned.names, planned.excluded)
+                decision = self._route(project_id, competition, planned.names[0] if planned.names else None)
+
+                # Call OpenAI API
+                self._log(project_id, f"🤖 Sending request to OpenAI API ({decision.model})...", "info")
+                self._log(project_id, "⏳ Waiting for AI response (this may take 30-60 seconds)...", "info")
+                self.db.commit()  # Commit logs before API call
+
+                content = self._complete(
+                    project,
+                    "generate_all",
+                    [
+                        {"role": "system", "content": system_prompt},
+                        *(similar_ideas.example_messages(example, planned) if example else []),
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    decision,
+                    max_tokens=planned.max_tokens,
+                    files_schema=True,
+                )
+                self._log(project_id, "✅ Received response from OpenAI", "success")
+                self.db.commit()  # Commit success log
+
+                # Parse response
+                self._log(project_id, "📄 Parsing AI response...", "info")
+                parsed = parse_files_response(content, structured=decision.route.structured_output)
+                accepted = [f for f in parsed.files if planned.accepts(f.filename)]
+                files_list.extend(accepted)
+                if parsed.complete:
+                    self._log(project_id, f"✅ Successfully parsed response. Found {len(parsed.files)} file(s)", "success")
+                    continue
+
+                # Cut off at max_tokens: keep what is complete and ask only for the rest
+                cut_off = f" while writing {parsed.partial_filename}" if parsed.partial_filename else ""
+                self._log(project_id, f"🩹 Response was cut off{cut_off}; recovered {len(parsed.files)} complete file(s)", "warning")
+                remainder = planned.remainder([f.filename for f in accepted])
+                if remainder is not None and follow_ups < MAX_FOLLOW_UPS:
+                    follow_ups += 1
+                    completions.append(remainder)
+                    self._log(project_id, "🔁 Requesting the remaining documents...", "info")
 
-            # Parse response
-            self._log(project_id, "📄 Parsing AI response...", "info")
-            content = response.choices[0].message.content
-            
-            # Try to extract JSON from the response
-            # Sometimes the response might have markdown code blocks
-            files_data = None
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-                files_data = json.loads(content)
-            elif "```" in content:
-                # Try to find JSON in code blocks
-                parts = content.split("```")
-                for i, part in enumerate(parts):
-                    if i % 2 == 1:  # Code blocks are on odd indices
-                        try:
-                            files_data = json.loads(part.strip())
-                            break
-                        except:
-                            continue
-                if not files_data:
-                    # If no code block worked, try the whole content
-                    files_data = json.loads(content)
-            else:
-                files_data = json.loads(content)
-            
-            self._log(project_id, f"✅ Successfully parsed response. Found {len(files_data.get('files', []))} file(s)", "success")
-            
             # Create GeneratedFile records
-            generated_files = []
-            files_list = files_data.get("files", [])
-            for idx, file_data in enumerate(files_list, 1):
-                filename = file_data.get("filename", "unknown.txt")
-                self._log(project_id, f"💾 Creating file {idx}/{len(files_list)}: {filename}", "info")
-                file = GeneratedFile(
+            generated_files = [
+                GeneratedFile(
                     project_id=project_id,
-                    filename=filename,
-                    content=file_data.get("content", ""),
-                    file_type=file_data.get("file_type", "txt"),
-                    status="completed"
+                    filename=document.filename,
+                    content=document.content,
+                    file_type=document.file_type,
+                    status="completed",
+                    input_hash=input_hash(project, system_prompt, document.filename, route_for(competition, document.filename).model)
                 )
-                saved_file = self.file_repository.save(file)
-                generated_files.append(saved_file)
-                self._log(project_id, f"✅ File created: {filename}", "success")
+                for document in files_list
+            ]
+
+            # The new files and the removal of the ones they replace (every
+            # previous file on a full regeneration) are one transaction, after
+            # the last cancellation point, so no project is left with both
+            self.cancel_token.raise_if_cancelled()
+            self._log(project_id, f"💾 Saving {len(generated_files)} file(s)...", "info")
+            self.file_repository.replace_files(project_id, generated_files, replace_all=not stale_only)
+            for file in generated_files:
+                self._log(project_id, f"✅ File created: {file.filename}", "success")
+            regenerated = {f.filename for f in generated_files}
+            kept_files.extend(f for f in replaced_files if f.filename not in regenerated)
 
             self._log(project_id, f"🎉 File generation completed! Generated {len(generated_files)} file(s)", "success")
             self.db.commit()  # Final commit
-            return generated_files
+            return generated_files + kept_files
 
-        except json.JSONDecodeError as e:
+        except GenerationCancelled:
+            self._log(project_id, "🛑 Generation cancelled", "warning")
+            raise
+        except MalformedResponse as e:
             error_msg = f"❌ Error: Failed to parse JSON response from AI. {str(e)}"
             self._log(project_id, error_msg, "error")
             self._log(project_id, "💡 Tip: The AI response may not be in the expected format", "warning")
@@ -266,134 +358,67 @@ Please generate the required files for this competition. Return a JSON object wi
         else:
             if competition:
                 self._log(project_id, "⚠️ Competition has no custom prompt, using default prompt", "warning")
-            system_prompt = """You are an expert business consultant helping entrepreneurs prepare competition materials.
-
-Generate comprehensive, professional documents for an entrepreneurship competition. These are the ESSENTIAL files needed for most startup competitions. Based on the project idea provided, create the following files:
-
-1. **Pitch Deck** (pitch_deck.md) - A complete pitch deck outline (10-12 slides) including:
-   - Problem Statement (What problem are you solving?)
-   - Solution (Your product/service)
-   - Market Opportunity (Market size, TAM/SAM/SOM)
-   - Business Model (How you make money)
-   - Traction/Milestones (What you've achieved)
-   - Team (Key team members and their expertise)
-   - Financials (Revenue projections, key metrics)
-   - Ask/Next Steps (What you need, funding ask)
-
-2. **Business Plan** (business_plan.md) - A comprehensive business plan including:
-   - Executive Summary
-   - Company Description & Vision
-   - Market Analysis (Industry, competitors, target market)
-   - Organization & Management (Team structure, advisors)
-   - Product/Service Line (Detailed description)
-   - Marketing & Sales Strategy
-   - Financial Projections (3-5 years)
-   - Funding Request & Use of Funds
-
-3. **Executive Summary** (executive_summary.txt) - A concise 1-2 page summary that can be used for:
-   - Quick overview for judges
-   - Email introductions
-   - Application forms
-   - Investor outreach
-
-4. **Financial Plan** (financial_plan.md) - Detailed financial projections including:
-   - Revenue Model (How you generate revenue)
-   - Cost Structure (Fixed and variable costs)
-   - 3-Year Financial Projections (Income statement, cash flow)
-   - Break-even Analysis
-   - Funding Requirements & Use of Funds
-   - Key Financial Assumptions
-
-These 4 files cover the core requirements for most entrepreneurship competitions. Make all documents professional, well-structured, data-driven, and tailored to the specific project idea provided. Use realistic numbers and clear explanations."""
+            system_prompt = DEFAULT_FILE_GENERATION_PROMPT
 
         self._log(project_id, "📝 Preparing prompt for AI generation...", "info")
-        user_prompt = f"""
-Project Name: {project.name}
-Project Description: {project.description or 'N/A'}
-Idea Description: {project.idea_description}
-
-Please generate ONLY the file: {filename}
-
-Return a JSON object with the following structure:
-{{
-    "files": [
-        {{
-            "filename": "{filename}",
-            "content": "file content here",
-            "file_type": "{filename.split('.')[-1] if '.' in filename else 'txt'}"
-        }}
-    ]
-}}
-"""
+        user_prompt = single_file_user_prompt(project, filename)
 
         try:
-            self._log(project_id, "🤖 Sending request to OpenAI API...", "info")
+            decision = self._route(project_id, competition, filename)
+            self._log(project_id, f"🤖 Sending request to OpenAI API ({decision.model})...", "info")
             self._log(project_id, "⏳ Waiting for AI response...", "info")
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
+            content = self._complete(
+                project,
+                "generate_single",
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                temperature=0.7,
+                decision,
+                max_tokens=decision.route.max_tokens,
+                files_schema=True,
             )
             self._log(project_id, "✅ Received response from OpenAI", "success")
 
-            content = response.choices[0].message.content
             
             # Parse JSON response
-            files_data = None
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-                files_data = json.loads(content)
-            elif "```" in content:
-                parts = content.split("```")
-                for i, part in enumerate(parts):
-                    if i % 2 == 1:
-                        try:
-                            files_data = json.loads(part.strip())
-                            break
-                        except:
-                            continue
-                if not files_data:
-                    files_data = json.loads(content)
-            else:
-                files_data = json.loads(content)
+            parsed = parse_files_response(content, structured=decision.route.structured_output)
             
             self._log(project_id, f"✅ Successfully parsed response", "success")
             
             # Find the specific file in the response
-            files_list = files_data.get("files", [])
             target_file = None
-            for file_data in files_list:
-                if file_data.get("filename") == filename:
-                    target_file = file_data
+            for document in parsed.files:
+                if document.filename == filename:
+                    target_file = document
                     break
             
             if not target_file:
                 raise ValueError(f"File {filename} not found in AI response")
             
-            # Delete old file if exists
-            existing_files = self.file_repository.find_by_project_id(project_id)
-            for existing_file in existing_files:
-                if existing_file.filename == filename:
-                    self.file_repository.delete(existing_file)
-                    break
-            
             # Create new file
+            self.cancel_token.raise_if_cancelled()
             self._log(project_id, f"💾 Creating file: {filename}", "info")
             file = GeneratedFile(
                 project_id=project_id,
                 filename=filename,
-                content=target_file.get("content", ""),
-                file_type=target_file.get("file_type", filename.split('.')[-1] if '.' in filename else 'txt'),
-                status="completed"
+                content=target_file.content,
+                file_type=target_file.file_type or (filename.split('.')[-1] if '.' in filename else 'txt'),
+                status="completed",
+                input_hash=input_hash(project, system_prompt, filename, decision.route.model)
             )
             saved_file = self.file_repository.save(file)
+            # Old file goes once its replacement is saved (and recorded in the document history)
+            for existing_file in self.file_repository.find_by_project_id(project_id):
+                if existing_file.filename == filename and existing_file.id != saved_file.id:
+                    self.file_repository.delete(existing_file)
             self._log(project_id, f"✅ File regenerated: {filename}", "success")
             return saved_file
 
-        except json.JSONDecodeError as e:
+        except GenerationCancelled:
+            self._log(project_id, "🛑 Generation cancelled", "warning")
+            raise
+        except MalformedResponse as e:
             error_msg = f"❌ Error: Failed to parse JSON response from AI. {str(e)}"
             self._log(project_id, error_msg, "error")
             # Create a failed file record
@@ -420,3 +445,90 @@ Return a JSON object with the following structure:
             self.file_repository.save(error_file)
             raise
 
+    def regenerate_section(self, file_id: int, section_key: str, instructions: Optional[str] = None) -> GeneratedFile:
+        """
+        Rewrite one section of a generated markdown file and splice it back in.
+
+        Only the target section and a compact outline of the document are sent,
+        and the model returns just that section, so a targeted edit costs a
+        fraction of the output tokens of regenerating the whole file.
+        """
+        file = self.file_repository.find_by_id(file_id)
+        if not file or file.status != "completed":
+            raise ValueError(f"File {file_id} not found")
+        project_id = file.project_id
+        document = file.content or ""
+        sections = parse_sections(document)
+        section = find_section(sections, section_key)
+        if not section:
+            raise ValueError(f"Section {section_key} not found in {file.filename}")
+
+        self._log(project_id, f"✏️ Regenerating section \"{section.title}\" of {file.filename}...", "info")
+        project = self.db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            self._log(project_id, f"❌ Error: Project {project_id} not found", "error")
+            raise ValueError(f"Project {project_id} not found")
+        if not self.client:
+            self._log(project_id, "❌ Error: OpenAI API key not configured", "error")
+            raise ValueError("OpenAI API key not configured")
+
+        competition = None
+        if project.competition_id:
+            competition = self.db.query(Competition).filter(Competition.id == project.competition_id).first()
+
+        current_text = section.text(document)
+        user_prompt = f"""
+Project Name: {project.name}
+Idea Description: {project.idea_description}
+Competition: {competition.name if competition else 'N/A'}
+
+Document: {file.filename}
+Outline of the document:
+{outline(document, sections, section)}
+
+Current text of the section to rewrite:
+{current_text}
+"""
+        if instructions:
+            user_prompt += f"\nInstructions from the author: {instructions}\n"
+        # ~4 characters per token for English text
+        max_tokens = min(max(len(current_text) // 2, SECTION_MIN_TOKENS), SECTION_MAX_TOKENS)
+
+        try:
+            decision = self._route(project_id, competition, file.filename)
+            self._log(project_id, f"🤖 Sending section to OpenAI API ({decision.model})...", "info")
+            content = self._complete(
+                project,
+                "regenerate_section",
+                [
+                    {"role": "system", "content": SECTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                decision,
+                max_tokens=max_tokens,
+            )
+            if content.startswith("```"):
+                content = content.split("\n", 1)[-1].rsplit("```", 1)[0]
+            if not content.strip():
+                raise ValueError("AI returned an empty section")
+
+            # Save the new version before removing the old one, so a failure never loses the file
+            self.cancel_token.raise_if_cancelled()
+            updated = self.file_repository.save(GeneratedFile(
+                project_id=project_id,
+                filename=file.filename,
+                content=splice(document, section, content),
+                file_type=file.file_type,
+                status="completed",
+                # Same inputs as before; only the wording of one section changed
+                input_hash=file.input_hash
+            ))
+            self.file_repository.delete(file)
+            self._log(project_id, f"✅ Section \"{section.title}\" of {file.filename} regenerated", "success")
+            return updated
+        except GenerationCancelled:
+            self._log(project_id, "🛑 Generation cancelled", "warning")
+            raise
+        except Exception as e:
+            self._log(project_id, f"❌ Error: {str(e)}", "error")
+            raise
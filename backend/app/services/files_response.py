@@ -0,0 +1,162 @@
+"""
+The `{"files": [...]}` object every generation completion returns.
+
+Completions are requested with a strict JSON schema (structured outputs), so a
+well-formed response always validates. Two cases remain: models or stand-ins
+without structured output that wrap the whole JSON in a markdown code block, and
+responses cut off at max_tokens. For the latter the complete file objects
+before the cut are salvaged, so the caller only has to ask for the rest.
+"""
+import json
+import re
+from typing import List, Optional
+from pydantic import BaseModel, ValidationError
+
+_FILENAME = re.compile(r'"filename"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+FILES_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "generated_files",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "files": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "filename": {"type": "string"},
+                            "content": {"type": "string"},
+                            "file_type": {"type": "string"},
+                        },
+                        "required": ["filename", "content", "file_type"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["files"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+class GeneratedDocument(BaseModel):
+    filename: str
+    content: str = ""
+    file_type: str = "txt"
+
+
+class FilesResponse(BaseModel):
+    files: List[GeneratedDocument]
+
+
+class ParsedFiles:
+    """
+    The documents of a response. `complete` is False when the response was cut
+    off and only the documents before the cut were recovered; `partial_filename`
+    names the document that was being written at that point, if known.
+    """
+
+    def __init__(self, files: List[GeneratedDocument], complete: bool = True, partial_filename: Optional[str] = None):
+        self.files = files
+        self.complete = complete
+        self.partial_filename = partial_filename
+
+    @property
+    def filenames(self) -> List[str]:
+        return [file.filename for file in self.files]
+
+
+class MalformedResponse(ValueError):
+    """No document could be read from a response"""
+
+
+def _strip_code_fence(text: str) -> str:
+    """The JSON inside a markdown code block that wraps the whole response"""
+    # Drop the info string ("json") on the opening fence line
+    body = text[3:].split("\n", 1)[1] if "\n" in text else ""
+    body = body.rstrip()
+    # A response cut off at max_tokens has no closing fence
+    if body.endswith("```"):
+        body = body[:-3]
+    return body.strip()
+
+
+def _validate_documents(items) -> List[GeneratedDocument]:
+    """Documents that validate; malformed entries are dropped rather than failing the rest"""
+    documents = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            documents.append(GeneratedDocument.model_validate(item))
+        except ValidationError:
+            continue
+    return documents
+
+
+def salvage_files(text: str) -> ParsedFiles:
+    """
+    Recover every complete file object from a truncated `{"files": [...` response.
+    Objects are decoded one at a time, so everything before the cut survives.
+    """
+    decoder = json.JSONDecoder()
+    key = text.find('"files"')
+    start = text.find("[", key) if key != -1 else -1
+    if start == -1:
+        return ParsedFiles([], complete=False)
+    items = []
+    position = start + 1
+    while True:
+        while position < len(text) and text[position] in " \t\r\n,":
+            position += 1
+        if position >= len(text) or text[position] != "{":
+            break
+        try:
+            item, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            break
+        items.append(item)
+    # The object that was cut off usually has its filename already
+    partial = _FILENAME.search(text, position)
+    return ParsedFiles(
+        _validate_documents(items),
+        complete=False,
+        partial_filename=json.loads(f'"{partial.group(1)}"') if partial else None,
+    )
+
+
+def parse_files_response(content: str, structured: bool = False) -> ParsedFiles:
+    r"""
+    Validate a generation response. Truncated JSON is salvaged; raises
+    MalformedResponse when not a single document can be recovered.
+
+    Documents often contain code blocks, so only a response that starts with a
+    fence is unwrapped, and never one requested with `structured` output:
+
+    >>> parse_files_response('{"files": [{"filename": "a.md", "content": "use ```py\\nprint(1)\\n``` here", "file_type": "md"}]}').files[0].content
+    'use ```py\nprint(1)\n``` here'
+    >>> parse_files_response('```json\n{"files": [{"filename": "a.md", "content": "x", "file_type": "md"}]}\n```').filenames
+    ['a.md']
+    """
+    text = (content or "").strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        if not structured and text.startswith("```"):
+            text = _strip_code_fence(text)
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            salvaged = salvage_files(text)
+            if not salvaged.files:
+                raise MalformedResponse(f"Response is not valid JSON and no complete file could be recovered: {e}") from e
+            return salvaged
+    try:
+        return ParsedFiles(FilesResponse.model_validate(data).files)
+    except ValidationError:
+        documents = _validate_documents(data.get("files") if isinstance(data, dict) else None)
+        if not documents:
+            raise MalformedResponse("Response does not contain a list of files")
+        return ParsedFiles(documents)
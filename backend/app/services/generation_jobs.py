@@ -0,0 +1,159 @@
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from app.database import SessionLocal
+from app.repositories.job_repository import LEASE_SECONDS, JobRepository
+
+# Renew well before expiry so one slow commit never loses the lease
+RENEW_INTERVAL_SECONDS = LEASE_SECONDS / 3
+# How often a running job checks the database for a cancel request from another process
+CANCEL_POLL_SECONDS = float(os.getenv("GENERATION_CANCEL_POLL_SECONDS", "0.5"))
+
+
+class GenerationCancelled(Exception):
+    """Raised at a cancellation point once the job has been cancelled"""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation for one job. Work checks `raise_if_cancelled()` at
+    safe points; blocking I/O registers a callback (e.g. closing the OpenAI
+    stream) so a cancel also interrupts a read that is waiting on the network.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancellation callback failed: {e}", file=sys.stderr)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; returns True early if cancelled"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise GenerationCancelled()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run `callback` when cancelled (immediately if already cancelled); returns an unregister function"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+# Tokens of the jobs running in this process, so local cancels take effect immediately
+_tokens: Dict[str, CancellationToken] = {}
+_tokens_lock = threading.Lock()
+
+
+def cancel_local(job_id: str) -> bool:
+    """Cancel a job if it runs in this process"""
+    with _tokens_lock:
+        token = _tokens.get(job_id)
+    if token is None:
+        return False
+    token.cancel()
+    return True
+
+
+class JobLease:
+    """
+    Keeps a generation job's lease alive from a daemon thread while the job
+    runs, so other workers keep attaching to it instead of taking it over.
+    The same thread picks up cancel requests made through another process.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.token = CancellationToken()
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "JobLease":
+        # A job cancelled while it was still queued stops before doing any work
+        if self._cancel_requested():
+            raise GenerationCancelled()
+        with _tokens_lock:
+            _tokens[self.job_id] = self.token
+        self._thread = threading.Thread(target=self._run, name=f"job-lease-{self.job_id[:8]}", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+        with _tokens_lock:
+            _tokens.pop(self.job_id, None)
+
+    def _cancel_requested(self) -> bool:
+        db = SessionLocal()
+        try:
+            return JobRepository(db).is_cancel_requested(self.job_id)
+        except Exception as e:
+            # The lease thread polls again shortly
+            print(f"Failed to check generation job {self.job_id} for a cancel: {e}", file=sys.stderr)
+            return False
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        renew_at = time.monotonic() + RENEW_INTERVAL_SECONDS
+        while not self._stop.wait(CANCEL_POLL_SECONDS):
+            db = SessionLocal()
+            try:
+                repository = JobRepository(db)
+                if not self.token.cancelled and repository.is_cancel_requested(self.job_id):
+                    self.token.cancel()
+                if time.monotonic() >= renew_at:
+                    renew_at = time.monotonic() + RENEW_INTERVAL_SECONDS
+                    if not repository.renew(self.job_id):
+                        # Another worker took the project over; stop writing to it
+                        self.lost = True
+                        print(f"Lost the lease of generation job {self.job_id}", file=sys.stderr)
+                        self.token.cancel()
+                        return
+            except Exception as e:
+                # Transient DB errors: try again on the next tick, the lease has slack
+                print(f"Failed to check the lease of generation job {self.job_id}: {e}", file=sys.stderr)
+            finally:
+                db.close()
+
+
+def finish_job(job_id: str, outcome: str, error: Optional[str] = None) -> None:
+    """Record a job's outcome ("success", "error" or "cancelled") and release the project's lease"""
+    status = {"success": "succeeded", "cancelled": "cancelled"}.get(outcome, "failed")
+    db = SessionLocal()
+    try:
+        JobRepository(db).finish(job_id, status, error)
+    except Exception as e:
+        # An unreleased lease expires on its own after LEASE_SECONDS
+        print(f"Failed to release generation job {job_id}: {e}", file=sys.stderr)
+    finally:
+        db.close()
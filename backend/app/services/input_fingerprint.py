@@ -0,0 +1,42 @@
+import hashlib
+from typing import Callable, Iterable, List, Optional
+from app.models.generated_file import GeneratedFile
+from app.models.project import Project
+
+# Bump when the prompt templates change in a way that should invalidate every stored document
+INPUT_FINGERPRINT_VERSION = "1"
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Collapse whitespace so re-saving a form with stray spaces or newlines is not a change"""
+    return " ".join((value or "").split())
+
+
+def input_hash(project: Project, system_prompt: str, filename: str, model: str) -> str:
+    """
+    Fingerprint of everything a document is generated from: the project fields,
+    the (competition) system prompt, the model and the document name.
+    """
+    digest = hashlib.sha256()
+    for part in (
+        INPUT_FINGERPRINT_VERSION,
+        model,
+        filename,
+        normalize_text(project.name),
+        normalize_text(project.description),
+        normalize_text(project.idea_description),
+        normalize_text(system_prompt),
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def stale_files(files: Iterable[GeneratedFile], project: Project, system_prompt: str,
+                model_for: Callable[[str], str]) -> List[GeneratedFile]:
+    """Completed files whose stored fingerprint no longer matches the current inputs; `model_for(filename)` gives the routed model"""
+    return [
+        file for file in files
+        if file.status == "completed"
+        and file.input_hash != input_hash(project, system_prompt, file.filename, model_for(file.filename))
+    ]
@@ -0,0 +1,170 @@
+"""
+Local stand-in for the OpenAI Files and Batch endpoints.
+
+It implements the subset of the client that batch_generation uses
+(`files.create`, `files.content`, `batches.create`, `batches.retrieve`) on top of
+a directory, so the whole submit / poll / import flow runs offline. A batch
+is "in progress" until the first retrieve, which answers every request: with
+`chat_client` when one is given (non-streamed calls to the real API, or any
+compatible fake), otherwise with placeholder documents.
+"""
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+LOCAL_BATCH_DIR = os.getenv("LOCAL_BATCH_DIR", "./data/local_batches")
+
+_ONLY_FILES = re.compile(r"generate ONLY the (?:following files|file): ([^\n]+?)\.?\s*(?:Return|\n|$)")
+_EXCEPT_FILES = re.compile(r"except ([^\n]+?) \(those are generated separately\)")
+_PROMPT_FILES = re.compile(r"\(([\w-]+\.(?:md|txt|csv|json))\)")
+
+
+class LocalFile:
+    def __init__(self, id: str, text: str = ""):
+        self.id = id
+        self.text = text
+
+
+class RequestCounts:
+    def __init__(self, total: int = 0, completed: int = 0, failed: int = 0):
+        self.total = total
+        self.completed = completed
+        self.failed = failed
+
+
+class LocalBatch:
+    def __init__(self, data: dict):
+        self.id = data["id"]
+        self.status = data["status"]
+        self.input_file_id = data["input_file_id"]
+        self.output_file_id = data.get("output_file_id")
+        self.error_file_id = data.get("error_file_id")
+        self.request_counts = RequestCounts(**data.get("request_counts", {}))
+
+
+def _split_names(text: str) -> List[str]:
+    return [name.strip() for name in text.split(",") if name.strip()]
+
+
+def placeholder_documents(body: dict) -> List[dict]:
+    """Documents the request asks for, with placeholder markdown"""
+    messages = {message["role"]: message["content"] for message in body.get("messages", [])}
+    user_prompt = messages.get("user", "")
+    only = _ONLY_FILES.search(user_prompt)
+    if only:
+        names = _split_names(only.group(1))
+    else:
+        excluded = _EXCEPT_FILES.search(user_prompt)
+        skip = set(_split_names(excluded.group(1))) if excluded else set()
+        names = [name for name in dict.fromkeys(_PROMPT_FILES.findall(messages.get("system", ""))) if name not in skip]
+    return [
+        {
+            "filename": name,
+            "content": f"# {name.rsplit('.', 1)[0].replace('_', ' ').title()}\n\nPlaceholder generated by the local batch stand-in.\n",
+            "file_type": name.rsplit(".", 1)[-1] if "." in name else "txt",
+        }
+        for name in names
+    ]
+
+
+class _Files:
+    def __init__(self, client: "LocalBatchClient"):
+        self._client = client
+
+    def create(self, file, purpose: str = "batch") -> LocalFile:
+        name, content = file if isinstance(file, tuple) else ("batch.jsonl", file)
+        file_id = f"file-local-{uuid.uuid4().hex[:24]}"
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        (self._client.directory / file_id).write_bytes(data)
+        return LocalFile(file_id)
+
+    def content(self, file_id: str) -> LocalFile:
+        path = self._client.directory / file_id
+        if not path.exists():
+            raise FileNotFoundError(f"No local batch file {file_id}")
+        return LocalFile(file_id, path.read_text(encoding="utf-8"))
+
+
+class _Batches:
+    def __init__(self, client: "LocalBatchClient"):
+        self._client = client
+
+    def create(self, input_file_id: str, endpoint: str, completion_window: str, metadata: Optional[dict] = None) -> LocalBatch:
+        batch_id = f"batch-local-{uuid.uuid4().hex[:24]}"
+        data = {"id": batch_id, "status": "in_progress", "input_file_id": input_file_id, "endpoint": endpoint}
+        self._client._write(batch_id, data)
+        return LocalBatch(data)
+
+    def retrieve(self, batch_id: str) -> LocalBatch:
+        data = self._client._read(batch_id)
+        if data["status"] == "in_progress":
+            data = self._client._run(data)
+        return LocalBatch(data)
+
+
+class LocalBatchClient:
+    """Drop-in for the `files` and `batches` parts of the OpenAI client"""
+
+    def __init__(self, directory: Optional[str] = None, chat_client=None):
+        self.directory = Path(directory or LOCAL_BATCH_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chat_client = chat_client
+        self.files = _Files(self)
+        self.batches = _Batches(self)
+
+    def _write(self, batch_id: str, data: dict) -> None:
+        (self.directory / f"{batch_id}.json").write_text(json.dumps(data), encoding="utf-8")
+
+    def _read(self, batch_id: str) -> dict:
+        path = self.directory / f"{batch_id}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"No local batch {batch_id}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _answer(self, body: dict) -> dict:
+        """A chat.completion response body for one request"""
+        if self.chat_client is not None:
+            response = self.chat_client.chat.completions.create(**body)
+            content = response.choices[0].message.content
+            usage = response.usage
+            prompt_tokens, completion_tokens = (usage.prompt_tokens, usage.completion_tokens) if usage else (0, 0)
+        else:
+            content = json.dumps({"files": placeholder_documents(body)})
+            prompt_tokens = sum(len(message["content"]) for message in body.get("messages", [])) // 4
+            completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-local-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _run(self, data: dict) -> dict:
+        outputs, errors = [], []
+        for line in self.files.content(data["input_file_id"]).text.splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            try:
+                result = {"status_code": 200, "request_id": uuid.uuid4().hex, "body": self._answer(request["body"])}
+                outputs.append({"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": request["custom_id"],
+                                "response": result, "error": None})
+            except Exception as e:
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex[:24]}", "custom_id": request["custom_id"],
+                               "response": None, "error": {"code": type(e).__name__, "message": str(e)}})
+        data["output_file_id"] = self.files.create(("output.jsonl", "\n".join(json.dumps(o) for o in outputs))).id if outputs else None
+        data["error_file_id"] = self.files.create(("errors.jsonl", "\n".join(json.dumps(e) for e in errors))).id if errors else None
+        data["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        data["status"] = "completed"
+        self._write(data["id"], data)
+        return data
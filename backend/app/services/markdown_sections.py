@@ -0,0 +1,129 @@
+import re
+from typing import List, Optional
+
+_HEADING = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+_FENCE = re.compile(r"^[ \t]{0,3}(```|~~~)")
+
+# Characters of a section's text kept in the outline sent as context
+OUTLINE_EXCERPT_CHARS = 160
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+class Section:
+    """
+    A heading and everything below it up to the next heading of the same or a
+    higher level. `start`/`end` are character offsets into the document, so a
+    section's text includes its subsections.
+    """
+
+    def __init__(self, level: int, title: str, start: int, body_start: int, path: List[str]):
+        self.level = level
+        self.title = title
+        self.start = start
+        self.body_start = body_start
+        self.end = start
+        self.path = path
+        self.children: List["Section"] = []
+
+    @property
+    def slug(self) -> str:
+        return "/".join(slugify(title) for title in self.path)
+
+    def text(self, document: str) -> str:
+        return document[self.start:self.end]
+
+    def to_dict(self) -> dict:
+        return {
+            "slug": self.slug,
+            "title": self.title,
+            "level": self.level,
+            "path": self.path,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+def parse_sections(document: str) -> List[Section]:
+    """
+    Parse ATX (`#`) headings into a tree and return the top-level sections.
+    Headings inside fenced code blocks are ignored; text before the first
+    heading belongs to no section.
+    """
+    roots: List[Section] = []
+    stack: List[Section] = []
+    in_fence = False
+    offset = 0
+    for line in document.splitlines(keepends=True):
+        line_start = offset
+        offset += len(line)
+        if _FENCE.match(line):
+            in_fence = not in_fence
+            continue
+        match = None if in_fence else _HEADING.match(line.rstrip("\r\n"))
+        if not match:
+            continue
+        level = len(match.group(1))
+        while stack and stack[-1].level >= level:
+            stack.pop().end = line_start
+        title = match.group(2).strip()
+        section = Section(level, title, line_start, offset, [s.title for s in stack] + [title])
+        (stack[-1].children if stack else roots).append(section)
+        stack.append(section)
+    for section in stack:
+        section.end = len(document)
+    return roots
+
+
+def iter_sections(sections: List[Section]):
+    for section in sections:
+        yield section
+        yield from iter_sections(section.children)
+
+
+def find_section(sections: List[Section], key: str) -> Optional[Section]:
+    """
+    Look a section up by slug path ("business-plan/market-analysis") or, if
+    unambiguous, by its own title ("Market Analysis", case-insensitive).
+    """
+    wanted = key.strip()
+    all_sections = list(iter_sections(sections))
+    for section in all_sections:
+        if section.slug == wanted:
+            return section
+    by_title = [s for s in all_sections if slugify(s.title) == slugify(wanted)]
+    return by_title[0] if len(by_title) == 1 else None
+
+
+def outline(document: str, sections: List[Section], target: Optional[Section] = None) -> str:
+    """
+    Compact summary of the document: every heading with the start of its own
+    text, so the model sees the structure and tone without the full body.
+    """
+    lines = []
+    for section in iter_sections(sections):
+        own_end = section.children[0].start if section.children else section.end
+        excerpt = " ".join(document[section.body_start:own_end].split())
+        if len(excerpt) > OUTLINE_EXCERPT_CHARS:
+            excerpt = excerpt[:OUTLINE_EXCERPT_CHARS].rsplit(" ", 1)[0] + "..."
+        marker = "  <-- section to rewrite" if section is target else ""
+        line = f"{'  ' * (section.level - 1)}- {section.title}{marker}"
+        lines.append(f"{line}: {excerpt}" if excerpt and section is not target else line)
+    return "\n".join(lines)
+
+
+def splice(document: str, section: Section, replacement: str) -> str:
+    """Replace a section (heading included) with `replacement`, keeping the surrounding text intact"""
+    replacement = replacement.strip("\n")
+    first_line, _, rest = replacement.partition("\n")
+    match = _HEADING.match(first_line)
+    if match:
+        # Keep the heading at its original depth so the tree does not shift
+        replacement = f"{'#' * section.level} {match.group(2).strip()}\n{rest}".rstrip("\n")
+    else:
+        # The model returned only the body - keep the original heading line
+        replacement = document[section.start:section.body_start].rstrip("\n") + "\n\n" + replacement
+    following = document[section.end:]
+    separator = "\n\n" if following else "\n"
+    return document[:section.start] + replacement + separator + following
@@ -0,0 +1,221 @@
+"""
+Which model, output budget and temperature each document is generated with.
+
+A routing table maps document filenames to settings, with "*" for everything
+else:
+
+    {
+        "*": {"model": "gpt-4o-mini", "temperature": 0.7},
+        "executive_summary.txt": {"max_tokens": 1500, "temperature": 0.5},
+        "business_plan.md": {"model": "gpt-4o", "fallback_model": "gpt-4o-mini",
+                             "latency_budget_seconds": 20}
+    }
+
+The MODEL_ROUTING environment variable (JSON) sets the site-wide table and a
+competition's `model_routing` column overrides it, key by key. A route with a
+`fallback_model` switches to it while the recent p95 time to first token of its
+primary model exceeds `latency_budget_seconds`. Samples expire after
+LATENCY_WINDOW_SECONDS, so the primary is tried again once the window empties.
+"""
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from app.models.competition import Competition
+from app.services.resilient_completion import first_token_latency
+
+DEFAULT_ROUTE = {
+    "model": "gpt-4o-mini",
+    "temperature": 0.7,
+    "max_tokens": None,
+    "fallback_model": None,
+    "latency_budget_seconds": None,
+    # Constrain the response to the files schema; turn off for models without structured outputs
+    "structured_output": True,
+}
+ROUTE_SETTINGS = set(DEFAULT_ROUTE)
+DEFAULT_ROUTE_KEY = "*"
+
+# Only this recent history decides a fallback, and only with enough of it
+LATENCY_WINDOW_SECONDS = float(os.getenv("MODEL_ROUTING_LATENCY_WINDOW_SECONDS", "600"))
+LATENCY_MIN_SAMPLES = 5
+LATENCY_PERCENTILE = 0.95
+
+
+class Route:
+    """Settings for one document; `key` names the table entry that matched, for accounting"""
+
+    def __init__(self, key: str, model: str, temperature: float, max_tokens: Optional[int] = None,
+                 fallback_model: Optional[str] = None, latency_budget_seconds: Optional[float] = None,
+                 structured_output: bool = True):
+        self.key = key
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.fallback_model = fallback_model
+        self.latency_budget_seconds = latency_budget_seconds
+        self.structured_output = structured_output
+
+    def settings(self) -> Tuple:
+        """Routes with equal settings can share one completion"""
+        return (self.model, self.temperature, self.max_tokens, self.fallback_model, self.latency_budget_seconds,
+                self.structured_output)
+
+
+class RoutingDecision:
+    """The model a completion actually uses; `fallback_from` is set when the primary was too slow"""
+
+    def __init__(self, route: Route, model: str, fallback_from: Optional[str] = None):
+        self.route = route
+        self.model = model
+        self.fallback_from = fallback_from
+
+
+def validate_routing_table(table: Any) -> Dict[str, Dict[str, Any]]:
+    """Check a routing table's shape; raises ValueError describing the first problem"""
+    if not isinstance(table, dict):
+        raise ValueError("The routing table must be an object of filename -> settings")
+    for key, settings in table.items():
+        if not isinstance(settings, dict):
+            raise ValueError(f"Settings of '{key}' must be an object")
+        unknown = set(settings) - ROUTE_SETTINGS
+        if unknown:
+            raise ValueError(f"Unknown settings for '{key}': {', '.join(sorted(unknown))}")
+        for name in ("model", "fallback_model"):
+            if settings.get(name) is not None and not isinstance(settings[name], str):
+                raise ValueError(f"'{key}'.{name} must be a string")
+        for name in ("temperature", "latency_budget_seconds"):
+            value = settings.get(name)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+                raise ValueError(f"'{key}'.{name} must be a non-negative number")
+        value = settings.get("max_tokens")
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+            raise ValueError(f"'{key}'.max_tokens must be a positive integer")
+        if not isinstance(settings.get("structured_output", True), bool):
+            raise ValueError(f"'{key}'.structured_output must be true or false")
+    return table
+
+
+def _site_table() -> Dict[str, Dict[str, Any]]:
+    raw = os.getenv("MODEL_ROUTING")
+    if not raw:
+        return {}
+    try:
+        return validate_routing_table(json.loads(raw))
+    except ValueError as e:
+        print(f"Ignoring invalid MODEL_ROUTING: {e}", file=sys.stderr)
+        return {}
+
+
+SITE_ROUTING = _site_table()
+
+
+def routing_tables(competition: Optional[Competition]) -> List[Dict[str, Dict[str, Any]]]:
+    """Tables in increasing precedence: site-wide, then the competition's"""
+    tables = [SITE_ROUTING]
+    if competition is not None and competition.model_routing:
+        try:
+            tables.append(validate_routing_table(competition.model_routing))
+        except ValueError as e:
+            print(f"Ignoring invalid model routing of competition {competition.id}: {e}", file=sys.stderr)
+    return tables
+
+
+def route_for(competition: Optional[Competition], filename: Optional[str] = None) -> Route:
+    """Settings for `filename` (or for documents without their own entry when None)"""
+    settings = dict(DEFAULT_ROUTE)
+    key = DEFAULT_ROUTE_KEY
+    tables = routing_tables(competition)
+    for table in tables:
+        settings.update(table.get(DEFAULT_ROUTE_KEY, {}))
+    if filename is not None:
+        for table in tables:
+            if filename in table:
+                settings.update(table[filename])
+                key = filename
+    return Route(key, **settings)
+
+
+def routed_filenames(competition: Optional[Competition]) -> List[str]:
+    """Documents with their own table entry; generating "everything" requests them separately"""
+    names = []
+    for table in routing_tables(competition):
+        names.extend(name for name in table if name != DEFAULT_ROUTE_KEY and name not in names)
+    return names
+
+
+def group_by_route(competition: Optional[Competition], filenames: List[str]) -> List[Tuple[Route, List[str]]]:
+    """Split documents into groups that can be generated by one completion"""
+    groups: Dict[Tuple, Tuple[Route, List[str]]] = {}
+    for filename in filenames:
+        route = route_for(competition, filename)
+        groups.setdefault(route.settings(), (route, []))[1].append(filename)
+    return list(groups.values())
+
+
+class PlannedCompletion:
+    """One completion of a generation run: the documents in `names`, or everything except `excluded`"""
+
+    def __init__(self, route: Route, names: Optional[List[str]] = None, excluded: Optional[List[str]] = None):
+        self.route = route
+        self.names = names or []
+        self.excluded = excluded or []
+
+    @property
+    def max_tokens(self) -> Optional[int]:
+        # max_tokens is a per-document budget; "*" bounds the whole open-ended completion
+        if self.route.max_tokens and self.names:
+            return self.route.max_tokens * len(self.names)
+        return self.route.max_tokens
+
+    def accepts(self, filename: Optional[str]) -> bool:
+        if self.names:
+            return filename in self.names
+        return filename not in self.excluded
+
+    def remainder(self, generated: List[str]) -> Optional["PlannedCompletion"]:
+        """The completion for what a cut-off response did not reach; None when nothing is left"""
+        if not generated:
+            return None
+        if self.names:
+            names = [name for name in self.names if name not in generated]
+            return PlannedCompletion(self.route, names) if names else None
+        return PlannedCompletion(self.route, excluded=self.excluded + [name for name in generated if name not in self.excluded])
+
+
+def mentions_filename(text: str, filename: str) -> bool:
+    """Whether `text` names the file on its own (plan.md is not named by "business_plan.md")"""
+    # A sentence may end right after a filename, but "plan.md.bak" is another file
+    return re.search(rf"(?<![\w.-]){re.escape(filename)}(?![\w-]|\.\w)", text) is not None
+
+
+def plan_completions(competition: Optional[Competition], system_prompt: str,
+                     targets: Optional[List[str]] = None) -> List[PlannedCompletion]:
+    """
+    The completions that generate `targets` (or every document the prompt asks
+    for): one per distinct route. Without targets the open-ended "*" completion
+    skips the documents that have their own route; those are only split out
+    when the system prompt names them, as other competitions may not want them.
+    """
+    if targets:
+        return [PlannedCompletion(route, names) for route, names in group_by_route(competition, targets)]
+    default_route = route_for(competition)
+    separate = [
+        name for name in routed_filenames(competition)
+        if mentions_filename(system_prompt, name) and route_for(competition, name).settings() != default_route.settings()
+    ]
+    planned = [PlannedCompletion(default_route, excluded=separate)]
+    planned += [PlannedCompletion(route, names) for route, names in group_by_route(competition, separate)]
+    return planned
+
+
+def decide(route: Route) -> RoutingDecision:
+    """Use the primary model unless a fallback is configured and the primary is currently too slow"""
+    if route.fallback_model and route.latency_budget_seconds is not None:
+        p95 = first_token_latency.percentile(
+            route.model, LATENCY_PERCENTILE, LATENCY_MIN_SAMPLES, max_age=LATENCY_WINDOW_SECONDS,
+        )
+        if p95 is not None and p95 > route.latency_budget_seconds:
+            return RoutingDecision(route, route.fallback_model, fallback_from=route.model)
+    return RoutingDecision(route, route.model)
@@ -0,0 +1,96 @@
+"""
+The process-wide OpenAI client.
+
+Every generation task, batch submission and CLI run shares one client, so they
+share its httpx connection pool: TLS connections to the API are kept alive and
+reused instead of being set up again by each background task. The pool is
+bounded and the client has explicit timeouts (resilient_completion still
+passes tighter per-attempt ones).
+
+The `openai` package (and its httpx stack) takes most of a second to import, so
+it is only imported the first time a generation actually needs a client. Web-only
+processes that never generate never pay for it.
+
+A forked worker must not use the connections of its parent: the client is
+dropped in the child right after a fork (and whenever the process id no longer
+matches), so the child builds its own on first use.
+"""
+import os
+import sys
+import threading
+from app.services.resilient_completion import CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS
+
+# Hedged requests use a second connection, so leave room above the worker count
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "16"))
+KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30"))
+# Waiting for a free connection of the pool
+POOL_TIMEOUT_SECONDS = float(os.getenv("OPENAI_POOL_TIMEOUT_SECONDS", "30"))
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def create_openai_client():
+    """
+    Return a new OpenAI client with its own connection pool, or None when
+    OPENAI_API_KEY is not set. Use get_openai_client() to share the pool.
+
+    The SDK's built-in retries are off: resilient_completion retries with its
+    own backoff and deadline, and counts every attempt.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI
+    timeout = httpx.Timeout(READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS, pool=POOL_TIMEOUT_SECONDS)
+    http_client = DefaultHttpxClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+    return OpenAI(api_key=api_key, max_retries=0, timeout=timeout, http_client=http_client)
+
+
+def get_openai_client():
+    """The shared client of this process, built on first use; None when OPENAI_API_KEY is not set"""
+    global _client, _client_pid
+    pid = os.getpid()
+    client = _client
+    if client is not None and _client_pid == pid:
+        return client
+    with _lock:
+        if _client is None or _client_pid != pid:
+            _client = create_openai_client()
+            _client_pid = pid
+        return _client
+
+
+def close_openai_client() -> None:
+    """Close the shared client's connections (application shutdown); the next use builds a new one"""
+    global _client, _client_pid
+    with _lock:
+        client, _client, _client_pid = _client, None, None
+    if client is not None:
+        try:
+            client.close()
+        except Exception as e:
+            print(f"Failed to close the OpenAI client: {e}", file=sys.stderr)
+
+
+def _reset_after_fork() -> None:
+    """In a forked child: forget the parent's client without closing its sockets"""
+    global _client, _client_pid, _lock
+    _client = None
+    _client_pid = None
+    # The parent may have held the lock while forking
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
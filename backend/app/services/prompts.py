@@ -0,0 +1,101 @@
+from typing import List, Optional
+from app.models.competition import Competition
+from app.models.project import Project
+
+# Used when a project has no competition or its competition has no custom prompt
+DEFAULT_FILE_GENERATION_PROMPT = """You are an expert business consultant helping entrepreneurs prepare competition materials.
+
+Generate comprehensive, professional documents for an entrepreneurship competition. These are the ESSENTIAL files needed for most startup competitions. Based on the project idea provided, create the following files:
+
+1. **Pitch Deck** (pitch_deck.md) - A complete pitch deck outline (10-12 slides) including:
+   - Problem Statement (What problem are you solving?)
+   - Solution (Your product/service)
+   - Market Opportunity (Market size, TAM/SAM/SOM)
+   - Business Model (How you make money)
+   - Traction/Milestones (What you've achieved)
+   - Team (Key team members and their expertise)
+   - Financials (Revenue projections, key metrics)
+   - Ask/Next Steps (What you need, funding ask)
+
+2. **Business Plan** (business_plan.md) - A comprehensive business plan including:
+   - Executive Summary
+   - Company Description & Vision
+   - Market Analysis (Industry, competitors, target market)
+   - Organization & Management (Team structure, advisors)
+   - Product/Service Line (Detailed description)
+   - Marketing & Sales Strategy
+   - Financial Projections (3-5 years)
+   - Funding Request & Use of Funds
+
+3. **Executive Summary** (executive_summary.txt) - A concise 1-2 page summary that can be used for:
+   - Quick overview for judges
+   - Email introductions
+   - Application forms
+   - Investor outreach
+
+4. **Financial Plan** (financial_plan.md) - Detailed financial projections including:
+   - Revenue Model (How you generate revenue)
+   - Cost Structure (Fixed and variable costs)
+   - 3-Year Financial Projections (Income statement, cash flow)
+   - Break-even Analysis
+   - Funding Requirements & Use of Funds
+   - Key Financial Assumptions
+
+These 4 files cover the core requirements for most entrepreneurship competitions. Make all documents professional, well-structured, data-driven, and tailored to the specific project idea provided. Use realistic numbers and clear explanations."""
+
+
+def system_prompt_for(competition: Optional[Competition]) -> str:
+    """The system prompt a project's documents are generated with"""
+    if competition and competition.file_generation_prompt:
+        return competition.file_generation_prompt
+    return DEFAULT_FILE_GENERATION_PROMPT
+
+
+def generation_user_prompt(project: Project, names: Optional[List[str]] = None,
+                           excluded: Optional[List[str]] = None) -> str:
+    """User message asking for a project's documents: `names` only, or everything except `excluded`"""
+    if names:
+        request_line = f"Please generate ONLY the following files: {', '.join(names)}."
+    elif excluded:
+        request_line = (f"Please generate the required files for this competition, except "
+                        f"{', '.join(excluded)} (those are generated separately).")
+    else:
+        request_line = "Please generate the required files for this competition."
+    return f"""
+Project Name: {project.name}
+Project Description: {project.description or 'N/A'}
+Idea Description: {project.idea_description}
+
+{request_line} Return a JSON object with the following structure:
+{{
+    "files": [
+        {{
+            "filename": "filename.ext",
+            "content": "file content here",
+            "file_type": "txt"
+        }}
+    ]
+}}
+"""
+
+
+def single_file_user_prompt(project: Project, filename: str) -> str:
+    """User message asking for one document of a project"""
+    return f"""
+Project Name: {project.name}
+Project Description: {project.description or 'N/A'}
+Idea Description: {project.idea_description}
+
+Please generate ONLY the file: {filename}
+
+Return a JSON object with the following structure:
+{{
+    "files": [
+        {{
+            "filename": "{filename}",
+            "content": "file content here",
+            "file_type": "{filename.split('.')[-1] if '.' in filename else 'txt'}"
+        }}
+    ]
+}}
+"""
@@ -0,0 +1,323 @@
+"""
+Deadlines, retries and hedging for streamed chat completions.
+
+Every completion gets one deadline covering all of its attempts. Transient
+failures (timeouts, dropped connections, 429 and 5xx responses) are retried
+with exponential backoff and full jitter until the deadline. With
+OPENAI_HEDGE_REQUESTS enabled, an attempt that has not produced its first token
+within the recent p95 time to first token gets a duplicate request; whichever
+streams first is used and the other one is closed.
+
+The OpenAI SDK's own retries are disabled (see openai_client), so every retry
+is made here and counted in openai_usage.retry_count.
+"""
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from app.metrics import OPENAI_HEDGED_COMPLETIONS, OPENAI_RETRIES
+from app.services.generation_jobs import CancellationToken, GenerationCancelled
+
+# Whole-call budget, retries included; callers may pass their own
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("OPENAI_DEADLINE_SECONDS", "300"))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "10"))
+# Longest silence tolerated between two streamed chunks
+READ_TIMEOUT_SECONDS = float(os.getenv("OPENAI_READ_TIMEOUT_SECONDS", "60"))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+BACKOFF_BASE_SECONDS = float(os.getenv("OPENAI_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("OPENAI_BACKOFF_MAX_SECONDS", "20"))
+
+HEDGE_REQUESTS = os.getenv("OPENAI_HEDGE_REQUESTS", "").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = 0.95
+# Never hedge before this many samples, nor sooner than this after the request
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY_SECONDS = 1.0
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CompletionDeadlineExceeded(Exception):
+    """The completion did not finish within its deadline"""
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies per model, for percentile estimates"""
+
+    def __init__(self, window: int = 200):
+        self._window = window
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self._window)
+            samples.append((time.monotonic(), seconds))
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return len(self._samples.get(model, ()))
+
+    def percentile(self, model: str, q: float, min_samples: int = 1,
+                   max_age: Optional[float] = None) -> Optional[float]:
+        """
+        The q-quantile (0..1) of the window, optionally of samples younger than
+        `max_age` seconds only, or None with fewer than `min_samples` samples
+        """
+        oldest = time.monotonic() - max_age if max_age is not None else None
+        with self._lock:
+            samples = sorted(
+                seconds for recorded_at, seconds in self._samples.get(model, ())
+                if oldest is None or recorded_at >= oldest
+            )
+        if len(samples) < max(min_samples, 1):
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+# Per-process windows; every worker learns its own view of the API's latency
+first_token_latency = LatencyTracker()
+completion_latency = LatencyTracker()
+
+
+class StreamedCompletion:
+    """The outcome of a completion: text (or the model's refusal), final usage chunk and timings"""
+
+    def __init__(self, content: str, usage: Any, time_to_first_token: Optional[float],
+                 attempts: int, hedged: bool, refusal: str = ""):
+        self.content = content
+        self.refusal = refusal
+        self.usage = usage
+        self.time_to_first_token = time_to_first_token
+        self.attempts = attempts
+        self.hedged = hedged
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection failures, rate limits and server errors are worth another attempt"""
+    import httpx
+    import openai
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The server's Retry-After hint, if the error carries one"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(retry: int, retry_after: Optional[float] = None) -> float:
+    """Full jitter: uniform in [0, base * 2^retry], capped; at least what the server asked for"""
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** retry))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX_SECONDS))
+    return delay
+
+
+def _has_content(chunk) -> bool:
+    return bool(chunk.choices and chunk.choices[0].delta.content)
+
+
+class _Attempt:
+    """
+    One streamed request, opened and read up to its first content token. Runs
+    on a worker thread when hedging so the caller can wait on several at once.
+    """
+
+    def __init__(self, client, request: Dict[str, Any], timeout, finished: threading.Event):
+        self.client = client
+        self.request = request
+        self.timeout = timeout
+        self.finished = finished
+        self.started = time.monotonic()
+        self.stream = None
+        self.chunks: Optional[Iterator] = None
+        self.buffered: List[Any] = []
+        self.first_token_at: Optional[float] = None
+        self.error: Optional[Exception] = None
+        self.done = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def run(self) -> None:
+        try:
+            stream = self.client.chat.completions.create(**self.request, timeout=self.timeout)
+            with self._lock:
+                self.stream = stream
+                closed = self._closed
+            if closed:
+                stream.close()
+                return
+            self.chunks = iter(stream)
+            for chunk in self.chunks:
+                self.buffered.append(chunk)
+                if _has_content(chunk):
+                    self.first_token_at = time.monotonic()
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.finished.set()
+
+    def close(self) -> None:
+        """Abort the request, including one still connecting"""
+        with self._lock:
+            self._closed = True
+            stream = self.stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception as e:
+                print(f"Failed to close OpenAI stream: {e}", file=sys.stderr)
+
+    def remaining_chunks(self) -> Iterator:
+        return itertools.chain(self.buffered, self.chunks if self.chunks is not None else ())
+
+
+def _hedge_delay(model: str) -> Optional[float]:
+    if not HEDGE_REQUESTS:
+        return None
+    p95 = first_token_latency.percentile(model, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+    return max(p95, HEDGE_MIN_DELAY_SECONDS) if p95 is not None else None
+
+
+def _open(client, request: Dict[str, Any], timeout, token: CancellationToken):
+    """
+    Start a request and wait for its first token, hedging with a duplicate
+    request when the first token is late. Returns (winning attempt, hedged).
+    """
+    finished = threading.Event()
+    attempts = [_Attempt(client, request, timeout, finished)]
+    hedge_delay = _hedge_delay(request["model"])
+
+    def cancel() -> None:
+        # Closing the streams interrupts a first token that is slow to arrive
+        for attempt in list(attempts):
+            attempt.close()
+        finished.set()
+
+    unregister = token.on_cancel(cancel)
+    try:
+        if hedge_delay is None:
+            attempts[0].run()
+        else:
+            threading.Thread(target=attempts[0].run, name="openai-attempt", daemon=True).start()
+            if not finished.wait(hedge_delay) and not token.cancelled:
+                print(f"No first token from {request['model']} after {hedge_delay:.1f}s, hedging", file=sys.stderr)
+                attempts.append(_Attempt(client, request, timeout, finished))
+                threading.Thread(target=attempts[1].run, name="openai-hedge", daemon=True).start()
+                OPENAI_HEDGED_COMPLETIONS.labels(model=request["model"]).inc()
+            while not token.cancelled:
+                finished.wait()
+                finished.clear()
+                if any(a.done and a.error is None for a in attempts) or all(a.done for a in attempts):
+                    break
+    finally:
+        unregister()
+
+    if token.cancelled:
+        for attempt in attempts:
+            attempt.close()
+        raise GenerationCancelled()
+    winner = next((a for a in attempts if a.done and a.error is None), attempts[0])
+    for attempt in attempts:
+        if attempt is not winner:
+            attempt.close()
+    if winner.error is not None:
+        raise winner.error
+    return winner, len(attempts) > 1
+
+
+def stream_completion(client, request: Dict[str, Any], token: CancellationToken,
+                      deadline: Optional[float] = None,
+                      on_retry: Optional[Callable[[Exception, float], None]] = None) -> StreamedCompletion:
+    """
+    Run a streamed chat completion with retries, optional hedging and a
+    deadline of `deadline` seconds (DEFAULT_DEADLINE_SECONDS) for the whole call.
+    `on_retry(error, delay)` is called before each backoff.
+    """
+    import httpx
+    model = request["model"]
+    started = time.monotonic()
+    deadline_at = started + (deadline if deadline is not None else DEFAULT_DEADLINE_SECONDS)
+    hedged = False
+    for attempt_number in itertools.count(1):
+        token.raise_if_cancelled()
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise CompletionDeadlineExceeded(f"No completion from {model} within the deadline")
+        timeout = httpx.Timeout(
+            min(READ_TIMEOUT_SECONDS, remaining),
+            connect=min(CONNECT_TIMEOUT_SECONDS, remaining),
+        )
+        expired = threading.Event()
+        attempt = None
+        try:
+            attempt, attempt_hedged = _open(client, request, timeout, token)
+            hedged = hedged or attempt_hedged
+            # Enforce the deadline on a stream that keeps trickling chunks
+            timer = threading.Timer(max(deadline_at - time.monotonic(), 0), lambda: (expired.set(), attempt.close()))
+            timer.daemon = True
+            timer.start()
+            unregister = token.on_cancel(attempt.close)
+            try:
+                usage = None
+                parts = []
+                refusal = []
+                for chunk in attempt.remaining_chunks():
+                    token.raise_if_cancelled()
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if _has_content(chunk):
+                        parts.append(chunk.choices[0].delta.content)
+                    elif chunk.choices and getattr(chunk.choices[0].delta, "refusal", None):
+                        refusal.append(chunk.choices[0].delta.refusal)
+            finally:
+                timer.cancel()
+                unregister()
+            token.raise_if_cancelled()
+            if expired.is_set():
+                raise CompletionDeadlineExceeded(f"No completion from {model} within the deadline")
+        except (GenerationCancelled, CompletionDeadlineExceeded):
+            raise
+        except Exception as e:
+            if token.cancelled:
+                raise GenerationCancelled() from e
+            if expired.is_set():
+                raise CompletionDeadlineExceeded(f"No completion from {model} within the deadline") from e
+            delay = backoff_delay(attempt_number - 1, retry_after_seconds(e))
+            if not is_retryable(e) or attempt_number > MAX_RETRIES or time.monotonic() + delay >= deadline_at:
+                raise
+            OPENAI_RETRIES.labels(model=model).inc()
+            if on_retry is not None:
+                on_retry(e, delay)
+            if token.wait(delay):
+                raise GenerationCancelled() from e
+            continue
+
+        finished = time.monotonic()
+        if attempt.first_token_at is not None:
+            first_token_latency.record(model, attempt.first_token_at - attempt.started)
+        completion_latency.record(model, finished - attempt.started)
+        return StreamedCompletion(
+            content="".join(parts),
+            usage=usage,
+            time_to_first_token=attempt.first_token_at - started if attempt.first_token_at is not None else None,
+            attempts=attempt_number,
+            hedged=hedged,
+            refusal="".join(refusal),
+        )
@@ -0,0 +1,254 @@
+"""
+Near-duplicate ideas within a competition.
+
+Teams often enter nearly the same idea in the same competition. Every project's
+idea has a MinHash signature in idea_signatures (see app.idea_minhash), written
+when the project is created or its idea changes. Each process keeps an LSH
+index of those signatures per competition in memory: a lookup hashes 16 bands
+into buckets and compares the few candidates it finds, which takes microseconds
+even for competitions with hundreds of thousands of projects. The index catches
+up with the other processes' writes by reading the signature rows it has not
+seen, at most every SIMILAR_IDEAS_SYNC_SECONDS.
+
+Matches are used two ways:
+- as a starting draft: a user can copy the documents of one of their own
+  similar projects (copies are marked stale, so regenerating stale documents
+  tailors them to the new idea);
+- with SIMILAR_IDEAS_FEW_SHOT=1, the documents of the closest match are sent
+  as an example when generating all documents. Only the user's own projects are
+  used unless SIMILAR_IDEAS_ACROSS_USERS=1 allows other teams' projects.
+
+Deleted projects may linger in other processes' indexes until they restart;
+callers load the matched projects, which drops them.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+from sqlalchemy.orm import Session
+from app.idea_minhash import band_keys, signature, similarity
+from app.models.generated_file import GeneratedFile
+from app.models.project import Project
+from app.repositories.file_repository import FileRepository
+from app.repositories.idea_signature_repository import IdeaSignatureRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.model_routing import PlannedCompletion
+from app.services.prompts import generation_user_prompt
+
+THRESHOLD = float(os.getenv("SIMILAR_IDEAS_THRESHOLD", "0.6"))
+SYNC_SECONDS = float(os.getenv("SIMILAR_IDEAS_SYNC_SECONDS", "5"))
+FEW_SHOT = os.getenv("SIMILAR_IDEAS_FEW_SHOT", "").lower() in ("1", "true", "yes")
+ACROSS_USERS = os.getenv("SIMILAR_IDEAS_ACROSS_USERS", "").lower() in ("1", "true", "yes")
+# Characters of each example document sent with a few-shot prompt
+EXAMPLE_CHARS = int(os.getenv("SIMILAR_IDEAS_EXAMPLE_CHARS", "4000"))
+
+
+@dataclass
+class SimilarIdea:
+    project_id: int
+    similarity: float
+
+
+class CompetitionIndex:
+    """LSH buckets over the signatures of one competition's projects"""
+
+    def __init__(self):
+        self.signatures: Dict[int, bytes] = {}
+        self.owners: Dict[int, int] = {}
+        # Most buckets hold a single project; a bare id saves a list per bucket
+        self.buckets: Dict[int, Union[int, List[int]]] = {}
+        self.last_id = 0
+        self.synced_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def add(self, project_id: int, user_id: int, value: bytes) -> None:
+        if project_id in self.signatures:
+            self.remove(project_id)
+        self.signatures[project_id] = value
+        self.owners[project_id] = user_id
+        for key in band_keys(value):
+            entry = self.buckets.get(key)
+            if entry is None:
+                self.buckets[key] = project_id
+            elif isinstance(entry, list):
+                entry.append(project_id)
+            else:
+                self.buckets[key] = [entry, project_id]
+
+    def remove(self, project_id: int) -> None:
+        value = self.signatures.pop(project_id, None)
+        self.owners.pop(project_id, None)
+        if value is None:
+            return
+        for key in band_keys(value):
+            entry = self.buckets.get(key)
+            if isinstance(entry, list):
+                entry.remove(project_id)
+                if len(entry) == 1:
+                    self.buckets[key] = entry[0]
+            elif entry == project_id:
+                del self.buckets[key]
+
+    def query(self, value: bytes, threshold: float, user_id: Optional[int] = None,
+              exclude: Optional[int] = None, limit: int = 5) -> List[SimilarIdea]:
+        """Indexed projects whose estimated similarity to `value` reaches `threshold`, closest first"""
+        candidates = set()
+        for key in band_keys(value):
+            entry = self.buckets.get(key)
+            if isinstance(entry, list):
+                candidates.update(entry)
+            elif entry is not None:
+                candidates.add(entry)
+        candidates.discard(exclude)
+        matches = []
+        for project_id in candidates:
+            if user_id is not None and self.owners[project_id] != user_id:
+                continue
+            score = similarity(value, self.signatures[project_id])
+            if score >= threshold:
+                matches.append(SimilarIdea(project_id, score))
+        matches.sort(key=lambda match: (-match.similarity, match.project_id))
+        return matches[:limit]
+
+
+class IdeaIndex:
+    """The per-competition indexes of this process, loaded on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes: Dict[Optional[int], CompetitionIndex] = {}
+
+    def _synced(self, db: Session, competition_id: Optional[int]) -> CompetitionIndex:
+        with self._lock:
+            index = self._indexes.get(competition_id)
+            if index is None:
+                index = self._indexes[competition_id] = CompetitionIndex()
+            now = time.monotonic()
+            if index.synced_at is None or now - index.synced_at >= SYNC_SECONDS:
+                for row in IdeaSignatureRepository(db).find_since(competition_id, index.last_id):
+                    index.add(row.project_id, row.user_id, row.signature)
+                    index.last_id = row.id
+                index.synced_at = now
+            return index
+
+    def update(self, db: Session, project: Project) -> None:
+        """Store the signature of the project's current idea and index it"""
+        value = signature(project.idea_description)
+        IdeaSignatureRepository(db).replace(project, value)
+        with self._lock:
+            index = self._indexes.get(project.competition_id)
+            if index is not None:
+                # last_id stays: rows of other processes below ours are still to be read
+                if value is None:
+                    index.remove(project.id)
+                else:
+                    index.add(project.id, project.user_id, value)
+
+    def remove(self, db: Session, project: Project) -> None:
+        IdeaSignatureRepository(db).delete_by_project_id(project.id)
+        with self._lock:
+            index = self._indexes.get(project.competition_id)
+            if index is not None:
+                index.remove(project.id)
+
+    def similar(self, db: Session, project: Project, same_user: bool = True,
+                threshold: Optional[float] = None, limit: int = 5) -> List[SimilarIdea]:
+        """Projects of the same competition whose idea is a near-duplicate of this project's"""
+        index = self._synced(db, project.competition_id)
+        with self._lock:
+            value = index.signatures.get(project.id)
+        if value is None:
+            # Not indexed yet (created before the index existed): index it now
+            self.update(db, project)
+            value = signature(project.idea_description)
+            if value is None:
+                return []
+        with self._lock:
+            return index.query(
+                value,
+                THRESHOLD if threshold is None else threshold,
+                user_id=project.user_id if same_user else None,
+                exclude=project.id,
+                limit=limit,
+            )
+
+
+idea_index = IdeaIndex()
+
+
+def index_project(db: Session, project: Project) -> None:
+    """Index a created or edited project; on failure it is indexed at its next lookup"""
+    try:
+        idea_index.update(db, project)
+    except Exception as e:
+        print(f"Failed to index the idea of project {project.id}: {e}", file=sys.stderr)
+
+
+def similar_projects(db: Session, project: Project, same_user: bool = True) -> List[Tuple[Project, float]]:
+    """The matched projects that still exist, closest first"""
+    matches = idea_index.similar(db, project, same_user=same_user)
+    repository = ProjectRepository(db)
+    found = []
+    for match in matches:
+        matched = repository.find_by_id(match.project_id)
+        if matched is not None:
+            found.append((matched, match.similarity))
+    return found
+
+
+def find_example(db: Session, project: Project) -> Optional[Tuple[Project, List[GeneratedFile], float]]:
+    """The closest similar project with completed documents, to show the model as an example"""
+    file_repository = FileRepository(db)
+    for matched, score in similar_projects(db, project, same_user=not ACROSS_USERS):
+        files = [f for f in file_repository.find_by_project_id(matched.id) if f.status == "completed"]
+        if files:
+            return matched, files, score
+    return None
+
+
+def example_messages(example: Tuple[Project, List[GeneratedFile], float],
+                     planned: PlannedCompletion) -> List[Dict[str, str]]:
+    """
+    A user/assistant exchange showing the example project's documents for the
+    planned completion; empty when it has none of them. Long documents are cut
+    to EXAMPLE_CHARS, which is enough to show their structure and tone.
+    """
+    matched, files, _ = example
+    documents = [
+        {"filename": f.filename, "content": f.content[:EXAMPLE_CHARS], "file_type": f.file_type or "txt"}
+        for f in files if planned.accepts(f.filename)
+    ]
+    if not documents:
+        return []
+    return [
+        {"role": "user", "content": generation_user_prompt(matched, planned.names, planned.excluded)},
+        {"role": "assistant", "content": json.dumps({"files": documents}, ensure_ascii=False)},
+    ]
+
+
+def copy_draft(db: Session, project: Project, source: Project) -> List[GeneratedFile]:
+    """
+    Copy the source project's completed documents that the project does not have
+    yet. The copies carry no input fingerprint, so they count as stale and are
+    replaced by the next stale-only generation.
+    """
+    file_repository = FileRepository(db)
+    existing = {f.filename for f in file_repository.find_by_project_id(project.id) if f.status == "completed"}
+    copied = []
+    for file in file_repository.find_by_project_id(source.id):
+        if file.status != "completed" or file.filename in existing:
+            continue
+        copied.append(file_repository.save(GeneratedFile(
+            project_id=project.id,
+            filename=file.filename,
+            content=file.content,
+            file_type=file.file_type,
+            status="completed",
+        )))
+        existing.add(file.filename)
+    return copied
@@ -0,0 +1,221 @@
+"""
+Opt-in speculative generation (SPECULATIVE_GENERATION=1).
+
+Users almost always open a new project and click "Generate" right away. When a
+project with a competition and an idea is created or updated, a generation is
+queued for it after SPECULATIVE_DELAY_SECONDS (edits in between restart the
+wait). By the time the user asks, the documents are being written - the request
+attaches to the run - or already exist, and a generate request is answered
+from them as long as the inputs still match (see input_fingerprint).
+
+Speculative work always gives way:
+- it runs on its own small thread pool, as a `speculative` job holding the
+  project's lease like any other run;
+- editing the project cancels it (and queues a new one for the new inputs);
+- single-file and section requests, and restarts, cancel it first;
+- it is not started, and running ones are cancelled, while
+  SPECULATIVE_MAX_INTERACTIVE user-started jobs are running.
+
+A global budget, counted over generation_jobs so it holds across worker
+processes, caps it at SPECULATIVE_MAX_RUNNING concurrent runs and
+SPECULATIVE_MAX_PER_HOUR runs per hour. Two processes checking at the same
+moment can overshoot by one run each.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.metrics import SPECULATIVE_GENERATIONS
+from app.models.competition import Competition
+from app.models.generation_job import GenerationJob
+from app.models.generation_log import GenerationLog
+from app.models.project import Project
+from app.repositories.file_repository import FileRepository
+from app.repositories.job_repository import JobRepository
+from app.repositories.log_repository import LogRepository
+from app.services.generation_jobs import cancel_local
+from app.services.input_fingerprint import stale_files
+from app.services.model_routing import route_for
+from app.services.prompts import system_prompt_for
+
+ENABLED = os.getenv("SPECULATIVE_GENERATION", "").lower() in ("1", "true", "yes")
+DELAY_SECONDS = float(os.getenv("SPECULATIVE_DELAY_SECONDS", "3"))
+MAX_RUNNING = int(os.getenv("SPECULATIVE_MAX_RUNNING", "2"))
+MAX_PER_HOUR = int(os.getenv("SPECULATIVE_MAX_PER_HOUR", "60"))
+MAX_INTERACTIVE = int(os.getenv("SPECULATIVE_MAX_INTERACTIVE", "4"))
+
+KIND = "speculative"
+INTERACTIVE_KINDS = ["all", "single", "section"]
+# A speculative run whose result a generate request already returned
+SERVED = "served"
+# How long a new run waits for the one an edit preempted to release the project
+RELEASE_WAIT_SECONDS = 5
+
+_timers: Dict[int, threading.Timer] = {}
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def eligible(project: Project) -> bool:
+    return ENABLED and project.competition_id is not None and bool((project.idea_description or "").strip())
+
+
+def needs_generation(db: Session, project: Project) -> bool:
+    """True unless every document exists and was generated from the current inputs"""
+    files = FileRepository(db).find_by_project_id(project.id)
+    completed = [f for f in files if f.status == "completed"]
+    if not completed or len(completed) < len(files):
+        return True
+    competition = db.query(Competition).filter(Competition.id == project.competition_id).first() \
+        if project.competition_id else None
+    return bool(stale_files(
+        completed, project, system_prompt_for(competition), lambda name: route_for(competition, name).model
+    ))
+
+
+def schedule(project: Project) -> None:
+    """Queue a speculative run for the project; a pending one restarts its delay"""
+    if not eligible(project):
+        return
+    with _lock:
+        pending = _timers.pop(project.id, None)
+        if pending is not None:
+            pending.cancel()
+        timer = threading.Timer(DELAY_SECONDS, _submit, args=(project.id,))
+        timer.daemon = True
+        _timers[project.id] = timer
+        timer.start()
+
+
+def _submit(project_id: int) -> None:
+    global _executor
+    with _lock:
+        _timers.pop(project_id, None)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_RUNNING, thread_name_prefix="speculative-generation")
+        executor = _executor
+    executor.submit(run, project_id)
+
+
+def _budget_exhausted(repository: JobRepository) -> Optional[str]:
+    """The reason not to start a speculative run now, if any"""
+    if repository.count_running(INTERACTIVE_KINDS) >= MAX_INTERACTIVE:
+        return "skipped_busy"
+    if repository.count_running([KIND]) >= MAX_RUNNING:
+        return "skipped_budget"
+    if repository.count_started_since(KIND, datetime.utcnow() - timedelta(hours=1)) >= MAX_PER_HOUR:
+        return "skipped_budget"
+    return None
+
+
+def _acquire(repository: JobRepository, project_id: int) -> Optional[GenerationJob]:
+    """Start the speculative job, waiting for a preempted one to release the project"""
+    deadline = time.monotonic() + RELEASE_WAIT_SECONDS
+    while True:
+        job, created = repository.acquire(project_id, KIND)
+        if created:
+            return job
+        if job.kind != KIND or not job.cancel_requested or time.monotonic() >= deadline:
+            return None
+        time.sleep(0.2)
+        repository.db.expire_all()
+
+
+def run(project_id: int) -> None:
+    """Generate the project's missing and stale documents if the budget allows"""
+    db = SessionLocal()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project is None or not eligible(project):
+            return
+        repository = JobRepository(db)
+        reason = _budget_exhausted(repository)
+        if reason is None and not needs_generation(db, project):
+            reason = "skipped_up_to_date"
+        job = _acquire(repository, project_id) if reason is None else None
+        if reason is None and job is None:
+            reason = "skipped_running"
+        if reason is not None:
+            SPECULATIVE_GENERATIONS.labels(outcome=reason).inc()
+            return
+    except Exception as e:
+        print(f"Failed to start speculative generation for project {project_id}: {e}", file=sys.stderr)
+        return
+    finally:
+        db.close()
+
+    SPECULATIVE_GENERATIONS.labels(outcome="started").inc()
+    # Imported here: the task lives with the generate endpoint it backs
+    from app.routers.files import generate_files_task
+    generate_files_task(project_id, job.id, stale_only=True, kind=KIND)
+
+
+def _cancel(repository: JobRepository, job: GenerationJob) -> None:
+    repository.request_cancel(job.id)
+    cancel_local(job.id)
+    SPECULATIVE_GENERATIONS.labels(outcome="preempted").inc()
+
+
+def preempt(db: Session, project_id: int) -> bool:
+    """Cancel the project's speculative run (its inputs changed, or the user wants another job)"""
+    if not ENABLED:
+        return False
+    with _lock:
+        pending = _timers.pop(project_id, None)
+    if pending is not None:
+        pending.cancel()
+    repository = JobRepository(db)
+    running = repository.find_running(project_id)
+    if running is None or running.kind != KIND:
+        return False
+    _cancel(repository, running)
+    return True
+
+
+def yield_to_interactive(db: Session) -> None:
+    """Cancel speculative runs while user-started generations use up the capacity"""
+    if not ENABLED:
+        return
+    repository = JobRepository(db)
+    if repository.count_running(INTERACTIVE_KINDS) < MAX_INTERACTIVE:
+        return
+    for job in repository.find_running_by_kind(KIND):
+        _cancel(repository, job)
+
+
+def serve_ready(db: Session, project: Project) -> Optional[GenerationJob]:
+    """
+    The finished speculative run, when it is the project's latest job, its result
+    was not returned before and the documents still match the inputs. It is
+    marked as served, so a later generate request regenerates as usual.
+    """
+    if not ENABLED:
+        return None
+    repository = JobRepository(db)
+    job = repository.find_latest(project.id)
+    if job is None or job.kind != KIND or job.status != "succeeded" or job.target == SERVED:
+        return None
+    if needs_generation(db, project):
+        return None
+    repository.update_target(job.id, SERVED)
+    LogRepository(db).save(GenerationLog(
+        project_id=project.id,
+        message="⚡ Documents were generated in advance from the current project details",
+        log_type="success",
+    ))
+    SPECULATIVE_GENERATIONS.labels(outcome="served").inc()
+    return job
+
+
+def shutdown() -> None:
+    """Drop queued runs; runs in progress finish or are cancelled with their process"""
+    with _lock:
+        timers = list(_timers.values())
+        _timers.clear()
+    for timer in timers:
+        timer.cancel()
@@ -0,0 +1,130 @@
+import os
+import json
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from app.models.competition import Competition
+from app.repositories.usage_repository import UsageRepository
+
+# USD per 1M tokens (input, output). Override with OPENAI_PRICING='{"model": [input, output]}'
+DEFAULT_MODEL_PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+
+# The Batch API bills half the interactive price (see services/batch_generation.py)
+BATCH_PRICE_FACTOR = 0.5
+
+
+def get_model_pricing() -> Dict[str, tuple]:
+    pricing = dict(DEFAULT_MODEL_PRICING)
+    override = os.getenv("OPENAI_PRICING")
+    if override:
+        pricing.update({model: tuple(prices) for model, prices in json.loads(override).items()})
+    return pricing
+
+
+def usage_cost(prices: tuple, row) -> float:
+    """USD cost of an aggregate row, with its batch tokens at the batch price"""
+    input_price, output_price = prices
+    batch_prompt_tokens = row.batch_prompt_tokens or 0
+    batch_completion_tokens = row.batch_completion_tokens or 0
+    interactive = ((row.prompt_tokens or 0) - batch_prompt_tokens) * input_price \
+        + ((row.completion_tokens or 0) - batch_completion_tokens) * output_price
+    batch = (batch_prompt_tokens * input_price + batch_completion_tokens * output_price) * BATCH_PRICE_FACTOR
+    return (interactive + batch) / 1_000_000
+
+
+class UsageService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.usage_repository = UsageRepository(db)
+
+    def competition_report(self) -> List[dict]:
+        """Tokens, latency, throughput and cost per competition prompt, most expensive first"""
+        pricing = get_model_pricing()
+        names = {competition_id: name for competition_id, name in self.db.query(Competition.id, Competition.name)}
+        report: Dict[int, dict] = {}
+        for row in self.usage_repository.aggregate_by_competition_and_model():
+            entry = report.setdefault(row.competition_id, {
+                "competition_id": row.competition_id,
+                "competition_name": names.get(row.competition_id, "Default prompt" if row.competition_id is None else None),
+                "completions": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "retries": 0,
+                "hedged": 0,
+                "cost_usd": 0.0,
+                "unpriced_models": [],
+                "_timed_completions": 0,
+                "_timed_completion_tokens": 0,
+                "_latency_ms": 0.0,
+                "_generation_ms": 0.0,
+                "_ttft_ms": 0.0,
+                "_ttft_samples": 0,
+            })
+            latency_ms = row.latency_ms or 0.0
+            ttft_ms = row.time_to_first_token_ms or 0.0
+            entry["completions"] += row.completions
+            entry["prompt_tokens"] += row.prompt_tokens or 0
+            entry["completion_tokens"] += row.completion_tokens or 0
+            entry["retries"] += row.retries or 0
+            entry["hedged"] += row.hedged or 0
+            # Batch rows are left out of latency and throughput (see aggregate_by_competition_and_model)
+            entry["_timed_completions"] += row.timed_completions or 0
+            entry["_timed_completion_tokens"] += row.timed_completion_tokens or 0
+            entry["_latency_ms"] += latency_ms
+            entry["_ttft_ms"] += ttft_ms
+            entry["_ttft_samples"] += row.first_token_samples
+            # Time spent producing tokens, excluding the wait for the first one
+            entry["_generation_ms"] += latency_ms - ttft_ms
+            if row.model in pricing:
+                entry["cost_usd"] += usage_cost(pricing[row.model], row)
+            else:
+                entry["unpriced_models"].append(row.model)
+
+        results = []
+        for entry in report.values():
+            completions = entry["completions"]
+            timed_completions = entry.pop("_timed_completions")
+            timed_completion_tokens = entry.pop("_timed_completion_tokens")
+            generation_seconds = entry.pop("_generation_ms") / 1000
+            latency_ms = entry.pop("_latency_ms")
+            ttft_ms = entry.pop("_ttft_ms")
+            ttft_samples = entry.pop("_ttft_samples")
+            entry["avg_latency_ms"] = round(latency_ms / timed_completions, 1) if timed_completions else None
+            entry["avg_time_to_first_token_ms"] = round(ttft_ms / ttft_samples, 1) if ttft_samples else None
+            entry["tokens_per_second"] = round(timed_completion_tokens / generation_seconds, 1) if generation_seconds > 0 else None
+            entry["cost_usd"] = round(entry["cost_usd"], 6)
+            entry["avg_cost_usd"] = round(entry["cost_usd"] / completions, 6) if completions else None
+            results.append(entry)
+        results.sort(key=lambda entry: entry["cost_usd"], reverse=True)
+        return results
+
+    def route_report(self) -> List[dict]:
+        """Latency, tokens and cost of every routing decision, for tuning the routing tables"""
+        pricing = get_model_pricing()
+        names = {competition_id: name for competition_id, name in self.db.query(Competition.id, Competition.name)}
+        results = []
+        for row in self.usage_repository.aggregate_by_route():
+            prompt_tokens = row.prompt_tokens or 0
+            completion_tokens = row.completion_tokens or 0
+            prices = pricing.get(row.model)
+            results.append({
+                "competition_id": row.competition_id,
+                "competition_name": names.get(row.competition_id, "Default prompt" if row.competition_id is None else None),
+                "route_key": row.route_key,
+                "model": row.model,
+                "fallback_from": row.fallback_from,
+                "completions": row.completions,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "avg_completion_tokens": round(completion_tokens / row.completions, 1) if row.completions else None,
+                "avg_latency_ms": round(row.avg_latency_ms, 1) if row.avg_latency_ms is not None else None,
+                "avg_time_to_first_token_ms": round(row.avg_time_to_first_token_ms, 1) if row.avg_time_to_first_token_ms is not None else None,
+                "cost_usd": round(usage_cost(prices, row), 6) if prices else None,
+            })
+        results.sort(key=lambda entry: (entry["competition_id"] or 0, entry["route_key"] or "", entry["model"]))
+        return results
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Script to pre-generate documents for many projects through the OpenAI Batch API
+
+    python batch_generate.py submit --competition 3 [--stale] [--wait]
+    python batch_generate.py status
+    python batch_generate.py import 12 [--wait]
+
+Add --local to use the offline stand-in instead of the API.
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal, init_db
+from app.repositories.batch_repository import BatchRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.batch_generation import FINISHED_STATES, BatchGenerationService
+
+
+def print_batch(batch):
+    print(
+        f"Batch {batch.id} [{batch.backend}] {batch.status}: {batch.request_count} request(s) "
+        f"for {batch.project_count} project(s), {batch.imported_files} file(s) imported, "
+        f"{batch.failed_requests} failed request(s)"
+        + (", import complete" if batch.imported_at else "")
+    )
+
+
+def wait_and_import(service, batch, interval):
+    """Poll until the batch finishes and its results are imported"""
+    while True:
+        batch = service.refresh(batch)
+        print_batch(batch)
+        if batch.imported_at or (batch.status in FINISHED_STATES and not (batch.output_file_id or batch.error_file_id)):
+            return batch
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    submit = subcommands.add_parser("submit", help="Submit a batch for the selected projects")
+    submit.add_argument("--competition", type=int, help="Projects of this competition")
+    submit.add_argument("--user", type=int, help="Projects of this user")
+    submit.add_argument("--project", type=int, action="append", help="This project (repeatable)")
+    submit.add_argument("--stale", action="store_true", help="Only documents whose inputs changed")
+    submit.add_argument("--local", action="store_true", help="Use the offline stand-in")
+    submit.add_argument("--wait", action="store_true", help="Poll until done and import the results")
+    submit.add_argument("--interval", type=float, default=60, help="Seconds between polls")
+
+    subcommands.add_parser("status", help="List recent batches")
+
+    import_ = subcommands.add_parser("import", help="Poll a batch and import it once finished")
+    import_.add_argument("batch_id", type=int)
+    import_.add_argument("--wait", action="store_true", help="Keep polling until done")
+    import_.add_argument("--interval", type=float, default=60, help="Seconds between polls")
+
+    args = parser.parse_args()
+
+    # Initialize database
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.command == "submit":
+            if args.competition is None and args.user is None and not args.project:
+                parser.error("select projects with --competition, --user or --project")
+            projects = ProjectRepository(db).find_for_generation(args.competition, args.user, args.project)
+            print(f"Selected {len(projects)} project(s)")
+            service = BatchGenerationService(db, local=args.local)
+            batch = service.submit(projects, stale_only=args.stale)
+            if batch is None:
+                print("Nothing to generate - every selected project is up to date")
+                return
+            print_batch(batch)
+            if args.wait:
+                wait_and_import(service, batch, args.interval)
+
+        elif args.command == "status":
+            batches = BatchRepository(db).find_recent()
+            if not batches:
+                print("No batches yet")
+            for batch in batches:
+                print_batch(batch)
+
+        elif args.command == "import":
+            batch = BatchRepository(db).find_by_id(args.batch_id)
+            if not batch:
+                print(f"Batch {args.batch_id} not found")
+                sys.exit(1)
+            service = BatchGenerationService(db, local=batch.backend == "local")
+            if args.wait:
+                wait_and_import(service, batch, args.interval)
+            else:
+                print_batch(service.refresh(batch))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark comparing the serialization cost per endpoint of FastAPI's default
+path (validate -> jsonable_encoder -> json.dumps) with app.responses.model_response
+(validate -> pydantic-core dump_json).
+
+Usage:
+    python benchmarks/serialization.py [--iterations 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from app.main import app
+from app.models.competition import Competition
+from app.models.generated_file import GeneratedFile
+from app.models.generation_log import GenerationLog
+from app.models.project import Project
+from app.responses import model_response
+from app.routers.competitions import CompetitionResponse
+from app.routers.files import FileContentResponse, FileResponse, LogResponse
+from app.routers.projects import ProjectResponse
+
+PROMPT = "## Section\n- Emphasize social impact and scalability with measurable KPIs.\n" * 120
+DOCUMENT = "# Business Plan\n\n" + "Market analysis paragraph with realistic numbers. " * 800
+
+
+def build_fixtures():
+    """Transient ORM objects shaped like real rows (no database needed)"""
+    now = datetime.utcnow()
+    competitions = []
+    for i in range(20):
+        competition = Competition(name=f"Competition {i}", description="Description " * 20,
+                                  advice_prompt=PROMPT, file_generation_prompt=PROMPT)
+        competition.id = i + 1
+        competitions.append(competition)
+
+    projects = []
+    for i in range(50):
+        project = Project(name=f"Project {i}", description="", competition_id=1,
+                          idea_description="An idea " * 100, user_id=1)
+        project.id = i + 1
+        project.created_at = now
+        projects.append(project)
+
+    files = []
+    for i, name in enumerate(["pitch_deck.md", "business_plan.md", "executive_summary.txt", "financial_plan.md"]):
+        file = GeneratedFile(project_id=1, filename=name, content=DOCUMENT,
+                             file_type=name.rsplit(".", 1)[-1], status="completed")
+        file.id = i + 1
+        files.append(file)
+
+    logs = []
+    for i in range(300):
+        log = GenerationLog(project_id=1, message=f"✅ Step {i} finished " * 4, log_type="success")
+        log.id = i + 1
+        logs.append(log)
+
+    # (label, route path, response model, payload)
+    return [
+        ("GET /api/competitions", "/api/competitions", CompetitionResponse, competitions),
+        ("GET /api/competitions/{id}", "/api/competitions/{competition_id}", CompetitionResponse, competitions[0]),
+        ("GET /api/projects", "/api/projects", ProjectResponse, projects),
+        ("GET /api/files/project/{id}", "/api/files/project/{project_id}", FileResponse, files),
+        ("GET /api/files/{id}/content", "/api/files/{file_id}/content", FileContentResponse, files[1]),
+        ("GET /api/files/project/{id}/logs", "/api/files/project/{project_id}/logs", LogResponse, logs),
+    ]
+
+
+def find_route(path: str) -> APIRoute:
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route
+    raise LookupError(path)
+
+
+async def time_default_path(route: APIRoute, payload, response_class, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        content = await serialize_response(field=route.response_field, response_content=payload, is_coroutine=True)
+        response_class(content=content)
+    return (time.perf_counter() - started) / iterations
+
+
+def time_model_response(model, payload, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        model_response(model, payload)
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    header = f"{'endpoint':<34}{'bytes':>10}{'json µs':>12}{'orjson µs':>12}{'model µs':>12}{'speedup':>10}"
+    print(header)
+    print("-" * len(header))
+    for label, path, model, payload in build_fixtures():
+        route = find_route(path)
+        size = len(model_response(model, payload).body)
+        default_json = asyncio.run(time_default_path(route, payload, JSONResponse, args.iterations))
+        default_orjson = asyncio.run(time_default_path(route, payload, ORJSONResponse, args.iterations))
+        direct = time_model_response(model, payload, args.iterations)
+        print(f"{label:<34}{size:>10}{default_json * 1e6:>12.1f}{default_orjson * 1e6:>12.1f}"
+              f"{direct * 1e6:>12.1f}{default_json / direct:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
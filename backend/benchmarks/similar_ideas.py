@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the similar-ideas index (app.services.similar_ideas): signature
+cost, index build time and memory, and lookup latency for one competition with
+many projects. Half of the lookups are edited copies of indexed ideas (which
+must be found), half are unrelated ideas.
+
+It exits non-zero when the p99 lookup latency exceeds its budget or too few
+near-duplicates are found. No database is needed.
+
+Usage:
+    python benchmarks/similar_ideas.py [--projects 200000] [--lookups 2000] [--max-lookup-ms 1.0]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.idea_minhash import signature
+from app.services.similar_ideas import THRESHOLD, CompetitionIndex
+
+COMMON_WORDS = ("a the for and with to of platform app students local small businesses "
+                "that helps using data service online community marketplace").split()
+
+
+def build_vocabulary(rng: random.Random, size: int = 5000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+
+
+def make_idea(rng: random.Random, vocabulary) -> str:
+    """60-80 words, a third of them from a small shared vocabulary like real ideas"""
+    return " ".join(
+        rng.choice(COMMON_WORDS) if rng.random() < 0.33 else rng.choice(vocabulary)
+        for _ in range(rng.randint(60, 80))
+    )
+
+
+def edit_idea(rng: random.Random, idea: str, vocabulary, changes: int = 4) -> str:
+    """A near-duplicate: a few words replaced, as when a team rephrases a copied idea"""
+    words = idea.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+    return " ".join(words)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--max-lookup-ms", type=float, default=1.0)
+    parser.add_argument("--min-recall", type=float, default=0.9,
+                        help="Share of near-duplicate lookups that must find their original")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = build_vocabulary(rng)
+    ideas = [make_idea(rng, vocabulary) for _ in range(args.projects)]
+
+    started = time.perf_counter()
+    signatures = [signature(idea) for idea in ideas]
+    signing = time.perf_counter() - started
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = CompetitionIndex()
+    for project_id, value in enumerate(signatures, 1):
+        index.add(project_id, project_id % 1000, value)
+    building = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    queries = []
+    for _ in range(args.lookups // 2):
+        original = rng.randrange(args.projects)
+        queries.append((signature(edit_idea(rng, ideas[original], vocabulary)), original + 1))
+        queries.append((signature(make_idea(rng, vocabulary)), None))
+
+    latencies = []
+    found = 0
+    false_matches = 0
+    for value, original in queries:
+        started = time.perf_counter()
+        matches = index.query(value, THRESHOLD)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if original is not None:
+            found += any(match.project_id == original for match in matches)
+        else:
+            false_matches += len(matches)
+    recall = found / (len(queries) // 2)
+
+    print(f"Projects:   {args.projects}")
+    print(f"Signatures: {signing / args.projects * 1e6:.0f} µs per idea")
+    print(f"Index:      built in {building:.1f}s, {memory / 2**20:.0f} MiB ({memory / args.projects:.0f} bytes per project)")
+    print(f"Lookups:    p50 {statistics.median(latencies):.3f} ms, p99 {percentile(latencies, 0.99):.3f} ms, "
+          f"max {max(latencies):.3f} ms")
+    print(f"Matches:    {recall:.1%} of near-duplicates found, {false_matches} match(es) for unrelated ideas "
+          f"(threshold {THRESHOLD})")
+
+    failures = []
+    if percentile(latencies, 0.99) > args.max_lookup_ms:
+        failures.append(f"p99 lookup latency above {args.max_lookup_ms} ms")
+    if recall < args.min_recall:
+        failures.append(f"recall below {args.min_recall:.0%}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
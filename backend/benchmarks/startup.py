@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark. Each run starts a fresh interpreter, imports app.main and
+runs init_db() against a throwaway SQLite database, then reports medians.
+
+It exits non-zero when a budget is exceeded or when a lazily loaded module
+(openai, pyinstrument) is imported at startup, so it can guard the improvement
+in CI.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--max-import-ms 1500] [--max-warm-init-ms 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported just by starting the web app
+LAZY_MODULES = ["openai", "pyinstrument"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.database import init_db
+init_db()
+initialized = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "init_ms": (initialized - imported) * 1000,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def run_probe(database_url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    env.pop("OPENAI_API_KEY", None)
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if the median import time is higher")
+    parser.add_argument("--max-warm-init-ms", type=float, default=None, help="Fail if the median warm init_db time is higher")
+    args = parser.parse_args()
+
+    cold_init, warm_init, imports, loaded = [], [], [], set()
+    with tempfile.TemporaryDirectory() as tmp:
+        for run in range(args.runs):
+            database_url = f"sqlite:///{os.path.join(tmp, f'startup_{run}.db')}"
+            cold = run_probe(database_url)   # new database: tables are created
+            warm = run_probe(database_url)   # unchanged schema: fingerprint matches
+            imports.extend([cold["import_ms"], warm["import_ms"]])
+            cold_init.append(cold["init_ms"])
+            warm_init.append(warm["init_ms"])
+            loaded.update(cold["loaded"] + warm["loaded"])
+
+    import_ms = statistics.median(imports)
+    warm_ms = statistics.median(warm_init)
+    print(f"import app.main      median {import_ms:8.1f} ms  (min {min(imports):.1f})")
+    print(f"init_db (cold)       median {statistics.median(cold_init):8.1f} ms")
+    print(f"init_db (warm)       median {warm_ms:8.1f} ms")
+    print(f"lazy modules loaded  {sorted(loaded) or 'none'}")
+
+    failures = []
+    if loaded:
+        failures.append(f"modules imported at startup: {sorted(loaded)}")
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append(f"import {import_ms:.1f} ms > {args.max_import_ms} ms")
+    if args.max_warm_init_ms is not None and warm_ms > args.max_warm_init_ms:
+        failures.append(f"warm init_db {warm_ms:.1f} ms > {args.max_warm_init_ms} ms")
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
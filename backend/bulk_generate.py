@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Script to regenerate the documents of many projects through the generation service
+
+    python bulk_generate.py --competition 3 --stale --workers 4
+    python bulk_generate.py --user 7
+    python bulk_generate.py --project 12 --project 15
+
+Run it after update_competition_prompts.py changes a competition's prompt:
+with --stale only projects whose inputs (prompt, idea, model routing) changed
+are regenerated, and only their changed documents. Progress is written to a
+checkpoint file after every project, so an interrupted run continues where it
+stopped when started again with the same selection and the same prompts. The
+checkpoint is removed once every selected project succeeded, and one written
+before a prompt or routing change is ignored, so the next run starts afresh.
+"""
+import argparse
+import hashlib
+import json
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func
+from app.database import SessionLocal, init_db
+from app.models.competition import Competition
+from app.models.openai_usage import OpenAIUsage
+from app.models.project import Project
+from app.repositories.file_repository import FileRepository
+from app.repositories.job_repository import JobRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.input_fingerprint import stale_files
+from app.services.model_routing import route_for
+from app.services.prompts import system_prompt_for
+
+DEFAULT_CHECKPOINT = "bulk_generate.checkpoint.json"
+
+
+class Checkpoint:
+    """Projects already handled by a run, persisted after each one so a rerun can resume"""
+
+    def __init__(self, path: str, selection: dict):
+        self.path = path
+        self.selection = selection
+        self.done: List[int] = []
+        self.failed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Resume from the file if it belongs to the same selection"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("selection") != self.selection:
+            print(f"Ignoring checkpoint {self.path}: it was written for a different selection or prompts")
+            return False
+        self.done = data.get("done", [])
+        self.failed = data.get("failed", {})
+        return True
+
+    def record(self, project_id: int, error: Optional[str] = None) -> None:
+        with self._lock:
+            if error is None:
+                self.done.append(project_id)
+                self.failed.pop(str(project_id), None)
+            else:
+                self.failed[str(project_id)] = error
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"selection": self.selection, "done": self.done, "failed": self.failed,
+                           "updated_at": datetime.utcnow().isoformat()}, f)
+            # Atomic on POSIX: a crash never leaves a half-written checkpoint
+            os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        """Forget the run once it is complete; a rerun then selects projects afresh"""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def select_projects(db, args) -> List[Project]:
+    projects = ProjectRepository(db).find_for_generation(args.competition, args.user, args.project)
+    if not args.stale:
+        return projects
+    competitions = {}
+    selected = []
+    file_repository = FileRepository(db)
+    for project in projects:
+        if project.competition_id not in competitions:
+            competitions[project.competition_id] = db.query(Competition).filter(
+                Competition.id == project.competition_id
+            ).first() if project.competition_id else None
+        competition = competitions[project.competition_id]
+        files = file_repository.find_by_project_id(project.id)
+        completed = [f for f in files if f.status == "completed"]
+        # Projects without documents, with failed attempts or with changed inputs
+        if not completed or len(completed) < len(files) or stale_files(
+            completed, project, system_prompt_for(competition), lambda name: route_for(competition, name).model
+        ):
+            selected.append(project)
+    return selected
+
+
+def prompts_fingerprint(db, projects: List[Project]) -> str:
+    """Digest of the prompts and model routing of the selected projects' competitions"""
+    digest = hashlib.sha256()
+    for competition_id in sorted({project.competition_id or 0 for project in projects}):
+        competition = db.query(Competition).filter(Competition.id == competition_id).first() if competition_id else None
+        digest.update(json.dumps(
+            [competition_id, system_prompt_for(competition), competition.model_routing if competition else None],
+            sort_keys=True,
+        ).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def generate(project_id: int, stale_only: bool) -> dict:
+    """Run one project through the same task the API schedules; returns its outcome"""
+    # Imported here so that --help and --dry-run stay fast
+    from app.routers.files import generate_files_task
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        job, created = JobRepository(db).acquire(project_id, "all")
+    finally:
+        db.close()
+    if not created:
+        return {"project_id": project_id, "status": "busy", "seconds": 0.0,
+                "error": f"generation job {job.id} is already running"}
+
+    generate_files_task(project_id, job.id, stale_only=stale_only)
+
+    db = SessionLocal()
+    try:
+        job = JobRepository(db).find_by_id(job.id)
+        files = len([f for f in FileRepository(db).find_by_project_id(project_id) if f.status == "completed"])
+    finally:
+        db.close()
+    status = "succeeded" if job.status == "succeeded" else "failed"
+    return {"project_id": project_id, "status": status, "seconds": time.monotonic() - started,
+            "files": files, "error": job.error if status == "failed" else None}
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)] if values else 0.0
+
+
+def report(results: List[dict], project_ids: List[int], started_at: datetime, elapsed: float) -> None:
+    """Throughput of the run: projects per minute, durations and OpenAI tokens"""
+    db = SessionLocal()
+    try:
+        completions, prompt_tokens, completion_tokens = db.query(
+            func.count(OpenAIUsage.id),
+            func.coalesce(func.sum(OpenAIUsage.prompt_tokens), 0),
+            func.coalesce(func.sum(OpenAIUsage.completion_tokens), 0),
+        ).filter(OpenAIUsage.created_at >= started_at, OpenAIUsage.project_id.in_(project_ids or [-1])).one()
+    finally:
+        db.close()
+    by_status: Dict[str, int] = {}
+    for result in results:
+        by_status[result["status"]] = by_status.get(result["status"], 0) + 1
+    durations = [result["seconds"] for result in results if result["status"] in ("succeeded", "failed")]
+    print("\n=== Bulk generation report ===")
+    print(f"Projects:    {len(results)} ({', '.join(f'{count} {status}' for status, count in sorted(by_status.items())) or 'none'})")
+    print(f"Elapsed:     {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"Throughput:  {len(durations) / elapsed * 60:.1f} projects/min")
+    if durations:
+        print(f"Per project: p50 {percentile(durations, 0.5):.1f}s, p95 {percentile(durations, 0.95):.1f}s, max {max(durations):.1f}s")
+    print(f"OpenAI:      {completions} completion(s), {prompt_tokens} prompt + {completion_tokens} completion tokens"
+          + (f" ({completion_tokens / elapsed:.0f} completion tokens/s)" if elapsed > 0 else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--competition", type=int, help="Projects of this competition")
+    parser.add_argument("--user", type=int, help="Projects of this user")
+    parser.add_argument("--project", type=int, action="append", help="This project (repeatable)")
+    parser.add_argument("--stale", action="store_true",
+                        help="Only projects with missing, failed or out-of-date documents, regenerating just those")
+    parser.add_argument("--workers", type=int, default=4, help="Projects generated at the same time (default: 4)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help=f"Progress file (default: {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    parser.add_argument("--retry-failed", action="store_true", help="When resuming, also retry projects that failed")
+    parser.add_argument("--dry-run", action="store_true", help="List the selected projects without generating")
+    args = parser.parse_args()
+    if args.competition is None and args.user is None and not args.project:
+        parser.error("select projects with --competition, --user or --project")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if not os.getenv("OPENAI_API_KEY") and not args.dry_run:
+        print("OPENAI_API_KEY is not set")
+        sys.exit(1)
+
+    # Initialize database
+    init_db()
+    db = SessionLocal()
+    try:
+        projects = select_projects(db, args)
+        project_ids = [project.id for project in projects]
+        fingerprint = prompts_fingerprint(db, projects)
+    finally:
+        db.close()
+
+    # A checkpoint from before a prompt change must not skip projects that need the new prompt
+    selection = {"competition": args.competition, "user": args.user, "project": args.project, "stale": args.stale,
+                 "prompts": fingerprint}
+    checkpoint = Checkpoint(args.checkpoint, selection)
+    resumed = not args.restart and checkpoint.load()
+    if resumed:
+        skip = set(checkpoint.done)
+        if not args.retry_failed:
+            skip.update(int(project_id) for project_id in checkpoint.failed)
+        print(f"Resuming from {args.checkpoint}: {len(checkpoint.done)} done, {len(checkpoint.failed)} failed before")
+        project_ids = [project_id for project_id in project_ids if project_id not in skip]
+
+    print(f"Selected {len(project_ids)} project(s)")
+    if args.dry_run:
+        for project_id in project_ids:
+            print(f"  project {project_id}")
+        return
+    if not project_ids:
+        if resumed and not checkpoint.failed:
+            # Left behind by a run that finished every project
+            checkpoint.remove()
+        return
+
+    started_at = datetime.utcnow()
+    started = time.monotonic()
+    results: List[dict] = []
+    interrupted = False
+    executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="bulk-generate")
+    try:
+        futures = {executor.submit(generate, project_id, args.stale): project_id for project_id in project_ids}
+        for index, future in enumerate(as_completed(futures), 1):
+            project_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"project_id": project_id, "status": "failed", "seconds": 0.0, "error": str(e)}
+            results.append(result)
+            if result["status"] == "succeeded":
+                checkpoint.record(project_id)
+                print(f"[{index}/{len(project_ids)}] ✅ project {project_id}: {result['files']} file(s) in {result['seconds']:.1f}s")
+            elif result["status"] == "busy":
+                # Not recorded: the next run picks it up again
+                print(f"[{index}/{len(project_ids)}] ⏭️  project {project_id}: {result['error']}")
+            else:
+                checkpoint.record(project_id, result["error"] or "failed")
+                print(f"[{index}/{len(project_ids)}] ❌ project {project_id}: {result['error']}")
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\nInterrupted - waiting for running projects; rerun the same command to resume")
+        executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        executor.shutdown(wait=True)
+        report(results, project_ids, started_at, time.monotonic() - started)
+
+    if not interrupted and not checkpoint.failed and len(results) == len(project_ids) \
+            and all(result["status"] == "succeeded" for result in results):
+        checkpoint.remove()
+        print(f"All selected projects succeeded; removed checkpoint {args.checkpoint}")
+
+
+if __name__ == "__main__":
+    main()
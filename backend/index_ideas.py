@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Script to add the idea signatures of projects created before the similar-ideas index existed
+
+    python index_ideas.py
+    python index_ideas.py --all
+
+New and edited projects are indexed when they are saved, and a project that
+was missed is indexed the first time its similar ideas are looked up. Run this
+once after upgrading, so older projects are found as matches too. With --all,
+every project's signature is computed again (after changing app/idea_minhash.py).
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal, init_db
+from app.models.project import Project
+from app.repositories.idea_signature_repository import IdeaSignatureRepository
+from app.repositories.project_repository import ProjectRepository
+from app.services.similar_ideas import idea_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="Recompute the signatures of all projects")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.all:
+            project_ids = [row.id for row in db.query(Project.id).order_by(Project.id.asc()).all()]
+        else:
+            project_ids = IdeaSignatureRepository(db).find_unindexed_project_ids()
+        print(f"Indexing {len(project_ids)} project(s)...")
+        started = time.monotonic()
+        project_repository = ProjectRepository(db)
+        for done, project_id in enumerate(project_ids, 1):
+            project = project_repository.find_by_id(project_id)
+            if project is not None:
+                idea_index.update(db, project)
+            # Keep the session's identity map small on large databases
+            db.expunge_all()
+            if done % 1000 == 0:
+                print(f"  {done}/{len(project_ids)}")
+        print(f"✅ Indexed {len(project_ids)} project(s) in {time.monotonic() - started:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
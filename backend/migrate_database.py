@@ -69,7 +69,74 @@ try:
         print("Created tokens table")
     else:
         print("tokens table already exists")
-    
+
+    # generation_logs ids must never be reused (clients tail logs with since_id)
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='generation_logs'")
+    row = cursor.fetchone()
+    if row and "AUTOINCREMENT" not in row[0].upper():
+        print("Rebuilding generation_logs table with AUTOINCREMENT ids...")
+        cursor.execute("""
+            CREATE TABLE generation_logs_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id INTEGER NOT NULL,
+                message TEXT NOT NULL,
+                log_type VARCHAR,
+                created_at DATETIME NOT NULL,
+                FOREIGN KEY (project_id) REFERENCES projects(id)
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO generation_logs_new (id, project_id, message, log_type, created_at)
+            SELECT id, project_id, message, log_type, created_at FROM generation_logs
+        """)
+        cursor.execute("DROP TABLE generation_logs")
+        cursor.execute("ALTER TABLE generation_logs_new RENAME TO generation_logs")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_generation_logs_id ON generation_logs(id)")
+        print("Rebuilt generation_logs table")
+    if row:
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_generation_logs_project_id_id ON generation_logs(project_id, id)"
+        )
+
+    # Input fingerprint used to skip regenerating unchanged documents
+    cursor.execute("PRAGMA table_info(generated_files)")
+    file_columns = [column[1] for column in cursor.fetchall()]
+    if file_columns and 'input_hash' not in file_columns:
+        print("Adding input_hash column to generated_files table...")
+        cursor.execute("ALTER TABLE generated_files ADD COLUMN input_hash VARCHAR")
+        print("Added input_hash column (existing files count as stale)")
+
+    # Cancel flag polled by the worker running a generation job
+    cursor.execute("PRAGMA table_info(generation_jobs)")
+    job_columns = [column[1] for column in cursor.fetchall()]
+    if job_columns and 'cancel_requested' not in job_columns:
+        print("Adding cancel_requested column to generation_jobs table...")
+        cursor.execute("ALTER TABLE generation_jobs ADD COLUMN cancel_requested BOOLEAN NOT NULL DEFAULT 0")
+        print("Added cancel_requested column")
+
+    # Whether a completion sent a hedge request (duplicate after a late first token)
+    cursor.execute("PRAGMA table_info(openai_usage)")
+    usage_columns = [column[1] for column in cursor.fetchall()]
+    if usage_columns and 'hedged' not in usage_columns:
+        print("Adding hedged column to openai_usage table...")
+        cursor.execute("ALTER TABLE openai_usage ADD COLUMN hedged BOOLEAN NOT NULL DEFAULT 0")
+        print("Added hedged column")
+
+    # Routing decisions recorded per completion
+    for column in ('route_key', 'fallback_from'):
+        if usage_columns and column not in usage_columns:
+            print(f"Adding {column} column to openai_usage table...")
+            cursor.execute(f"ALTER TABLE openai_usage ADD COLUMN {column} VARCHAR")
+            print(f"Added {column} column")
+
+    # Per-document model routing of a competition
+    cursor.execute("PRAGMA table_info(competitions)")
+    competition_columns = [column[1] for column in cursor.fetchall()]
+    if competition_columns and 'model_routing' not in competition_columns:
+        print("Adding model_routing column to competitions table...")
+        cursor.execute("ALTER TABLE competitions ADD COLUMN model_routing JSON")
+        print("Added model_routing column")
+
     conn.commit()
     print("Migration completed successfully!")
     
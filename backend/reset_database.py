@@ -31,7 +31,7 @@ else:
 
 # Recreate all tables
 print("Recreating database tables...")
-init_db()
+init_db(force=True)
 print("Database reset completed successfully!")
 print("All tables have been recreated. You may need to:")
 print("1. Run seed_competitions.py to populate competition data")
@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal, init_db
 from app.models.competition import Competition
+from app.repositories.competition_repository import CompetitionRepository
 
 # Initialize database
 init_db()
@@ -60,6 +61,9 @@ def seed_competitions():
                 print(f"Already exists: {comp_name}")
         
         db.commit()
+        if added_count:
+            # Invalidate the API's in-memory competition catalogue
+            CompetitionRepository(db).bump_version()
         print(f"\nSuccessfully added {added_count} new competitions!")
         print(f"Total competitions in database: {db.query(Competition).count()}")
         
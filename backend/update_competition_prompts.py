@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal, init_db
 from app.models.competition import Competition
+from app.repositories.competition_repository import CompetitionRepository
 
 # Initialize database
 init_db()
@@ -1391,6 +1392,8 @@ def update_competition_prompts():
                 print(f"Not found: {comp_name}")
         
         db.commit()
+        # Invalidate the API's in-memory competition catalogue
+        CompetitionRepository(db).bump_version()
         print(f"\nSuccessfully updated {updated_count} competitions with custom prompts!")
         
     except Exception as e:
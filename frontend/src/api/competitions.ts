@@ -9,6 +9,18 @@ export interface Competition {
   created_at: string
 }
 
+// Slim representation without prompt texts, used for pickers
+export interface CompetitionSummary {
+  id: number
+  name: string
+  description: string | null
+}
+
+export const getCompetitionSummaries = async (): Promise<CompetitionSummary[]> => {
+  const response = await apiClient.get<CompetitionSummary[]>('/competitions/summary')
+  return response.data
+}
+
 export const getCompetitions = async (): Promise<Competition[]> => {
   const response = await apiClient.get<Competition[]>('/competitions')
   return response.data
@@ -24,18 +24,47 @@ export interface GenerationLog {
   created_at: string
 }
 
-export const generateFiles = async (projectId: number): Promise<{ message: string; project_id: number; status: string }> => {
-  const response = await apiClient.post(`/files/generate/${projectId}`)
+// attached is true when a run was already in flight for the project; job_id then identifies that run
+export interface GenerationStarted {
+  message: string
+  project_id: number
+  job_id: string
+  attached: boolean
+  status: string
+}
+
+// mode 'stale' keeps files whose inputs (project fields, competition prompt) are unchanged;
+// restart cancels a run already in flight instead of attaching to it
+export const generateFiles = async (
+  projectId: number,
+  mode: 'all' | 'stale' = 'all',
+  restart = false
+): Promise<GenerationStarted> => {
+  const response = await apiClient.post(`/files/generate/${projectId}`, null, { params: { mode, restart } })
   return response.data
 }
 
+// Stops the project's running generation at its next cancellation point
+export const cancelGeneration = async (projectId: number): Promise<void> => {
+  await apiClient.post(`/files/project/${projectId}/cancel`)
+}
+
 export const getProjectFiles = async (projectId: number): Promise<GeneratedFile[]> => {
   const response = await apiClient.get<GeneratedFile[]>(`/files/project/${projectId}`)
   return response.data
 }
 
-export const getGenerationLogs = async (projectId: number): Promise<GenerationLog[]> => {
-  const response = await apiClient.get<GenerationLog[]>(`/files/project/${projectId}/logs`)
+// With sinceId only newer logs are returned; with wait the server holds an empty
+// result open for up to `wait` seconds until a new log arrives (keep it below the
+// client timeout)
+export const getGenerationLogs = async (
+  projectId: number,
+  sinceId?: number,
+  wait?: number
+): Promise<GenerationLog[]> => {
+  const response = await apiClient.get<GenerationLog[]>(`/files/project/${projectId}/logs`, {
+    params: { since_id: sinceId, wait }
+  })
   return response.data
 }
 
@@ -58,7 +87,46 @@ export const getFileContent = async (fileId: number): Promise<FileContent> => {
   return response.data
 }
 
-export const regenerateSingleFile = async (projectId: number, filename: string): Promise<{ message: string; project_id: number; filename: string; status: string }> => {
+// Fetch the content of all completed files of a project in one round trip (NDJSON stream)
+export const getProjectFileContents = async (projectId: number): Promise<FileContent[]> => {
+  const response = await apiClient.get<string>('/files/contents', {
+    params: { project_id: projectId },
+    responseType: 'text',
+    transformResponse: (data) => data,
+  })
+  if (response.status !== 200) {
+    throw new Error(`Failed to fetch file contents: ${response.status}`)
+  }
+  return response.data
+    .split('\n')
+    .filter((line) => line.trim().length > 0)
+    .map((line) => JSON.parse(line) as FileContent)
+}
+
+export const regenerateSingleFile = async (projectId: number, filename: string): Promise<GenerationStarted> => {
   const response = await apiClient.post(`/files/generate/${projectId}/file/${filename}`)
   return response.data
 }
+
+export interface FileSection {
+  slug: string
+  title: string
+  level: number
+  path: string[]
+  children: FileSection[]
+}
+
+export const getFileSections = async (fileId: number): Promise<FileSection[]> => {
+  const response = await apiClient.get<{ file_id: number; filename: string; sections: FileSection[] }>(`/files/${fileId}/sections`)
+  return response.data.sections
+}
+
+// Rewrites only one section of the file (much faster than regenerating the whole file)
+export const regenerateFileSection = async (
+  fileId: number,
+  section: string,
+  instructions?: string
+): Promise<GenerationStarted> => {
+  const response = await apiClient.post(`/files/${fileId}/sections/regenerate`, { section, instructions })
+  return response.data
+}
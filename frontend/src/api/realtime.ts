@@ -0,0 +1,111 @@
+import type { GeneratedFile, GenerationLog } from './files'
+
+export type ProjectEvent =
+  | { type: 'snapshot'; project_id: number; files: GeneratedFile[]; last_log_id: number }
+  | { type: 'log'; project_id: number; log: GenerationLog }
+  | { type: 'logs_cleared'; project_id: number }
+  | { type: 'file'; project_id: number; file: GeneratedFile }
+  | { type: 'file_deleted'; project_id: number; file_id: number }
+  | { type: 'files_cleared'; project_id: number }
+  | { type: 'job_started'; project_id: number; kind: 'all' | 'single'; filename?: string }
+  | { type: 'job_finished'; project_id: number; kind: 'all' | 'single'; outcome: string }
+  | { type: 'resync'; project_id?: undefined }
+
+type Listener = (event: ProjectEvent) => void
+
+const MAX_RECONNECT_DELAY_MS = 30000
+
+const getSocketURL = (token: string): string => {
+  // Same origin as the REST API (nginx proxies /api, including upgrades)
+  const base = import.meta.env.DEV && import.meta.env.VITE_API_URL
+    ? new URL(import.meta.env.VITE_API_URL, window.location.href)
+    : new URL('/api', window.location.href)
+  base.protocol = base.protocol === 'https:' ? 'wss:' : 'ws:'
+  return `${base.href.replace(/\/$/, '')}/ws/projects?token=${encodeURIComponent(token)}`
+}
+
+/**
+ * One WebSocket per tab, multiplexing the status of every project a page
+ * subscribes to. Reconnects with backoff and re-subscribes automatically.
+ */
+class ProjectUpdates {
+  private socket: WebSocket | null = null
+  private listeners = new Map<number, Set<Listener>>()
+  private reconnectDelay = 1000
+  private reconnectTimer: number | null = null
+
+  get connected(): boolean {
+    return this.socket?.readyState === WebSocket.OPEN
+  }
+
+  subscribe(projectId: number, listener: Listener): () => void {
+    let projectListeners = this.listeners.get(projectId)
+    if (!projectListeners) {
+      projectListeners = new Set()
+      this.listeners.set(projectId, projectListeners)
+      this.send({ action: 'subscribe', project_ids: [projectId] })
+    }
+    projectListeners.add(listener)
+    this.connect()
+
+    return () => {
+      const current = this.listeners.get(projectId)
+      if (!current) return
+      current.delete(listener)
+      if (current.size === 0) {
+        this.listeners.delete(projectId)
+        this.send({ action: 'unsubscribe', project_ids: [projectId] })
+      }
+      if (this.listeners.size === 0) this.disconnect()
+    }
+  }
+
+  private connect() {
+    if (this.socket || this.reconnectTimer !== null) return
+    const token = localStorage.getItem('token')
+    if (!token || typeof WebSocket === 'undefined') return
+
+    const socket = new WebSocket(getSocketURL(token))
+    this.socket = socket
+    socket.onopen = () => {
+      this.reconnectDelay = 1000
+      if (this.listeners.size) {
+        this.send({ action: 'subscribe', project_ids: [...this.listeners.keys()] })
+      }
+    }
+    socket.onmessage = (message) => {
+      const event = JSON.parse(message.data) as ProjectEvent
+      if (event.type === 'resync') {
+        this.listeners.forEach((projectListeners) => projectListeners.forEach((listener) => listener(event)))
+        return
+      }
+      if (event.project_id === undefined) return
+      this.listeners.get(event.project_id)?.forEach((listener) => listener(event))
+    }
+    socket.onclose = () => {
+      this.socket = null
+      if (!this.listeners.size) return
+      this.reconnectTimer = window.setTimeout(() => {
+        this.reconnectTimer = null
+        this.connect()
+      }, this.reconnectDelay)
+      this.reconnectDelay = Math.min(this.reconnectDelay * 2, MAX_RECONNECT_DELAY_MS)
+    }
+  }
+
+  private disconnect() {
+    if (this.reconnectTimer !== null) {
+      window.clearTimeout(this.reconnectTimer)
+      this.reconnectTimer = null
+    }
+    this.socket?.close()
+    this.socket = null
+  }
+
+  private send(command: { action: 'subscribe' | 'unsubscribe'; project_ids: number[] }) {
+    // While connecting, onopen subscribes to everything in `listeners`
+    if (this.connected) this.socket!.send(JSON.stringify(command))
+  }
+}
+
+export const projectUpdates = new ProjectUpdates()
@@ -1,14 +1,14 @@
 import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { createProject } from '../api/projects'
-import { getCompetitions, type Competition } from '../api/competitions'
+import { getCompetitionSummaries, getCompetition, type Competition, type CompetitionSummary } from '../api/competitions'
 import './ProjectCreate.css'
 
 function ProjectCreate() {
   const [name, setName] = useState('')
   const [competitionId, setCompetitionId] = useState<number | null>(null)
   const [ideaDescription, setIdeaDescription] = useState('')
-  const [competitions, setCompetitions] = useState<Competition[]>([])
+  const [competitions, setCompetitions] = useState<CompetitionSummary[]>([])
   const [selectedCompetition, setSelectedCompetition] = useState<Competition | null>(null)
   const [showAdvice, setShowAdvice] = useState(false)
   const [error, setError] = useState('')
@@ -21,17 +21,28 @@ function ProjectCreate() {
   }, [])
 
   useEffect(() => {
-    if (competitionId) {
-      const competition = competitions.find(c => c.id === competitionId)
-      setSelectedCompetition(competition || null)
-    } else {
+    if (!competitionId) {
       setSelectedCompetition(null)
+      return
+    }
+    // Prompts are only fetched for the selected competition
+    let cancelled = false
+    getCompetition(competitionId)
+      .then((competition) => {
+        if (!cancelled) setSelectedCompetition(competition)
+      })
+      .catch((err) => {
+        console.error('Error loading competition:', err)
+        if (!cancelled) setSelectedCompetition(null)
+      })
+    return () => {
+      cancelled = true
     }
-  }, [competitionId, competitions])
+  }, [competitionId])
 
   const loadCompetitions = async () => {
     try {
-      const data = await getCompetitions()
+      const data = await getCompetitionSummaries()
       setCompetitions(data)
     } catch (err) {
       console.error('Error loading competitions:', err)
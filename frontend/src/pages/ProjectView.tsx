@@ -3,10 +3,21 @@ import { useParams, useNavigate } from 'react-router-dom'
 import ReactMarkdown from 'react-markdown'
 import remarkGfm from 'remark-gfm'
 import { getProject, updateProject, deleteProject } from '../api/projects'
-import { generateFiles, getProjectFiles, downloadFile, downloadAllFiles, getGenerationLogs, getFileContent, regenerateSingleFile, type GeneratedFile, type GenerationLog, type FileContent } from '../api/files'
+import { generateFiles, cancelGeneration, getProjectFiles, downloadFile, downloadAllFiles, getGenerationLogs, getFileContent, getProjectFileContents, regenerateSingleFile, getFileSections, regenerateFileSection, type FileSection, type GeneratedFile, type GenerationLog, type FileContent } from '../api/files'
 import type { Project } from '../api/projects'
+import { projectUpdates, type ProjectEvent } from '../api/realtime'
 import './ProjectView.css'
 
+// Seconds the server may hold a logs request open (below the 10s client timeout)
+const LOG_WAIT_SECONDS = 8
+
+// Newest first
+const sortFiles = (files: GeneratedFile[]): GeneratedFile[] =>
+  [...files].sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime())
+
+const flattenSections = (sections: FileSection[]): FileSection[] =>
+  sections.flatMap((section) => [section, ...flattenSections(section.children)])
+
 function ProjectView() {
   const { id } = useParams<{ id: string }>()
   const navigate = useNavigate()
@@ -20,10 +31,16 @@ function ProjectView() {
   const [editedDescription, setEditedDescription] = useState('')
   const [saving, setSaving] = useState(false)
   const [previewFile, setPreviewFile] = useState<FileContent | null>(null)
+  const [previewSections, setPreviewSections] = useState<FileSection[]>([])
+  const [selectedSection, setSelectedSection] = useState('')
   const [loadingPreview, setLoadingPreview] = useState(false)
   const [regeneratingFile, setRegeneratingFile] = useState<string | null>(null)
   const [deleting, setDeleting] = useState(false)
   const logsEndRef = useRef<HTMLDivElement>(null)
+  // File contents prefetched in one request so switching documents needs no round trip
+  const contentCacheRef = useRef<Map<number, FileContent>>(new Map())
+  // Id of the newest log shown, used as the since_id cursor while generating
+  const lastLogIdRef = useRef(0)
 
   useEffect(() => {
     const loadProject = async () => {
@@ -62,6 +79,62 @@ function ProjectView() {
     loadProject()
   }, [id])
 
+  // Live updates over the shared WebSocket; pollForFiles is only the fallback
+  useEffect(() => {
+    if (!id) return
+    const projectId = parseInt(id, 10)
+    if (isNaN(projectId)) return
+    return projectUpdates.subscribe(projectId, (event) => handleProjectEvent(projectId, event))
+  }, [id])
+
+  const appendLogs = (newLogs: GenerationLog[]) => {
+    if (!newLogs.length) return
+    lastLogIdRef.current = Math.max(lastLogIdRef.current, newLogs[newLogs.length - 1].id)
+    setLogs((previous) => {
+      const known = new Set(previous.map((log) => log.id))
+      return [...previous, ...newLogs.filter((log) => !known.has(log.id))]
+    })
+  }
+
+  const handleProjectEvent = async (projectId: number, event: ProjectEvent) => {
+    switch (event.type) {
+      case 'snapshot':
+        setFiles(sortFiles(event.files))
+        // Catch up on logs written while we were not connected
+        if (event.last_log_id > lastLogIdRef.current) {
+          appendLogs(await getGenerationLogs(projectId, lastLogIdRef.current))
+        }
+        break
+      case 'log':
+        appendLogs([event.log])
+        break
+      case 'logs_cleared':
+        setLogs([])
+        break
+      case 'file':
+        setFiles((previous) => sortFiles([...previous.filter((f) => f.id !== event.file.id), event.file]))
+        break
+      case 'file_deleted':
+        setFiles((previous) => previous.filter((f) => f.id !== event.file_id))
+        break
+      case 'files_cleared':
+        setFiles([])
+        break
+      case 'job_started':
+        setGenerating(true)
+        break
+      case 'job_finished':
+        setGenerating(false)
+        setRegeneratingFile(null)
+        prefetchContents(projectId)
+        break
+      case 'resync':
+        setFiles(sortFiles(await getProjectFiles(projectId)))
+        appendLogs(await getGenerationLogs(projectId, lastLogIdRef.current))
+        break
+    }
+  }
+
   const scrollToBottom = () => {
     logsEndRef.current?.scrollIntoView({ behavior: 'smooth' })
   }
@@ -74,10 +147,7 @@ function ProjectView() {
     try {
       const projectFiles = await getProjectFiles(projectId)
       // Sort files by created_at descending to show newest first
-      const sortedFiles = [...projectFiles].sort((a, b) => 
-        new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-      )
-      setFiles(sortedFiles)
+      setFiles(sortFiles(projectFiles))
       
       // Load existing logs
       await loadLogs(projectId)
@@ -91,6 +161,8 @@ function ProjectView() {
         if (hasGenerating) {
           setGenerating(true)
           pollForFiles(projectId)
+        } else {
+          prefetchContents(projectId)
         }
       }
     } catch (err) {
@@ -98,19 +170,30 @@ function ProjectView() {
     }
   }
 
+  const prefetchContents = async (projectId: number) => {
+    try {
+      const contents = await getProjectFileContents(projectId)
+      contentCacheRef.current = new Map(contents.map((content) => [content.id, content]))
+    } catch (err) {
+      // Not fatal - handleViewFile falls back to fetching a single file
+      console.error('Error prefetching file contents:', err)
+    }
+  }
+
   const loadLogs = async (projectId: number) => {
     try {
       const projectLogs = await getGenerationLogs(projectId)
       setLogs(projectLogs)
+      lastLogIdRef.current = projectLogs.length ? projectLogs[projectLogs.length - 1].id : 0
     } catch (err) {
       console.error('Error loading logs:', err)
     }
   }
 
-  const startFileGeneration = async (projectId: number) => {
+  const startFileGeneration = async (projectId: number, restart = false) => {
     setGenerating(true)
     try {
-      await generateFiles(projectId)
+      await generateFiles(projectId, 'all', restart)
       // Poll for files
       pollForFiles(projectId)
     } catch (err: any) {
@@ -121,23 +204,19 @@ function ProjectView() {
   }
 
   const pollForFiles = async (projectId: number) => {
-    const maxAttempts = 120 // Poll for up to 10 minutes (5 second intervals)
+    const maxAttempts = 120 // Poll for up to ~16 minutes (long-polls of up to 8 seconds)
     let attempts = 0
 
     const poll = async () => {
+      // The WebSocket pushes the same updates once it is connected
+      if (projectUpdates.connected) return
       try {
-        // Poll for both files and logs
-        const [projectFiles, projectLogs] = await Promise.all([
-          getProjectFiles(projectId),
-          getGenerationLogs(projectId)
-        ])
+        // Wait until there are new logs (or the job finishes), then refresh files
+        appendLogs(await getGenerationLogs(projectId, lastLogIdRef.current, LOG_WAIT_SECONDS))
+        const projectFiles = await getProjectFiles(projectId)
         
         // Sort files by created_at descending to show newest first
-        const sortedFiles = [...projectFiles].sort((a, b) => 
-          new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-        )
-        setFiles(sortedFiles)
-        setLogs(projectLogs)
+        setFiles(sortFiles(projectFiles))
         
         const hasGenerating = projectFiles.some(f => f.status === 'generating' || f.status === 'pending')
         const hasCompleted = projectFiles.some(f => f.status === 'completed')
@@ -146,12 +225,13 @@ function ProjectView() {
         if (!hasGenerating && (hasCompleted || hasError)) {
           setGenerating(false)
           setRegeneratingFile(null) // Clear regenerating state
+          prefetchContents(projectId)
           return
         }
         
         if (attempts < maxAttempts) {
           attempts++
-          setTimeout(poll, 2000) // Poll every 2 seconds for more responsive updates
+          poll() // The server already waited for news, so poll again right away
         } else {
           setGenerating(false)
           setError('File generation is taking longer than expected. Please refresh the page.')
@@ -251,7 +331,8 @@ function ProjectView() {
       setRegeneratingFile(null) // Clear any single file regeneration state
       // Small delay to ensure state is reset before starting
       await new Promise(resolve => setTimeout(resolve, 100))
-      await startFileGeneration(projectId)
+      // Replaces a run that is still going (e.g. started before the idea was edited)
+      await startFileGeneration(projectId, true)
     } catch (err) {
       console.error('Error regenerating files:', err)
       setError('Failed to regenerate files. Please try again.')
@@ -259,7 +340,37 @@ function ProjectView() {
     }
   }
 
+  const handleCancelGeneration = async () => {
+    if (!id) return
+    try {
+      await cancelGeneration(parseInt(id, 10))
+    } catch (err) {
+      console.error('Error cancelling generation:', err)
+      setError('Failed to cancel generation. Please try again.')
+    }
+  }
+
+  const handleUpdateChangedFiles = async () => {
+    if (!id) return
+    const projectId = parseInt(id, 10)
+    setError('')
+    setGenerating(true)
+    try {
+      await generateFiles(projectId, 'stale')
+      pollForFiles(projectId)
+    } catch (err) {
+      console.error('Error updating files:', err)
+      setError('Failed to update files. Please try again.')
+      setGenerating(false)
+    }
+  }
+
   const handleViewFile = async (fileId: number) => {
+    const cached = contentCacheRef.current.get(fileId)
+    if (cached) {
+      setPreviewFile(cached)
+      return
+    }
     setLoadingPreview(true)
     setError('')
     try {
@@ -277,6 +388,33 @@ function ProjectView() {
     setPreviewFile(null)
   }
 
+  // Load the heading tree of markdown previews so single sections can be regenerated
+  useEffect(() => {
+    setPreviewSections([])
+    setSelectedSection('')
+    if (!previewFile || previewFile.file_type !== 'md') return
+    getFileSections(previewFile.id)
+      .then((sections) => setPreviewSections(flattenSections(sections)))
+      .catch((err) => console.error('Error loading file sections:', err))
+  }, [previewFile])
+
+  const handleRegenerateSection = async () => {
+    if (!id || !previewFile || !selectedSection) return
+    const projectId = parseInt(id, 10)
+    const filename = previewFile.filename
+    try {
+      setError('')
+      await regenerateFileSection(previewFile.id, selectedSection)
+      setPreviewFile(null)
+      setRegeneratingFile(filename)
+      setGenerating(true)
+      pollForFiles(projectId)
+    } catch (err) {
+      console.error('Error regenerating section:', err)
+      setError('Failed to regenerate section. Please try again.')
+    }
+  }
+
   const handleDeleteProject = async () => {
     if (!id) return
     
@@ -436,6 +574,15 @@ function ProjectView() {
                 >
                   {generating ? 'Regenerating...' : 'Regenerate All'}
                 </button>
+                <button 
+                  onClick={handleUpdateChangedFiles} 
+                  className="regenerate-btn" 
+                  disabled={generating || deleting}
+                  type="button"
+                  title="Regenerate only the files whose project details or competition prompt changed"
+                >
+                  Update Changed
+                </button>
                 <button 
                   onClick={handleDownloadAll} 
                   className="download-all-btn"
@@ -462,6 +609,9 @@ function ProjectView() {
             <div className="generating-header">
               <div className="spinner"></div>
               <h3>Generating Files...</h3>
+              <button onClick={handleCancelGeneration} className="btn-sm btn-outline" type="button">
+                Cancel
+              </button>
             </div>
             <div className="logs-container">
               {logs.length === 0 ? (
@@ -540,6 +690,25 @@ function ProjectView() {
             <div className="file-preview-content" onClick={(e) => e.stopPropagation()}>
               <div className="file-preview-header">
                 <h3>{previewFile.filename}</h3>
+                {previewSections.length > 0 && (
+                  <div className="section-regenerate">
+                    <select value={selectedSection} onChange={(e) => setSelectedSection(e.target.value)}>
+                      <option value="">Choose a section…</option>
+                      {previewSections.map((section) => (
+                        <option key={section.slug} value={section.slug}>
+                          {'\u00a0\u00a0'.repeat(section.level - 1)}{section.title}
+                        </option>
+                      ))}
+                    </select>
+                    <button
+                      onClick={handleRegenerateSection}
+                      className="btn-sm btn-secondary"
+                      disabled={!selectedSection || generating}
+                    >
+                      Regenerate section
+                    </button>
+                  </div>
+                )}
                 <button onClick={handleClosePreview} className="close-preview-btn">×</button>
               </div>
               <div className="file-preview-body">